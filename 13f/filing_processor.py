@@ -1,17 +1,149 @@
 #too convoluted before, I will fix.
 """
 Process SEC filings and create visualizations of holdings over time
+Plotting, parsing and DataFrame libraries are imported inside the functions that use
+them, so importing this module (the scraper GUIs do at startup) stays cheap.
 """
-
-import pandas as pd
-import requests
-from bs4 import BeautifulSoup
-import time
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import sys
 from datetime import datetime
-import numpy as np
+
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sec_client import get_client
+
+# process_13f_filing keeps the information table's own column names
+INFO_TABLE_COLUMNS = {
+    'name': 'nameOfIssuer',
+    'type': 'titleOfClass',
+    'cusip': 'cusip',
+    'value': 'value',
+    'shares': 'shares',
+    'share_type': 'shareType',
+    'investment_discretion': 'investmentDiscretion',
+    'voting_authority': 'votingAuthority',
+}
+
+# Columns of the consolidated holdings analysis
+HOLDING_COLUMNS = ['date', 'name', 'value', 'shares', 'type', 'cusip']
+
+def _text(info_table, tag, default=''):
+    element = info_table.find(tag)
+    return element.text.strip() if element is not None and element.text else default
+
+def _number(text):
+    try:
+        return float(text.replace(',', ''))
+    except (AttributeError, ValueError):
+        return float('nan')
+
+def fetch_text(url):
+    """Filing page or document through the shared SEC client (filed documents are cached)"""
+    content = get_client().document(url)
+    if content is None:
+        raise ValueError(f"Could not fetch {url}")
+    return content.decode('utf-8', errors='replace')
+
+def parse_info_table(info_table, date):
+    """Holding record for one infoTable element"""
+    from sec_client.records import Holding
+
+    return Holding(
+        date=date,
+        name=_text(info_table, 'nameOfIssuer'),
+        type=_text(info_table, 'titleOfClass'),
+        cusip=_text(info_table, 'cusip'),
+        value=_number(_text(info_table, 'value')),
+        shares=_number(_text(info_table, 'sshPrnamt')),
+        share_type=_text(info_table, 'sshPrnamtType'),
+        investment_discretion=_text(info_table, 'investmentDiscretion'),
+        voting_authority=_number(_text(info_table, 'Sole', '0')),
+    )
+
+def find_info_table(cik, accession):
+    """Name of a 13F filing's information table XML from its index.json, None when missing"""
+    for item in get_client().filing_index(cik, accession) or []:
+        name = item.get('name', '')
+        if name.lower().endswith('.xml') and 'primary_doc' not in name:
+            return name
+    return None
+
+def fetch_holdings(cik, accession, date=''):
+    """
+    Holdings of one 13F filing, read from its information table
+
+    Args:
+        cik (int or str): Filer CIK
+        accession (str): Accession number with dashes
+        date (str): Date stamped on every holding
+
+    Returns:
+        HoldingTable, or None when the filing has no information table
+    """
+    from bs4 import BeautifulSoup
+    from sec_client.records import HoldingTable
+
+    name = find_info_table(cik, accession)
+    if name is None:
+        print(f"Could not find XML table in filing {accession}")
+        return None
+    content = get_client().archive(cik, accession, name)
+    if content is None:
+        return None
+
+    holdings = HoldingTable()
+    for info_table in BeautifulSoup(content, 'xml').find_all('infoTable'):
+        holdings.append(parse_info_table(info_table, date))
+    return holdings
+
+def _positions(holdings):
+    """CUSIP -> [name, shares, value], rows of one issue summed"""
+    positions = {}
+    for holding in holdings:
+        position = positions.setdefault(holding.cusip, [holding.name, 0.0, 0.0])
+        position[1] += holding.shares
+        position[2] += holding.value
+    return positions
+
+def diff_holdings(before, after):
+    """
+    Position changes between two 13F filings, matched by CUSIP
+
+    Args:
+        before, after (HoldingTable): Earlier and later filing
+
+    Returns:
+        list: One dict per CUSIP with name, shares and value before and after, and change
+        ('new', 'exited', 'increased', 'decreased' or 'unchanged'), largest value moves first
+    """
+    old = _positions(before)
+    new = _positions(after)
+    changes = []
+    for cusip in old.keys() | new.keys():
+        name, shares_before, value_before = old.get(cusip, ['', 0.0, 0.0])
+        name_after, shares_after, value_after = new.get(cusip, [name, 0.0, 0.0])
+        if cusip not in old:
+            change = 'new'
+        elif cusip not in new:
+            change = 'exited'
+        elif shares_after > shares_before:
+            change = 'increased'
+        elif shares_after < shares_before:
+            change = 'decreased'
+        else:
+            change = 'unchanged'
+        changes.append({
+            'cusip': cusip,
+            'name': name_after or name,
+            'shares_before': shares_before,
+            'shares_after': shares_after,
+            'value_before': value_before,
+            'value_after': value_after,
+            'change': change,
+        })
+    changes.sort(key=lambda row: abs(row['value_after'] - row['value_before']), reverse=True)
+    return changes
 
 def process_13f_filing(filing_info):
     """
@@ -23,27 +155,20 @@ def process_13f_filing(filing_info):
     Returns:
         pd.DataFrame: Combined table data from the filing
     """
-    headers = {
-        'User-Agent': 'Hayden Herstrom herstromresource@gmail.com',
-        'Accept': 'application/json',
-        'Host': 'www.sec.gov'
-    }
+    from bs4 import BeautifulSoup
+    from sec_client.records import HoldingTable
     
     try:
-        # Add delay to respect SEC rate limits
-        time.sleep(0.1)
-        
         # First get the index page to find the correct XML file
         print(f"Fetching index page: {filing_info['link']}")
-        response = requests.get(filing_info['link'], headers=headers)
-        response.raise_for_status()
+        index_page = fetch_text(filing_info['link'])
         
         # Print the content for debugging
         print("Index page content:")
-        print(response.text[:1000])  # Print first 1000 chars for debugging
+        print(index_page[:1000])  # Print first 1000 chars for debugging
         
         # Parse the index page to find the XML file
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = BeautifulSoup(index_page, 'html.parser')
         
         # Debug: Print all table rows
         print("\nFound table rows:")
@@ -76,34 +201,20 @@ def process_13f_filing(filing_info):
             
         print(f"Fetching: {xml_url}")
         
-        # Get the XML file
-        response = requests.get(xml_url, headers=headers)
-        response.raise_for_status()
-        
-        # Parse the XML
-        soup = BeautifulSoup(response.text, 'xml')
+        # Get and parse the XML file
+        soup = BeautifulSoup(fetch_text(xml_url), 'xml')
         
         # Extract data from XML
-        holdings_data = []
+        holdings_data = HoldingTable()
         for info_table in soup.find_all('infoTable'):
-            holding = {
-                'nameOfIssuer': info_table.find('nameOfIssuer').text if info_table.find('nameOfIssuer') else '',
-                'titleOfClass': info_table.find('titleOfClass').text if info_table.find('titleOfClass') else '',
-                'cusip': info_table.find('cusip').text if info_table.find('cusip') else '',
-                'value': info_table.find('value').text if info_table.find('value') else '',
-                'shares': info_table.find('sshPrnamt').text if info_table.find('sshPrnamt') else '',
-                'shareType': info_table.find('sshPrnamtType').text if info_table.find('sshPrnamtType') else '',
-                'investmentDiscretion': info_table.find('investmentDiscretion').text if info_table.find('investmentDiscretion') else '',
-                'votingAuthority': info_table.find('Sole').text if info_table.find('Sole') else '0'
-            }
-            holdings_data.append(holding)
+            holdings_data.append(parse_info_table(info_table, filing_info['date']))
         
         if not holdings_data:
             print(f"No holdings found in filing {filing_info['accession']}")
             return None
             
         # Convert to DataFrame
-        df = pd.DataFrame(holdings_data)
+        df = holdings_data.to_dataframe(list(INFO_TABLE_COLUMNS), rename=INFO_TABLE_COLUMNS)
         
         # Add metadata
         df['Filing_Date'] = filing_info['date']
@@ -123,6 +234,10 @@ def combine_selected_filings(selected_filings, company_name):
         selected_filings (list): List of filing info dictionaries
         company_name (str): Name of the company
     """
+    import pandas as pd
+    from bs4 import BeautifulSoup
+    from sec_client.records import HoldingTable
+    
     # Filter 13F-HR filings and notify user
     valid_filings = [f for f in selected_filings if f['type'] == '13F-HR']
     skipped_filings = [f for f in selected_filings if f['type'] != '13F-HR']
@@ -148,7 +263,7 @@ def combine_selected_filings(selected_filings, company_name):
     filings_dir = os.path.join(reports_dir, "individual_filings")
     os.makedirs(filings_dir, exist_ok=True)
     
-    all_holdings = []
+    all_holdings = HoldingTable()
     individual_dfs = []
     
     for filing in valid_filings:
@@ -156,14 +271,7 @@ def combine_selected_filings(selected_filings, company_name):
         
         try:
             # Get the index page
-            headers = {
-                'User-Agent': 'Your Company Name yourname@email.com',
-                'Accept': 'text/html,application/xhtml+xml',
-                'Host': 'www.sec.gov'
-            }
-            
-            response = requests.get(filing['link'], headers=headers)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            soup = BeautifulSoup(fetch_text(filing['link']), 'html.parser')
             
             # Find the XML file
             for row in soup.find_all('tr'):
@@ -175,26 +283,17 @@ def combine_selected_filings(selected_filings, company_name):
                         xml_url = f"{filing['link'].rsplit('/', 1)[0]}/{filename}"
                         
                         # Get and parse the XML
-                        xml_response = requests.get(xml_url, headers=headers)
-                        xml_soup = BeautifulSoup(xml_response.text, 'xml')
+                        xml_soup = BeautifulSoup(fetch_text(xml_url), 'xml')
                         
                         # Extract holdings data
-                        filing_holdings = []  # Store holdings for this specific filing
+                        filing_holdings = HoldingTable()  # Store holdings for this specific filing
                         for info_table in xml_soup.find_all('infoTable'):
-                            holding = {
-                                'date': filing['date'],
-                                'name': info_table.find('nameOfIssuer').text,
-                                'value': float(info_table.find('value').text),
-                                'shares': float(info_table.find('sshPrnamt').text),
-                                'type': info_table.find('titleOfClass').text,
-                                'cusip': info_table.find('cusip').text  # Adding CUSIP for verification
-                            }
-                            filing_holdings.append(holding)
-                            all_holdings.append(holding)
+                            filing_holdings.append(parse_info_table(info_table, filing['date']))
+                        all_holdings.extend(filing_holdings)
                         
                         # Create DataFrame for this filing and save it
                         if filing_holdings:
-                            filing_df = pd.DataFrame(filing_holdings)
+                            filing_df = filing_holdings.to_dataframe(HOLDING_COLUMNS)
                             individual_dfs.append(filing_df)
                             
                             # Save individual filing data to the subfolder
@@ -203,8 +302,6 @@ def combine_selected_filings(selected_filings, company_name):
                             filing_df.to_excel(filing_path, index=False)
                             print(f"Saved individual filing data to {filing_path}")
                         
-                        time.sleep(0.1)
-                        
                         break
             
         except Exception as e:
@@ -216,7 +313,7 @@ def combine_selected_filings(selected_filings, company_name):
         return
     
     # Convert to DataFrame and save consolidated data
-    df = pd.DataFrame(all_holdings)
+    df = all_holdings.to_dataframe(HOLDING_COLUMNS)
     
     # Create a verification spreadsheet showing consolidation
     verification_df = pd.DataFrame()
@@ -256,6 +353,11 @@ def combine_selected_filings(selected_filings, company_name):
 
 def create_holdings_visualizations(df, reports_dir):
     """Create various visualizations of the holdings data"""
+    import numpy as np
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
     
     sns.set_theme()
     
@@ -2,13 +2,18 @@
 Parse SEC JSON API for all files
 filter to certain files
 """
-import requests
+import os
+import sys
 import pandas as pd
 import PySimpleGUI as sg
 import json
-from datetime import datetime
 from filing_processor import combine_selected_filings
 
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sec_client import FilingIndex, get_client, load_filing_history
+
 def create_gui():
     filing_types = [
         'All Filings',
@@ -42,21 +47,9 @@ def create_gui():
     window.close()
 
 def get_sec_data(cik):
-    url = f"https://data.sec.gov/submissions/CIK{cik}.json"
-    print(f"Fetching URL: {url}")
-    
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept': 'application/json',
-    }
-    
-    try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching data: {e}")
-        return None
+    """Submissions JSON for a CIK from the shared SEC client, None on error"""
+    print(f"Fetching submissions for CIK {cik}")
+    return get_client().submissions(cik)
 
 def runtime(cik, window):
     data = get_sec_data(cik)
@@ -72,38 +65,25 @@ def runtime(cik, window):
     output = f"Business Name: {company_name}\n"
     output += "-" * 80 + "\n"
     
-    # Get recent filings
-    filings = data.get('filings', {}).get('recent', {})
+    # Get every filing, recent ones plus the older history pages
+    filings = load_filing_history(cik, submissions=data)
     if not filings:
         window['-OUTPUT-'].update(output + "No filings found")
         return
     
-    # Get the arrays of data
-    dates = filings.get('acceptanceDateTime', [])
-    accession_numbers = filings.get('accessionNumber', [])
-    filing_types = filings.get('form', [])
-    descriptions = filings.get('primaryDocument', [])
+    # Load the arrays once as typed columns and filter them with masks
+    index = FilingIndex(filings, cik)
+    rows = index.select(None if 'All Filings' in selected_types else selected_types)
+    shown = index.records(rows)
     
-    # Create layout for filings with checkboxes
+    # Create layout for filings with checkboxes, only for the rows that passed the filter
     filing_layout = []
-    for i in range(len(dates)):
-        filing_type = filing_types[i]
-        
-        # Skip if doesn't match selected types
-        if 'All Filings' not in selected_types and filing_type not in selected_types:
-            continue
-            
-        try:
-            date = datetime.strptime(dates[i].replace('T', ' ').replace('Z', ''), '%Y-%m-%d %H:%M:%S.%f').strftime('%Y-%m-%d')
-        except ValueError:
-            date = dates[i].split('T')[0]
-            
-        accession = accession_numbers[i]
-        description = descriptions[i]
-        
-        # Construct the filing URL - FIXED VERSION
-        accession_formatted = accession.replace('-', '')
-        link = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_formatted}/{accession}-index.htm"
+    for filing in shown:
+        date = filing['date']
+        filing_type = filing['type']
+        accession = filing['accession']
+        description = filing['description']
+        link = filing['link']
         
         # Create a unique key for each checkbox
         checkbox_key = f'-CB-{accession}-'
@@ -144,15 +124,8 @@ def runtime(cik, window):
         if event == 'Export Selected (13F)':
             # Get all selected filings
             selected_filings = [
-                {
-                    'date': dates[i],
-                    'type': filing_types[i],
-                    'accession': accession_numbers[i],
-                    'description': descriptions[i],
-                    'link': f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_numbers[i].replace('-', '')}/{accession_numbers[i]}-index.htm"
-                }
-                for i in range(len(dates))
-                if f'-CB-{accession_numbers[i]}-' in values and values[f'-CB-{accession_numbers[i]}-']
+                filing for filing in shown
+                if values.get(f"-CB-{filing['accession']}-")
             ]
             
             # Check if any 13F-HR filings are selected
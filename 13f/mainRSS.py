@@ -2,13 +2,26 @@
 Parse RSS feed for all files
 filter to certain files
 """
-
-import requests
+import os
+import sys
+from datetime import date, datetime
 import pandas as pd
 from bs4 import BeautifulSoup
-import feedparser
 import PySimpleGUI as sg
 
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sec_client import get_client
+from sec_client.feeds import fetch_filtered_feed, parse_feed
+
+# Type-filtered feeds page back this far unless another start date is given
+DEFAULT_HISTORY_YEARS = 5
+
+def default_since():
+    today = date.today()
+    return today.replace(year=today.year - DEFAULT_HISTORY_YEARS, day=min(today.day, 28)).isoformat()
+
 def create_gui():
     # Updated SEC filing types to match the actual terms from the feed
     filing_types = [
@@ -26,6 +39,7 @@ def create_gui():
         [sg.Text("Enter CIK # of company"), sg.InputText(key='-CIK-', default_text='0001965005')],
         [sg.Text("Select Filing Types:")],
         [sg.Listbox(filing_types, size=(30, 7), key='-FILINGS-', select_mode=sg.LISTBOX_SELECT_MODE_MULTIPLE, default_values=['All Filings'])],
+        [sg.Text("Filed since (YYYY-MM-DD)"), sg.InputText(key='-SINCE-', default_text=default_since(), size=(12, 1))],
         [sg.Button("Go"), sg.Button("Close")],
         [sg.Multiline(size=(80, 20), key='-OUTPUT-', disabled=True, reroute_stdout=True)]
     ]
@@ -44,97 +58,85 @@ def create_gui():
     window.close()
 
 def runtime(cik, window):
-    rss_feed = get_rss_feed(cik)
+    selected_types = window['-FILINGS-'].get()
+    forms = None if 'All Filings' in selected_types else selected_types
+    since = window['-SINCE-'].get().strip() or None
+    if since:
+        try:
+            datetime.strptime(since, '%Y-%m-%d')
+        except ValueError:
+            window['-OUTPUT-'].update(f"Invalid date: {since}, use YYYY-MM-DD")
+            return
+    rss_feed = get_rss_feed(cik, forms, since)
     
     #print_rss_debug_file(rss_feed)
     #Useful if you want to see the structure of the RSS feed
     
-    if rss_feed and rss_feed.entries:
-        selected_types = window['-FILINGS-'].get()
+    if rss_feed and rss_feed[1]:
+        title, entries = rss_feed
         
-        output = "Business Name: " + rss_feed.feed.title + "\n"
+        output = "Business Name: " + title + "\n"
         output += "-" * 80 + "\n"
         output += "Latest Filings:\n"
         output += "-" * 80 + "\n"
         
-        for entry in rss_feed.entries:
-            filing_type = entry.tags[0]['term'] if entry.tags else 'Unknown'
-            date = entry.updated.split('T')[0]
-            link = entry.link
-            title = entry.title
-            
-            # Modified filtering logic to match exact filing types
-            if 'All Filings' not in selected_types and filing_type not in selected_types:
-                continue
-                
-            output += f"Date: {date}\n"
-            output += f"Type: {filing_type}\n"
-            output += f"Filing: {title}\n"
-            output += f"Link: {link}\n"
+        for entry in entries:
+            output += f"Date: {entry.date}\n"
+            output += f"Type: {entry.form or 'Unknown'}\n"
+            output += f"Filing: {entry.title}\n"
+            output += f"Link: {entry.link}\n"
             output += "-" * 80 + "\n"
         
         window['-OUTPUT-'].update(output)
     else:
         window['-OUTPUT-'].update("No filings found or error in fetching data")
 
-def get_rss_feed(cik):
-    #TODO diffferent URL based on filing type - instead of selecting from list after getting everything since limit is 100
-    url = f"https://data.sec.gov/rss?cik={cik}&count=100"
-    print(f"Fetching URL: {url}")
+def get_rss_feed(cik, forms=None, since=None):
+    """
+    Latest filings of a company
     
-    headers = {
-            'authority': 'data.sec.gov',
-            'accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'accept-encoding': 'gzip, deflate, br, zstd',
-            'accept-language': 'en-US,en;q=0.8',
-            'cache-control': 'max-age=0',
-            'sec-ch-ua': '"Not(A:Brand";v="99", "Brave";v="133", "Chromium";v="133"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"Windows"',
-            'sec-fetch-dest': 'document',
-            'sec-fetch-mode': 'navigate',
-            'sec-fetch-site': 'none',
-            'sec-fetch-user': '?1',
-            'sec-gpc': '1',
-            'upgrade-insecure-requests': '1',
-            'user-agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/133.0.0.0 Safari/537.36'
-        }
+    Args:
+        cik (str): Company CIK
+        forms (list, optional): Form types to show, each is queried separately and paged
+            back to since, so no type is cut off at the 100-entry feed limit
+        since (str, optional): YYYY-MM-DD start of the history window for filtered types,
+            defaults to DEFAULT_HISTORY_YEARS back
     
-    response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        feed = feedparser.parse(response.text)
-        return feed
-    else:
-        print(f"Error: Status code {response.status_code}")
-        print(response.text)
+    Returns:
+        tuple: (feed title, list of FeedEntry newest first), or None on error
+    """
+    if forms:
+        since = since or default_since()
+        print(f"Fetching {', '.join(forms)} feeds for CIK {cik} since {since}")
+        title, entries = fetch_filtered_feed(cik, forms, since=since)
+        return (title, entries) if title or entries else None
+    
+    print(f"Fetching RSS feed for CIK {cik}")
+    content = get_client().rss(cik, count=100)
+    if content is None:
         return None
+    return parse_feed(content, cik)
     
 def print_rss_debug_file(rss_feed):
     """
     Write RSS feed data to a debug file with formatted output.
     
     Args:
-        rss_feed: A feedparser feed object
+        rss_feed (tuple): (feed title, list of FeedEntry) as returned by get_rss_feed
     """
+    title, entries = rss_feed
     with open('debug.txt', 'w') as f:
         f.write("Feed Object Structure:\n")
         f.write("=" * 50 + "\n\n")
-        
-        # Write feed attributes
-        f.write("Feed Attributes:\n")
-        f.write("-" * 20 + "\n")
-        for attr in dir(rss_feed):
-            if not attr.startswith('_'):  # Skip internal attributes
-                f.write(f"{attr}: {getattr(rss_feed, attr)}\n")
+        f.write(f"Feed title: {title}\n")
         
         # Write entries
         f.write("\nEntries:\n")
         f.write("-" * 20 + "\n")
-        for i, entry in enumerate(rss_feed.entries, 1):
+        for i, entry in enumerate(entries, 1):
             f.write(f"\nEntry {i}:\n")
-            for attr in dir(entry):
-                if not attr.startswith('_'):  # Skip internal attributes
-                    f.write(f"{attr}: {getattr(entry, attr)}\n")
+            for name, value in entry.to_dict().items():
+                f.write(f"{name}: {value}\n")
             f.write("-" * 50 + "\n")
 
 if __name__ == "__main__":
@@ -0,0 +1,338 @@
+"""
+Offline ingestion of the SEC nightly bulk archives
+companyfacts.zip and submissions.zip are read from local disk, parsed in a process pool
+and written into a partitioned columnar store:
+
+    <out_dir>/facts/part-00000.npz ...
+    <out_dir>/filings/part-00000.npz ...
+    <out_dir>/companies/part-00000.npz ...
+
+Download the archives from
+https://www.sec.gov/Archives/edgar/daily-index/xbrl/companyfacts.zip
+https://www.sec.gov/Archives/edgar/daily-index/bulkdata/submissions.zip
+"""
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from fact_store import FACT_COLUMNS, flatten_company_facts, concat_fact_tables
+
+# Filing metadata columns taken from the submissions "filings" arrays
+FILING_COLUMNS = {
+    'cik': 'int64',
+    'accession': 'object',
+    'form': 'object',
+    'filing_date': 'datetime64[D]',
+    'report_date': 'datetime64[D]',
+    'acceptance': 'object',
+    'primary_document': 'object',
+    'is_xbrl': 'bool',
+}
+
+# One row per company from the top level of each submissions document
+COMPANY_COLUMNS = {
+    'cik': 'int64',
+    'name': 'object',
+    'tickers': 'object',      # comma separated
+    'sic': 'int32',
+    'sic_description': 'object',
+    'category': 'object',     # filer status, e.g. "Large accelerated filer"
+    'fiscal_year_end': 'object',
+    'state_of_incorporation': 'object',
+}
+
+TABLE_COLUMNS = {
+    'facts': FACT_COLUMNS,
+    'filings': FILING_COLUMNS,
+    'companies': COMPANY_COLUMNS,
+}
+
+# CIK0000320193.json or CIK0000320193-submissions-001.json
+MEMBER_PATTERN = re.compile(r'CIK(\d{10})(-submissions-\d+)?\.json$')
+
+def _build_columns(rows, columns):
+    """Turn a dict of python lists into numpy arrays using a column spec"""
+    table = {}
+    for name, dtype in columns.items():
+        values = rows.get(name, [])
+        if dtype == 'object':
+            array = np.empty(len(values), dtype=object)
+            array[:] = values
+        else:
+            array = np.array(values, dtype=dtype)
+        table[name] = array
+    return table
+
+def flatten_submission_filings(filings, cik):
+    """
+    Flatten the parallel filing arrays of a submissions document
+
+    Args:
+        filings (dict): The filings.recent object, or the top level of a sidecar page
+        cik (int): Company CIK
+
+    Returns:
+        dict: Column name -> numpy array following FILING_COLUMNS
+    """
+    accessions = filings.get('accessionNumber', [])
+    count = len(accessions)
+
+    def column(key, default=''):
+        values = filings.get(key, [])
+        # Older documents sometimes carry shorter arrays, pad them out
+        return list(values) + [default] * (count - len(values))
+
+    rows = {
+        'cik': [int(cik)] * count,
+        'accession': accessions,
+        'form': column('form'),
+        'filing_date': column('filingDate'),
+        'report_date': column('reportDate'),
+        'acceptance': column('acceptanceDateTime'),
+        'primary_document': column('primaryDocument'),
+        'is_xbrl': [bool(v) for v in column('isXBRL', 0)],
+    }
+    return _build_columns(rows, FILING_COLUMNS)
+
+def flatten_submission_company(submission, cik):
+    """Company metadata row from the top level of a submissions document"""
+    sic = submission.get('sic') or 0
+    rows = {
+        'cik': [int(cik)],
+        'name': [submission.get('name') or ''],
+        'tickers': [','.join(submission.get('tickers') or [])],
+        'sic': [int(sic) if str(sic).isdigit() else 0],
+        'sic_description': [submission.get('sicDescription') or ''],
+        'category': [submission.get('category') or ''],
+        'fiscal_year_end': [submission.get('fiscalYearEnd') or ''],
+        'state_of_incorporation': [submission.get('stateOfIncorporation') or ''],
+    }
+    return _build_columns(rows, COMPANY_COLUMNS)
+
+def _concat(tables, columns):
+    if not tables:
+        return _build_columns({}, columns)
+    return {name: np.concatenate([t[name] for t in tables]) for name in columns}
+
+def write_partition(table, path):
+    """
+    Write one partition as an uncompressed .npz
+
+    Object columns are stored as fixed-width unicode so the file never needs pickle
+    """
+    arrays = {}
+    for name, column in table.items():
+        if column.dtype == object:
+            arrays[name] = column.astype(str) if len(column) else np.empty(0, dtype='U1')
+        else:
+            arrays[name] = column
+    tmp_path = path + '.tmp.npz'
+    np.savez(tmp_path, **arrays)
+    os.replace(tmp_path, path)
+
+def read_partition(path, columns=None):
+    """Read one partition back, restoring object string columns"""
+    with np.load(path, allow_pickle=False) as data:
+        names = columns or list(data.keys())
+        table = {}
+        for name in names:
+            column = data[name]
+            if column.dtype.kind == 'U':
+                column = column.astype(object)
+            table[name] = column
+    return table
+
+def list_partitions(store_dir, table_name):
+    """Sorted partition paths for a table in the store"""
+    table_dir = os.path.join(store_dir, table_name)
+    if not os.path.isdir(table_dir):
+        return []
+    return sorted(os.path.join(table_dir, name) for name in os.listdir(table_dir)
+                  if name.startswith('part-') and name.endswith('.npz'))
+
+def read_table(store_dir, table_name, columns=None):
+    """Read and concatenate every partition of a table"""
+    spec = TABLE_COLUMNS[table_name]
+    if columns:
+        spec = {name: spec[name] for name in columns}
+    tables = [read_partition(path, list(spec)) for path in list_partitions(store_dir, table_name)]
+    return _concat(tables, spec)
+
+def _facts_batch_worker(zip_path, members, part_path):
+    """Process pool worker: flatten a batch of companyfacts members into one partition"""
+    tables = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in members:
+            match = MEMBER_PATTERN.search(member)
+            cik = int(match.group(1)) if match else None
+            try:
+                # Stream the member straight into the JSON parser
+                with archive.open(member) as f:
+                    company_facts = json.load(f)
+            except (ValueError, OSError) as e:
+                print(f"Skipping {member}: {e}")
+                continue
+            tables.append(flatten_company_facts(company_facts, cik=cik))
+
+    table = concat_fact_tables(tables)
+    write_partition(table, part_path)
+    return len(table['val'])
+
+def _submissions_batch_worker(zip_path, members, filings_path, companies_path):
+    """Process pool worker: flatten a batch of submissions members into two partitions"""
+    filings = []
+    companies = []
+    with zipfile.ZipFile(zip_path) as archive:
+        for member in members:
+            match = MEMBER_PATTERN.search(member)
+            if not match:
+                continue
+            cik = int(match.group(1))
+            try:
+                with archive.open(member) as f:
+                    submission = json.load(f)
+            except (ValueError, OSError) as e:
+                print(f"Skipping {member}: {e}")
+                continue
+
+            if match.group(2):
+                # Sidecar page, the filing arrays sit at the top level
+                filings.append(flatten_submission_filings(submission, cik))
+            else:
+                filings.append(flatten_submission_filings(
+                    submission.get('filings', {}).get('recent', {}), cik))
+                companies.append(flatten_submission_company(submission, cik))
+
+    filing_table = _concat(filings, FILING_COLUMNS)
+    write_partition(filing_table, filings_path)
+    write_partition(_concat(companies, COMPANY_COLUMNS), companies_path)
+    return len(filing_table['accession'])
+
+def _zip_members(zip_path):
+    with zipfile.ZipFile(zip_path) as archive:
+        return sorted(name for name in archive.namelist() if MEMBER_PATTERN.search(name))
+
+def _staging_dir(store_dir, table_name):
+    """Empty directory the new partitions of a table are written to before they are swapped in"""
+    staging_dir = os.path.join(store_dir, f".{table_name}.staging")
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    os.makedirs(staging_dir)
+    return staging_dir
+
+def _swap_in(store_dir, table_name, staging_dir):
+    """
+    Replace a table's partitions with a finished staging directory
+
+    The old generation is only removed once the new one is in place, so a failed or
+    interrupted run leaves the store as it was.
+    """
+    table_dir = os.path.join(store_dir, table_name)
+    old_dir = os.path.join(store_dir, f".{table_name}.old")
+    shutil.rmtree(old_dir, ignore_errors=True)
+    if os.path.isdir(table_dir):
+        os.replace(table_dir, old_dir)
+    os.replace(staging_dir, table_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+
+def _ingest(worker, jobs, max_workers, label, store_dir, staging):
+    """Run the batches, then swap every staged table in, or discard them on failure"""
+    try:
+        total_rows = _run_batches(worker, jobs, max_workers, label)
+    except BaseException:
+        for staging_dir in staging.values():
+            shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+    for table_name, staging_dir in staging.items():
+        _swap_in(store_dir, table_name, staging_dir)
+    return total_rows
+
+def _run_batches(worker, jobs, max_workers, label):
+    total_rows = 0
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(worker, *job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            total_rows += future.result()
+            print(f"{label}: {done}/{len(jobs)} partitions, {total_rows:,} rows")
+    print(f"{label}: finished in {time.time() - start_time:.1f}s")
+    return total_rows
+
+def ingest_companyfacts_zip(zip_path, store_dir, max_workers=None, batch_size=250):
+    """
+    Ingest companyfacts.zip into the facts table of the store
+
+    Args:
+        zip_path (str): Path to companyfacts.zip
+        store_dir (str): Root directory of the columnar store
+        max_workers (int, optional): Process pool size, defaults to the CPU count
+        batch_size (int): Companies per partition
+
+    Returns:
+        int: Number of fact rows written
+    """
+    members = _zip_members(zip_path)
+    # A refresh never mixes two archive generations, the old partitions stay until it succeeds
+    staging = {'facts': _staging_dir(store_dir, 'facts')}
+    jobs = []
+    for i in range(0, len(members), batch_size):
+        part_path = os.path.join(staging['facts'], f"part-{i // batch_size:05d}.npz")
+        jobs.append((zip_path, members[i:i + batch_size], part_path))
+
+    print(f"Ingesting {len(members)} companyfacts members from {zip_path}")
+    return _ingest(_facts_batch_worker, jobs, max_workers, 'facts', store_dir, staging)
+
+def ingest_submissions_zip(zip_path, store_dir, max_workers=None, batch_size=1000):
+    """
+    Ingest submissions.zip into the filings and companies tables of the store
+
+    Args:
+        zip_path (str): Path to submissions.zip
+        store_dir (str): Root directory of the columnar store
+        max_workers (int, optional): Process pool size, defaults to the CPU count
+        batch_size (int): Archive members per partition
+
+    Returns:
+        int: Number of filing rows written
+    """
+    members = _zip_members(zip_path)
+    staging = {'filings': _staging_dir(store_dir, 'filings'),
+               'companies': _staging_dir(store_dir, 'companies')}
+    jobs = []
+    for i in range(0, len(members), batch_size):
+        name = f"part-{i // batch_size:05d}.npz"
+        jobs.append((zip_path, members[i:i + batch_size],
+                     os.path.join(staging['filings'], name), os.path.join(staging['companies'], name)))
+
+    print(f"Ingesting {len(members)} submissions members from {zip_path}")
+    return _ingest(_submissions_batch_worker, jobs, max_workers, 'filings', store_dir, staging)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest SEC bulk archives into a local columnar store")
+    parser.add_argument('--companyfacts', help="Path to companyfacts.zip")
+    parser.add_argument('--submissions', help="Path to submissions.zip")
+    parser.add_argument('--out', default='universe_data', help="Data directory (default: universe_data)")
+    parser.add_argument('--workers', type=int, default=None, help="Process pool size")
+    parser.add_argument('--no-store', action='store_true', help="Skip building the memory-mapped universe store")
+    args = parser.parse_args()
+
+    if not args.companyfacts and not args.submissions:
+        parser.print_help()
+        sys.exit(1)
+
+    if args.submissions:
+        ingest_submissions_zip(args.submissions, args.out, max_workers=args.workers)
+    if args.companyfacts:
+        ingest_companyfacts_zip(args.companyfacts, args.out, max_workers=args.workers)
+
+    if not args.no_store:
+        from universe_store import build_universe_store
+        build_universe_store(args.out)
@@ -0,0 +1,253 @@
+"""
+Company search combobox for the retriever GUI
+Kept in its own module so the command line tools never import tkinter.
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+class AutocompleteCombobox(ttk.Frame):
+    """Custom autocomplete combobox widget for company search"""
+    def __init__(self, parent, load_companies, **kwargs):
+        super().__init__(parent, **kwargs)
+        # Callable returning the company_tickers.json dict
+        self.load_companies = load_companies
+        
+        # Create internal widgets
+        self.entry_var = tk.StringVar()
+        self.entry = ttk.Entry(self, textvariable=self.entry_var, width=70)
+        self.entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Create a popup frame that will be positioned in the toplevel
+        self.popup = tk.Toplevel(self)
+        self.popup.withdraw()
+        self.popup.overrideredirect(True)  # Remove window decorations
+        
+        # Make the popup frame behave as a dropdown
+        self.popup.bind("<Escape>", lambda e: self._hide_listbox())
+        
+        # Create listbox inside popup
+        listbox_frame = ttk.Frame(self.popup)
+        listbox_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Use the same width as the entry field
+        self.listbox = tk.Listbox(listbox_frame, height=8, exportselection=False)
+        scrollbar = ttk.Scrollbar(listbox_frame, orient=tk.VERTICAL, command=self.listbox.yview)
+        self.listbox.configure(yscrollcommand=scrollbar.set)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Track popup visibility
+        self.popup_visible = False
+        
+        # Bind events
+        self.entry.bind("<KeyRelease>", self._on_key_release)
+        self.entry.bind("<FocusOut>", lambda e: self.after(200, self._hide_listbox))
+        self.entry.bind("<FocusIn>", self._on_focus_in)
+        self.listbox.bind("<ButtonRelease-1>", self._on_listbox_select)
+        self.listbox.bind("<Return>", self._on_listbox_select)
+        self.listbox.bind("<Double-Button-1>", self._on_listbox_select)
+        
+        # Store values for search delay
+        self._after_id = None
+        self._delay_ms = 300  # Delay after typing in milliseconds
+        
+        # Store company data
+        self.matches = []
+        
+    def _on_key_release(self, event):
+        """Handle key release in entry widget"""
+        # Handle special keys
+        if event.keysym in ('Down', 'Up'):
+            self._handle_arrow_keys(event.keysym)
+            return
+        elif event.keysym == 'Return' and self.popup_visible:
+            self._on_listbox_select(None)
+            return
+        elif event.keysym == 'Escape':
+            self._hide_listbox()
+            return
+            
+        # Cancel previous delayed search if any
+        if self._after_id:
+            self.after_cancel(self._after_id)
+        
+        search_text = self.entry_var.get().strip()
+        
+        # If search text is too short, hide listbox
+        if len(search_text) < 2:
+            self._hide_listbox()
+            return
+            
+        # Schedule new search with delay
+        self._after_id = self.after(self._delay_ms, lambda: self._search_companies(search_text))
+    
+    def _handle_arrow_keys(self, key):
+        """Handle up/down arrow keys for listbox navigation"""
+        if not self.popup_visible:
+            self._search_companies(self.entry_var.get().strip())
+            return
+            
+        if not self.listbox.curselection():
+            # No selection, select first item
+            if self.listbox.size() > 0:
+                self.listbox.selection_set(0)
+            return
+                
+        # Get current selection
+        selection = self.listbox.curselection()[0]
+        
+        # Clear current selection
+        self.listbox.selection_clear(selection)
+        
+        # Calculate new selection
+        if key == 'Down':
+            new_selection = selection + 1 if selection < self.listbox.size() - 1 else 0
+        else:  # Up
+            new_selection = selection - 1 if selection > 0 else self.listbox.size() - 1
+            
+        # Set new selection
+        self.listbox.selection_set(new_selection)
+        self.listbox.see(new_selection)
+    
+    def _search_companies(self, search_str):
+        """Search companies and update listbox"""
+        self._after_id = None  # Clear the after ID since it has executed
+        
+        # Clear the listbox
+        self.listbox.delete(0, tk.END)
+        self.matches = []
+        
+        if not search_str:
+            self._hide_listbox()
+            return
+        
+        # Get the company data
+        try:
+            companies_data = self.load_companies()
+            if not companies_data:
+                messagebox.showerror("Error", "Failed to retrieve company data")
+                return
+        except Exception as e:
+            messagebox.showerror("Error", f"Error retrieving company data: {str(e)}")
+            return
+        
+        # Check if search string is numeric (potential CIK search)
+        is_cik_search = search_str.isdigit()
+        search_str = search_str.lower().strip()
+        
+        # Search companies
+        for key in companies_data:
+            company = companies_data[key]
+            
+            # Get company details
+            try:
+                # Fix: Get CIK as integer, convert to string, then pad
+                cik_value = company.get('cik_str', company.get('cik', ''))
+                if cik_value == '' or cik_value is None:
+                    cik_raw = '0'
+                else:
+                    cik_raw = str(int(cik_value))
+                cik_padded = cik_raw.zfill(10)
+                ticker = company.get('ticker', '').lower()
+                title = company.get('title', '').lower()
+                
+                # Search by ticker (exact match takes priority)
+                if search_str == ticker:
+                    display_text = f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})"
+                    self.listbox.insert(0, display_text)
+                    self.matches.insert(0, display_text)
+                # Search by CIK (if search is numeric)
+                elif is_cik_search and search_str in cik_raw:
+                    display_text = f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})"
+                    self.listbox.insert(tk.END, display_text)
+                    self.matches.append(display_text)
+                # Search by ticker (partial match)
+                elif search_str in ticker:
+                    display_text = f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})"
+                    self.listbox.insert(tk.END, display_text)
+                    self.matches.append(display_text)
+                # Search by company name (partial match)
+                elif search_str in title:
+                    display_text = f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})"
+                    self.listbox.insert(tk.END, display_text)
+                    self.matches.append(display_text)
+            except Exception as e:
+                print(f"Error processing company {key}: {e}")
+                continue
+            
+            # Limit to top 50 matches
+            if len(self.matches) >= 50:
+                break
+        
+        # Show listbox if we have matches
+        if self.matches:
+            if self.listbox.size() > 0:
+                self.listbox.selection_set(0)  # Select first item by default
+            self._show_listbox()
+        else:
+            self._hide_listbox()
+            self.listbox.insert(0, "No matches found")
+            self._show_listbox()
+    
+    def _on_listbox_select(self, event):
+        """Handle listbox item selection"""
+        try:
+            if self.listbox.curselection():
+                index = self.listbox.curselection()[0]
+                value = self.listbox.get(index)
+                if value != "No matches found":
+                    self.entry_var.set(value)
+                self._hide_listbox()
+                
+                # Trigger any bound selection events
+                self.event_generate("<<ComboboxSelected>>")
+                # Give focus back to the entry widget
+                self.entry.focus_set()
+        except (IndexError, tk.TclError) as e:
+            print(f"Error in listbox selection: {e}")
+    
+    def _show_listbox(self):
+        """Show the dropdown listbox"""
+        if not self.popup_visible:
+            try:
+                # Position the popup correctly
+                x = self.entry.winfo_rootx()
+                y = self.entry.winfo_rooty() + self.entry.winfo_height()
+                
+                # Make the dropdown width match the entry field width exactly
+                width = self.entry.winfo_width()
+                
+                # Adjust the geometry and make sure the dropdown doesn't exceed the content
+                self.popup.geometry(f"{width}x200+{x}+{y}")
+                self.popup.deiconify()
+                self.popup.lift()
+                
+                # After showing, adjust height based on actual content
+                if self.listbox.size() < 8:
+                    height = self.listbox.size() * 24 + 10  # Estimate height based on item count
+                    if height < 50:  # Minimum height
+                        height = 30
+                    self.popup.geometry(f"{width}x{height}+{x}+{y}")
+                
+                self.popup_visible = True
+            except Exception as e:
+                print(f"Error showing listbox: {e}")
+    
+    def _hide_listbox(self):
+        """Hide the dropdown listbox"""
+        if self.popup_visible:
+            self.popup.withdraw()
+            self.popup_visible = False
+    
+    def _on_focus_in(self, event):
+        """Handle entry widget focus in"""
+        if len(self.entry_var.get().strip()) >= 2 and self.matches:
+            self._show_listbox()
+    
+    def get(self):
+        """Get the current value of the combobox"""
+        return self.entry_var.get()
+    
+    def set(self, value):
+        """Set the value of the combobox"""
+        self.entry_var.set(value)
@@ -0,0 +1,290 @@
+"""
+Discounted cash flow valuation with Monte Carlo scenarios
+Free cash flow history comes from the company's XBRL facts, then thousands of
+growth / discount rate / terminal multiple scenarios are valued at once as numpy arrays.
+The result is a distribution of intrinsic value per share, not a single number.
+"""
+import sys
+
+import numpy as np
+
+from fact_store import flatten_company_facts
+from panel_builder import assemble_panel
+
+# Concept aliases in priority order, the first one a company reports wins
+OPERATING_CASH_FLOW = [
+    'us-gaap:NetCashProvidedByUsedInOperatingActivities',
+    'us-gaap:NetCashProvidedByUsedInOperatingActivitiesContinuingOperations',
+]
+CAPITAL_EXPENDITURE = [
+    'us-gaap:PaymentsToAcquirePropertyPlantAndEquipment',
+    'us-gaap:PaymentsToAcquireProductiveAssets',
+    'us-gaap:PaymentsForCapitalImprovements',
+]
+SHARES_OUTSTANDING = [
+    'dei:EntityCommonStockSharesOutstanding',
+    'us-gaap:CommonStockSharesOutstanding',
+    'us-gaap:WeightedAverageNumberOfDilutedSharesOutstanding',
+]
+CASH = [
+    'us-gaap:CashAndCashEquivalentsAtCarryingValue',
+    'us-gaap:CashCashEquivalentsRestrictedCashAndRestrictedCashEquivalents',
+    'us-gaap:Cash',
+]
+DEBT = [
+    'us-gaap:LongTermDebt',
+    'us-gaap:LongTermDebtNoncurrent',
+    'us-gaap:DebtInstrumentCarryingAmount',
+]
+
+DCF_CONCEPTS = OPERATING_CASH_FLOW + CAPITAL_EXPENDITURE + SHARES_OUTSTANDING + CASH + DEBT
+
+# Default scenario ranges
+DEFAULT_DISCOUNT_RATE = (0.07, 0.11)
+DEFAULT_TERMINAL_MULTIPLE = (10.0, 18.0)
+DEFAULT_GROWTH_BOUNDS = (-0.05, 0.20)
+
+def _first_available(matrix, concepts, aliases):
+    """
+    Collapse alias rows into one series, taking the first alias that has a value each year
+
+    Args:
+        matrix (np.ndarray): concepts x years
+        concepts (list): Concept names matching the matrix rows
+        aliases (list): Aliases in priority order
+    """
+    series = np.full(matrix.shape[1], np.nan)
+    for alias in reversed(aliases):
+        row = matrix[concepts.index(alias)]
+        series = np.where(np.isnan(row), series, row)
+    return series
+
+def cash_flow_inputs(company_facts, start_year=None, end_year=None, cik=None):
+    """
+    Normalized DCF inputs from a companyfacts document
+
+    Args:
+        company_facts (dict): companyfacts JSON (API, cache or universe store)
+        start_year, end_year (int, optional): Year range, defaults to the last 10 years reported
+
+    Returns:
+        dict: years, free_cash_flow (per year), shares, cash, debt, net_debt, name
+    """
+    table = flatten_company_facts(company_facts, cik=cik)
+    return cash_flow_inputs_from_table(table, company_facts.get('entityName', ''), start_year, end_year, cik)
+
+def cash_flow_inputs_from_table(table, name='', start_year=None, end_year=None, cik=None):
+    """
+    Normalized DCF inputs from a fact table of one company
+
+    Only the DCF_CONCEPTS rows are used, so a table sliced to those concepts straight from
+    the universe store is enough.
+
+    Returns:
+        dict: See cash_flow_inputs
+    """
+    cik = int(table['cik'][0]) if len(table['cik']) else int(cik or 0)
+    if end_year is None:
+        ends = table['end'][~np.isnat(table['end'])]
+        end_year = int(ends.max().astype('datetime64[Y]').astype('int64')) + 1970 if len(ends) else 2000
+    if start_year is None:
+        start_year = end_year - 9
+
+    panel = assemble_panel(table, [cik], DCF_CONCEPTS, start_year, end_year)
+    matrix = panel.values[0]
+
+    operating = _first_available(matrix, DCF_CONCEPTS, OPERATING_CASH_FLOW)
+    capex = _first_available(matrix, DCF_CONCEPTS, CAPITAL_EXPENDITURE)
+    # Capital expenditure is reported as a positive payment, missing capex counts as zero
+    free_cash_flow = operating - np.nan_to_num(np.abs(capex))
+
+    def latest(series):
+        known = series[~np.isnan(series)]
+        return float(known[-1]) if len(known) else np.nan
+
+    shares = latest(_first_available(matrix, DCF_CONCEPTS, SHARES_OUTSTANDING))
+    cash = latest(_first_available(matrix, DCF_CONCEPTS, CASH))
+    debt = latest(_first_available(matrix, DCF_CONCEPTS, DEBT))
+
+    return {
+        'cik': cik,
+        'name': name,
+        'years': panel.years,
+        'free_cash_flow': free_cash_flow,
+        'shares': shares,
+        'cash': cash,
+        'debt': debt,
+        'net_debt': np.nan_to_num(debt) - np.nan_to_num(cash),
+    }
+
+def historical_growth(free_cash_flow, bounds=DEFAULT_GROWTH_BOUNDS):
+    """
+    Median and standard deviation of year-over-year free cash flow growth
+
+    Only pairs of positive years are used. The median, clipped to bounds, centers the
+    scenarios so one unusual year does not dominate them.
+    """
+    fcf = free_cash_flow[~np.isnan(free_cash_flow)]
+    previous, current = fcf[:-1], fcf[1:]
+    usable = (previous > 0) & (current > 0)
+    if usable.sum() < 2:
+        return 0.03, 0.05
+    growth = current[usable] / previous[usable] - 1
+    median = float(np.clip(np.median(growth), *bounds))
+    spread = float(np.clip(np.std(growth), 0.02, 0.15))
+    return median, spread
+
+class DCFResult:
+    """Distribution of intrinsic value per share over all scenarios"""
+    def __init__(self, value_per_share, growth, discount_rate, terminal_multiple, inputs=None):
+        self.value_per_share = value_per_share
+        self.growth = growth
+        self.discount_rate = discount_rate
+        self.terminal_multiple = terminal_multiple
+        self.inputs = inputs or {}
+
+    def percentiles(self, q=(5, 25, 50, 75, 95)):
+        values = self.value_per_share[np.isfinite(self.value_per_share)]
+        if not len(values):
+            return {p: np.nan for p in q}
+        return dict(zip(q, np.percentile(values, q)))
+
+    @property
+    def median(self):
+        return self.percentiles((50,))[50]
+
+    def probability_above(self, price):
+        """Share of scenarios where intrinsic value exceeds the price"""
+        values = self.value_per_share[np.isfinite(self.value_per_share)]
+        return float((values > price).mean()) if len(values) else np.nan
+
+    def summary(self, price=None):
+        lines = []
+        name = self.inputs.get('name')
+        if name:
+            lines.append(f"DCF valuation: {name}")
+        lines.append(f"Scenarios: {len(self.value_per_share):,}")
+        for p, value in self.percentiles().items():
+            lines.append(f"  P{p:<3} intrinsic value per share: {value:,.2f}")
+        if price:
+            median = self.median
+            lines.append(f"  Price {price:,.2f}, median upside {median / price - 1:+.1%}, "
+                         f"P(value > price) {self.probability_above(price):.0%}")
+        return "\n".join(lines)
+
+def simulate_dcf(base_fcf, shares, net_debt, n_scenarios=10000, years=5,
+                 growth=(0.03, 0.05), discount_rate=DEFAULT_DISCOUNT_RATE,
+                 terminal_multiple=DEFAULT_TERMINAL_MULTIPLE, fade=True, seed=None, inputs=None):
+    """
+    Value every scenario at once
+
+    Growth is drawn per scenario and year from a normal distribution, discount rates and
+    terminal FCF multiples are drawn uniformly from their ranges.
+
+    Args:
+        base_fcf (float): Normalized starting free cash flow
+        shares (float): Shares outstanding
+        net_debt (float): Debt minus cash
+        n_scenarios (int): Number of Monte Carlo scenarios
+        years (int): Explicit projection years
+        growth (tuple): (center, standard deviation) of annual FCF growth
+        discount_rate (tuple): (low, high) range of the discount rate
+        terminal_multiple (tuple): (low, high) range of the terminal FCF multiple
+        fade (bool): Fade growth linearly towards zero over the projection
+        seed (int, optional): Random seed for repeatable runs
+
+    Returns:
+        DCFResult
+    """
+    rng = np.random.default_rng(seed)
+    growth_rates = rng.normal(growth[0], growth[1], size=(n_scenarios, years))
+    if fade:
+        growth_rates *= np.linspace(1.0, 1.0 / years, years)
+    rates = rng.uniform(*discount_rate, size=n_scenarios)
+    multiples = rng.uniform(*terminal_multiple, size=n_scenarios)
+
+    # (n, years) projected cash flows and discount factors
+    projected = base_fcf * np.cumprod(1.0 + growth_rates, axis=1)
+    periods = np.arange(1, years + 1)
+    discount_factors = (1.0 + rates[:, None]) ** -periods
+
+    present_value = (projected * discount_factors).sum(axis=1)
+    terminal_value = projected[:, -1] * multiples * discount_factors[:, -1]
+    equity_value = present_value + terminal_value - net_debt
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value_per_share = equity_value / shares
+
+    return DCFResult(value_per_share, growth_rates.mean(axis=1), rates, multiples, inputs)
+
+def value_company(company_facts, n_scenarios=10000, years=5, discount_rate=DEFAULT_DISCOUNT_RATE,
+                  terminal_multiple=DEFAULT_TERMINAL_MULTIPLE, normalize_years=3, seed=None, cik=None):
+    """
+    Run the full DCF for one company
+
+    Args:
+        company_facts (dict): companyfacts JSON
+        normalize_years (int): Average the last N years of FCF as the starting point
+
+    Returns:
+        DCFResult, or None when the company lacks the cash flow or share data or its
+        normalized free cash flow is not positive
+    """
+    inputs = cash_flow_inputs(company_facts, cik=cik)
+    return value_inputs(inputs, n_scenarios, years, discount_rate, terminal_multiple, normalize_years, seed)
+
+def value_inputs(inputs, n_scenarios=10000, years=5, discount_rate=DEFAULT_DISCOUNT_RATE,
+                 terminal_multiple=DEFAULT_TERMINAL_MULTIPLE, normalize_years=3, seed=None):
+    """
+    Run the DCF on inputs from cash_flow_inputs or cash_flow_inputs_from_table
+
+    Returns:
+        DCFResult, or None when the company lacks the cash flow or share data or its
+        normalized free cash flow is not positive
+    """
+    fcf = inputs['free_cash_flow'][~np.isnan(inputs['free_cash_flow'])]
+    if not len(fcf) or not np.isfinite(inputs['shares']) or inputs['shares'] <= 0:
+        print(f"Not enough cash flow or share data to value {inputs['name'] or inputs['cik']}")
+        return None
+
+    base_fcf = float(fcf[-normalize_years:].mean())
+    if base_fcf <= 0:
+        print(f"Normalized free cash flow of {inputs['name'] or inputs['cik']} is not positive "
+              f"({base_fcf:,.0f}), a DCF is not meaningful")
+        return None
+    inputs['base_fcf'] = base_fcf
+
+    return simulate_dcf(base_fcf, inputs['shares'], inputs['net_debt'], n_scenarios, years,
+                        historical_growth(inputs['free_cash_flow']), discount_rate,
+                        terminal_multiple, seed=seed, inputs=inputs)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Monte Carlo DCF valuation from SEC XBRL data")
+    parser.add_argument('--cik', required=True, help="Company CIK")
+    parser.add_argument('--scenarios', type=int, default=10000)
+    parser.add_argument('--years', type=int, default=5, help="Explicit projection years")
+    parser.add_argument('--discount', type=float, nargs=2, default=DEFAULT_DISCOUNT_RATE,
+                        metavar=('LOW', 'HIGH'))
+    parser.add_argument('--multiple', type=float, nargs=2, default=DEFAULT_TERMINAL_MULTIPLE,
+                        metavar=('LOW', 'HIGH'), help="Terminal FCF multiple range")
+    parser.add_argument('--price', type=float, default=None, help="Current share price to compare")
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    from panel_builder import fetch_fact_table
+    from universe_store import open_universe_store
+
+    store = open_universe_store()
+    table = fetch_fact_table(args.cik, store)
+    if table is None:
+        print(f"Could not fetch company facts for CIK {args.cik}")
+        sys.exit(1)
+
+    info = store.company_info(int(args.cik)) if store is not None else None
+    inputs = cash_flow_inputs_from_table(table, info['name'] if info else '', cik=int(args.cik))
+    result = value_inputs(inputs, args.scenarios, args.years, tuple(args.discount),
+                          tuple(args.multiple), seed=args.seed)
+    if result is None:
+        sys.exit(1)
+    print(result.summary(args.price))
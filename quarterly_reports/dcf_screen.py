@@ -0,0 +1,234 @@
+"""
+Universe-wide DCF screening and "far from intrinsic value" alerts
+Values every company in the local universe store across a process pool, compares the
+result with a price file and ranks the companies trading furthest from their DCF value.
+
+Results are kept in a state file keyed by a per-company fingerprint of its facts, so a
+nightly run only revalues the companies whose facts changed since the last run.
+"""
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from universe_store import open_universe_store, DEFAULT_DATA_DIR
+
+DEFAULT_STATE_FILE = 'dcf_screen_state.json'
+
+def company_fingerprints(store):
+    """
+    Fingerprint of every company's facts: (fact count, latest filed day)
+
+    Computed over the whole mapped cik and filed columns in a few vectorized passes.
+
+    Returns:
+        dict: CIK -> "count:max_filed_day"
+    """
+    ciks = np.asarray(store.columns['cik'])
+    filed = np.asarray(store.columns['filed']).astype('int64')
+    unique_ciks, codes = np.unique(ciks, return_inverse=True)
+    counts = np.bincount(codes, minlength=len(unique_ciks))
+    latest = np.full(len(unique_ciks), np.iinfo('int64').min)
+    np.maximum.at(latest, codes, filed)
+    return {int(cik): f"{count}:{day}" for cik, count, day in zip(unique_ciks, counts, latest)}
+
+def _value_batch(data_dir, ciks, n_scenarios, seed):
+    """Process pool worker: value a batch of companies from the mapped store"""
+    # Imported here so each worker only pays for what it uses
+    from dcf import DCF_CONCEPTS, cash_flow_inputs_from_table, value_inputs
+    from fact_store import concat_fact_tables
+
+    store = open_universe_store(data_dir)
+    results = {}
+    for cik in ciks:
+        try:
+            # Slice the company's DCF concept runs straight out of the mapped columns
+            table = concat_fact_tables([store.fact_table(concept, cik) for concept in DCF_CONCEPTS])
+            if len(table['val']):
+                info = store.company_info(cik)
+                inputs = cash_flow_inputs_from_table(table, info['name'] if info else '', cik=cik)
+                result = value_inputs(inputs, n_scenarios=n_scenarios, seed=seed)
+            else:
+                result = None
+        except Exception as e:
+            print(f"Error valuing CIK {cik}: {e}")
+            result = None
+        if result is None:
+            results[cik] = None
+            continue
+        percentiles = result.percentiles((5, 50, 95))
+        results[cik] = {
+            'name': result.inputs.get('name', ''),
+            'p5': float(percentiles[5]),
+            'median': float(percentiles[50]),
+            'p95': float(percentiles[95]),
+        }
+    return results
+
+def load_state(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {'fingerprints': {}, 'results': {}}
+
+def save_state(state, path):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def run_valuations(data_dir=DEFAULT_DATA_DIR, state_path=DEFAULT_STATE_FILE, max_workers=None,
+                   batch_size=200, n_scenarios=2000, seed=0, full=False):
+    """
+    Value every company in the store, skipping companies whose facts are unchanged
+
+    Args:
+        data_dir (str): Universe data directory
+        state_path (str): JSON file holding fingerprints and results from earlier runs
+        max_workers (int, optional): Process pool size
+        batch_size (int): Companies per worker task
+        n_scenarios (int): Monte Carlo scenarios per company
+        seed (int): Fixed seed so unchanged inputs give unchanged results
+        full (bool): Ignore the state and revalue everything
+
+    Returns:
+        dict: CIK (str) -> valuation summary or None
+    """
+    store = open_universe_store(data_dir)
+    if store is None:
+        print(f"No universe store in {data_dir}, run bulk_ingest first")
+        return {}
+
+    state = {'fingerprints': {}, 'results': {}} if full else load_state(state_path)
+    fingerprints = company_fingerprints(store)
+    changed = [cik for cik, fingerprint in fingerprints.items()
+               if state['fingerprints'].get(str(cik)) != fingerprint]
+    print(f"{len(fingerprints)} companies in store, {len(changed)} new or changed since last run")
+
+    start_time = time.time()
+    batches = [changed[i:i + batch_size] for i in range(0, len(changed), batch_size)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_value_batch, data_dir, batch, n_scenarios, seed) for batch in batches]
+        for done, future in enumerate(as_completed(futures), 1):
+            for cik, result in future.result().items():
+                state['results'][str(cik)] = result
+                state['fingerprints'][str(cik)] = fingerprints[cik]
+            print(f"Valued {done}/{len(batches)} batches")
+            # Save as we go so an interrupted run keeps its progress
+            save_state(state, state_path)
+
+    # Drop companies that left the store
+    for cik in list(state['results']):
+        if int(cik) not in fingerprints:
+            state['results'].pop(cik, None)
+            state['fingerprints'].pop(cik, None)
+    save_state(state, state_path)
+    print(f"Valuations finished in {time.time() - start_time:.1f}s")
+    return state['results']
+
+def load_prices(path, store):
+    """
+    Read a price file with columns (cik or ticker) and price
+
+    Returns:
+        dict: CIK -> price
+    """
+    ticker_to_cik = {}
+    for cik, tickers in zip(store.companies['cik'], store.companies['tickers']):
+        for ticker in str(tickers).split(','):
+            if ticker:
+                ticker_to_cik[ticker.upper()] = int(cik)
+
+    prices = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            row = {key.strip().lower(): (value or '').strip() for key, value in row.items() if key}
+            try:
+                price = float(row.get('price', ''))
+            except ValueError:
+                continue
+            if row.get('cik', '').isdigit():
+                prices[int(row['cik'])] = price
+            elif row.get('ticker', '').upper() in ticker_to_cik:
+                prices[ticker_to_cik[row['ticker'].upper()]] = price
+    return prices
+
+def rank_alerts(results, prices, threshold=0.5):
+    """
+    Rank companies whose price is far from the DCF distribution
+
+    A company alerts when the price lies outside the P5-P95 range, or when the median
+    value differs from the price by more than the threshold.
+
+    Returns:
+        list: Alert dicts sorted by distance from intrinsic value, largest first
+    """
+    ciks = np.array([cik for cik in prices if results.get(str(cik))], dtype='int64')
+    if not len(ciks):
+        return []
+    summaries = [results[str(cik)] for cik in ciks]
+    price = np.array([prices[cik] for cik in ciks])
+    median = np.array([s['median'] for s in summaries])
+    low = np.array([s['p5'] for s in summaries])
+    high = np.array([s['p95'] for s in summaries])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        upside = median / price - 1
+        distance = np.abs(np.log(median / price))
+    alert = np.isfinite(distance) & (median > 0) & (price > 0)
+    alert &= (price < low) | (price > high) | (np.abs(upside) > threshold)
+
+    order = np.flatnonzero(alert)[np.argsort(-distance[alert])]
+    return [
+        {
+            'cik': int(ciks[i]),
+            'name': summaries[i]['name'],
+            'price': float(price[i]),
+            'median_value': float(median[i]),
+            'p5': float(low[i]),
+            'p95': float(high[i]),
+            'upside': float(upside[i]),
+            'signal': 'undervalued' if upside[i] > 0 else 'overvalued',
+        }
+        for i in order
+    ]
+
+def write_alerts(alerts, path):
+    """Write alerts as CSV"""
+    fields = ['cik', 'name', 'signal', 'price', 'median_value', 'p5', 'p95', 'upside']
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for alert in alerts:
+            writer.writerow({field: alert[field] for field in fields})
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Screen the universe for stocks far from their DCF value")
+    parser.add_argument('--prices', required=True, help="CSV with cik or ticker and price columns")
+    parser.add_argument('--data', default=DEFAULT_DATA_DIR, help="Universe data directory")
+    parser.add_argument('--state', default=DEFAULT_STATE_FILE, help="Incremental state file")
+    parser.add_argument('--out', default='dcf_alerts.csv', help="Alerts CSV")
+    parser.add_argument('--threshold', type=float, default=0.5, help="Median upside/downside that triggers an alert")
+    parser.add_argument('--scenarios', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--full', action='store_true', help="Revalue every company, ignoring the state file")
+    args = parser.parse_args()
+
+    results = run_valuations(args.data, args.state, args.workers, n_scenarios=args.scenarios, full=args.full)
+    store = open_universe_store(args.data)
+    if store is None:
+        sys.exit(1)
+
+    alerts = rank_alerts(results, load_prices(args.prices, store), args.threshold)
+    write_alerts(alerts, args.out)
+    print(f"\n{len(alerts)} alerts written to {args.out}")
+    for alert in alerts[:20]:
+        print(f"{alert['signal']:<12} {alert['name'][:35]:<35} price {alert['price']:>10,.2f}  "
+              f"value {alert['median_value']:>10,.2f}  ({alert['upside']:+.0%})")
@@ -0,0 +1,186 @@
+"""
+Resumable, parallel filing downloads
+Each download directory holds a job manifest recording the state of every accession
+(pending -> fetched -> parsed, or failed once every attempt is used up). Work runs in a bounded thread pool whose
+requests share the sec_client rate limiter, failed fetches are retried with exponential
+backoff, and a restarted download picks up where the last one stopped without
+refetching anything that already finished.
+"""
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+MANIFEST_NAME = 'download_manifest.json'
+# Fetched results wait here until their output file is written
+FETCHED_DIR = '.fetched'
+
+PENDING = 'pending'
+FETCHED = 'fetched'
+PARSED = 'parsed'
+FAILED = 'failed'
+
+def retry_with_backoff(func, attempts=4, base_delay=1.0, max_delay=30.0):
+    """
+    Call func until it returns something other than None or raises no more
+
+    Waits base_delay * 2^n (with jitter, capped at max_delay) between attempts.
+
+    Returns:
+        tuple: (result or None, error message or None, attempts used)
+    """
+    error = None
+    for attempt in range(1, attempts + 1):
+        try:
+            result = func()
+            if result is not None:
+                return result, None, attempt
+            error = "no data returned"
+        except Exception as e:
+            error = str(e)
+        if attempt < attempts:
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1))
+            time.sleep(delay * random.uniform(0.5, 1.0))
+    return None, error, attempts
+
+class DownloadManifest:
+    """
+    Per-directory job manifest, saved atomically after every state change
+
+    jobs: accession -> {'state', 'filing', 'attempts', 'error', 'output'}
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.lock = threading.Lock()
+        self.jobs = {}
+        try:
+            with open(self.path, 'r') as f:
+                self.jobs = json.load(f).get('jobs', {})
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'jobs': self.jobs}, f)
+        os.replace(tmp_path, self.path)
+
+    def add(self, filings):
+        """Register filings as pending, leaving known accessions alone (failed ones stay failed)"""
+        with self.lock:
+            for filing in filings:
+                if filing['accession'] not in self.jobs:
+                    # Filing records are stored as plain dicts so the manifest stays JSON
+                    self.jobs[filing['accession']] = {'state': PENDING, 'filing': dict(filing),
+                                                      'attempts': 0, 'error': None, 'output': None}
+            self.save()
+
+    def update(self, accession, **fields):
+        with self.lock:
+            self.jobs[accession].update(fields)
+            self.save()
+
+    def states(self):
+        counts = {}
+        for job in self.jobs.values():
+            counts[job['state']] = counts.get(job['state'], 0) + 1
+        return counts
+
+    def unfinished(self, accessions=None):
+        """Jobs still to run (pending or fetched), only those in accessions when given"""
+        return [job for accession, job in self.jobs.items() if job['state'] in (PENDING, FETCHED)
+                and (accessions is None or accession in accessions)]
+
+    def outputs(self):
+        """Output files of parsed jobs, in filing order"""
+        jobs = [job for job in self.jobs.values() if job['state'] == PARSED and job['output']]
+        jobs.sort(key=lambda job: job['filing'].get('date', ''))
+        return [job['output'] for job in jobs]
+
+def find_resumable_directory(save_dir, prefix, accessions):
+    """
+    Most recent download directory for prefix that was started for exactly these filings
+    and still has unfinished jobs
+
+    A directory holding a different selection is never reused, so a new download does not
+    pick up (and retry) another selection's leftovers.
+
+    Args:
+        save_dir (str): Parent of the download directories
+        prefix (str): Company directory prefix
+        accessions (list): Accession numbers selected for this download
+
+    Returns:
+        str or None
+    """
+    accessions = set(accessions)
+    try:
+        names = sorted((name for name in os.listdir(save_dir) if name.startswith(prefix + '_')), reverse=True)
+    except OSError:
+        return None
+    for name in names:
+        directory = os.path.join(save_dir, name)
+        if not os.path.exists(os.path.join(directory, MANIFEST_NAME)):
+            continue
+        manifest = DownloadManifest(directory)
+        if set(manifest.jobs) == accessions and manifest.unfinished():
+            return directory
+    return None
+
+def run_download_jobs(manifest, fetch, write, max_workers=4, attempts=4, progress=None, accessions=None):
+    """
+    Work through the unfinished jobs in a manifest
+
+    Args:
+        manifest (DownloadManifest): Jobs to run, updated as they progress
+        fetch (callable): filing dict -> JSON-serializable data, None on failure (network work)
+        write (callable): (filing dict, data) -> output path (local work)
+        max_workers (int): Concurrent jobs
+        attempts (int): Fetch attempts per job before it is marked failed for good
+        progress (callable, optional): Called with (done, total, filing, state) after each job
+        accessions (list, optional): Only run these jobs, all unfinished ones when None
+
+    Returns:
+        dict: state -> number of jobs
+    """
+    fetched_dir = os.path.join(manifest.directory, FETCHED_DIR)
+    os.makedirs(fetched_dir, exist_ok=True)
+
+    def run(job):
+        filing = job['filing']
+        accession = filing['accession']
+        fetched_path = os.path.join(fetched_dir, f"{accession}.json")
+
+        if job['state'] == FETCHED and os.path.exists(fetched_path):
+            # Fetched before the last run stopped, no need to go back to the network
+            with open(fetched_path, 'r') as f:
+                data = json.load(f)
+        else:
+            data, error, used = retry_with_backoff(lambda: fetch(filing), attempts)
+            if data is None:
+                manifest.update(accession, state=FAILED, error=error, attempts=job['attempts'] + used)
+                return filing, FAILED
+            with open(fetched_path, 'w') as f:
+                json.dump(data, f)
+            manifest.update(accession, state=FETCHED, error=None, attempts=job['attempts'] + used)
+
+        output = write(filing, data)
+        manifest.update(accession, state=PARSED, output=output)
+        os.remove(fetched_path)
+        return filing, PARSED
+
+    jobs = manifest.unfinished(set(accessions) if accessions is not None else None)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(run, job) for job in jobs]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                filing, state = future.result()
+            except Exception as e:
+                print(f"Download job error: {e}")
+                continue
+            if progress:
+                progress(done, len(jobs), filing, state)
+    return manifest.states()
@@ -0,0 +1,108 @@
+"""
+Columnar fact tables built from the SEC companyfacts JSON
+Every fact becomes one row across a set of parallel numpy arrays
+"""
+import numpy as np
+
+# Column name -> numpy dtype for a fact table
+# Dates are stored as datetime64[D] (NaT when missing), strings as object arrays
+FACT_COLUMNS = {
+    'cik': 'int64',
+    'concept': 'object',      # "taxonomy:concept", e.g. "us-gaap:Revenues"
+    'unit': 'object',
+    'start': 'datetime64[D]',  # NaT for instant facts
+    'end': 'datetime64[D]',
+    'val': 'float64',
+    'filed': 'datetime64[D]',
+    'accn': 'object',
+    'fy': 'int32',            # 0 when the filing has no fiscal year
+    'fp': 'object',
+    'form': 'object',
+    'frame': 'object',
+}
+
+def empty_fact_table():
+    """Return a fact table with every column present and zero rows"""
+    return {name: np.empty(0, dtype=dtype) for name, dtype in FACT_COLUMNS.items()}
+
+def flatten_company_facts(company_facts, cik=None):
+    """
+    Flatten a companyfacts JSON document into a columnar fact table
+
+    Args:
+        company_facts (dict): JSON response from the companyfacts API
+        cik (int, optional): CIK to record on every row, defaults to the one in the document
+
+    Returns:
+        dict: Column name -> numpy array, one row per reported fact
+    """
+    if not company_facts:
+        return empty_fact_table()
+
+    if cik is None:
+        cik = company_facts.get('cik', 0)
+    cik = int(cik or 0)
+
+    columns = {name: [] for name in FACT_COLUMNS if name != 'cik'}
+    facts = company_facts.get('facts', {})
+
+    for taxonomy in facts:
+        for concept in facts[taxonomy]:
+            full_concept = f"{taxonomy}:{concept}"
+            for unit, values in facts[taxonomy][concept].get('units', {}).items():
+                for value in values:
+                    val = value.get('val')
+                    # Skip non-numeric facts, the table only holds numbers
+                    if not isinstance(val, (int, float)):
+                        continue
+                    columns['concept'].append(full_concept)
+                    columns['unit'].append(unit)
+                    columns['start'].append(value.get('start', ''))
+                    columns['end'].append(value.get('end', ''))
+                    columns['val'].append(val)
+                    columns['filed'].append(value.get('filed', ''))
+                    columns['accn'].append(value.get('accn', ''))
+                    columns['fy'].append(value.get('fy') or 0)
+                    columns['fp'].append(value.get('fp') or '')
+                    columns['form'].append(value.get('form', ''))
+                    columns['frame'].append(value.get('frame', ''))
+
+    table = {}
+    for name, dtype in FACT_COLUMNS.items():
+        if name == 'cik':
+            continue
+        if dtype == 'object':
+            array = np.empty(len(columns[name]), dtype=object)
+            array[:] = columns[name]
+        else:
+            array = np.array(columns[name], dtype=dtype)
+        table[name] = array
+    table['cik'] = np.full(len(table['val']), cik, dtype='int64')
+
+    return {name: table[name] for name in FACT_COLUMNS}
+
+def concat_fact_tables(tables):
+    """
+    Concatenate several fact tables into one
+
+    Extra columns (such as 'dims' from the XBRL instance parser) are kept when every
+    table has them.
+    """
+    tables = [t for t in tables if t is not None]
+    if not tables:
+        return empty_fact_table()
+    names = [name for name in tables[0] if all(name in t for t in tables)]
+    return {name: np.concatenate([t[name] for t in tables]) for name in names}
+
+def take_rows(table, index):
+    """Select rows from a fact table by integer index or boolean mask"""
+    return {name: column[index] for name, column in table.items()}
+
+def fact_table_length(table):
+    """Number of rows in a fact table"""
+    return len(table['val'])
+
+def facts_to_dataframe(table):
+    """Convert a fact table to a pandas DataFrame"""
+    import pandas as pd
+    return pd.DataFrame(table)
@@ -0,0 +1,192 @@
+"""
+Targeted access to the documents inside one EDGAR filing
+Reads the small index.json and FilingSummary.xml first, then downloads only the R-files
+or XBRL instance that are needed instead of the full {accession}.txt submission.
+When the full submission is unavoidable it is streamed line by line.
+"""
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sec_client import get, get_client
+
+# Linkbases, schemas and rendered R-files (R1.xml ... in 2009-2013 filings) that sit next to
+# the instance document
+_NOT_INSTANCE = re.compile(r'(_cal|_def|_lab|_pre|_ref)\.xml$|\.xsd$|FilingSummary\.xml$|MetaLinks|^R\d+\.xml$',
+                           re.I)
+
+# Keywords that identify the primary statements in FilingSummary short names
+STATEMENT_KEYWORDS = {
+    'income_statement': ('income', 'operations', 'earnings'),
+    'balance_sheet': ('balance sheet', 'financial position', 'financial condition'),
+    'cash_flow': ('cash flow',),
+}
+
+def filing_base_url(cik, accession):
+    """Directory URL of a filing in the EDGAR archives"""
+    return f"https://www.sec.gov/Archives/edgar/data/{int(cik)}/{accession.replace('-', '')}"
+
+def get_filing_index(cik, accession):
+    """
+    List the documents of a filing from its index.json
+
+    Filed documents never change, so the listing is cached permanently.
+
+    Returns:
+        list: [{'name', 'type', 'size', 'last-modified'}], or None on error
+    """
+    return get_client().filing_index(cik, accession)
+
+def fetch_document(cik, accession, name):
+    """Download one document of a filing, returns bytes or None"""
+    print(f"Fetching document: {filing_base_url(cik, accession)}/{name}")
+    return get_client().archive(cik, accession, name)
+
+def get_filing_summary(cik, accession, index=None):
+    """
+    Parse FilingSummary.xml into the list of rendered reports (R-files)
+
+    Returns:
+        list: [{'short_name', 'long_name', 'html_file', 'xml_file', 'category', 'position'}],
+            empty when the filing has no XBRL rendering
+    """
+    if index is not None and not any(item.get('name') == 'FilingSummary.xml' for item in index):
+        return []
+    content = fetch_document(cik, accession, 'FilingSummary.xml')
+    if not content:
+        return []
+
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError as e:
+        print(f"Could not parse FilingSummary.xml: {e}")
+        return []
+
+    reports = []
+    for report in root.iter('Report'):
+        def text(tag):
+            element = report.find(tag)
+            return element.text.strip() if element is not None and element.text else ''
+        reports.append({
+            'short_name': text('ShortName'),
+            'long_name': text('LongName'),
+            'html_file': text('HtmlFileName'),
+            'xml_file': text('XmlFileName'),
+            'category': text('MenuCategory'),
+            'position': text('Position'),
+        })
+    return reports
+
+def find_statement_reports(reports):
+    """
+    Pick the primary statement R-files out of the FilingSummary reports
+
+    Returns:
+        dict: statement name -> report dict, for the statements that were found
+    """
+    found = {}
+    for report in reports:
+        if report['category'].lower() != 'statements':
+            continue
+        name = report['short_name'].lower()
+        # Parenthetical pages repeat the statement title but only hold share details
+        if 'parenthetical' in name:
+            continue
+        for statement, keywords in STATEMENT_KEYWORDS.items():
+            if statement not in found and any(keyword in name for keyword in keywords):
+                # Comprehensive income pages also say "income", prefer the plain statement
+                if statement == 'income_statement' and 'comprehensive' in name and 'operations' not in name:
+                    continue
+                found[statement] = report
+                break
+    return found
+
+def find_xbrl_instance(index):
+    """
+    Name of the XBRL instance document in a filing index, or None
+
+    Inline XBRL filings carry an extracted instance named *_htm.xml, older filings a
+    plain .xml instance named after the schema (aapl-20120929.xsd -> aapl-20120929.xml).
+    """
+    names = [item.get('name', '') for item in index or []]
+    candidates = [name for name in names if name.lower().endswith('.xml') and not _NOT_INSTANCE.search(name)]
+    for name in candidates:
+        if name.lower().endswith('_htm.xml'):
+            return name
+    schemas = {name[:-len('.xsd')].lower() for name in names if name.lower().endswith('.xsd')}
+    for name in candidates:
+        if name[:-len('.xml')].lower() in schemas:
+            return name
+    return candidates[0] if candidates else None
+
+def find_primary_document(index):
+    """
+    Best guess at the main HTML document when the submissions primaryDocument is unknown
+
+    Skips exhibits, rendered R-files and index pages and takes the largest remaining .htm.
+    """
+    best, best_size = None, -1
+    for item in index or []:
+        name = item.get('name', '')
+        lower = name.lower()
+        if not lower.endswith(('.htm', '.html')) or re.match(r'r\d+\.htm', lower) or 'index' in lower:
+            continue
+        if re.search(r'(^|[_\-])ex[\-_]?\d', lower) or 'exhibit' in lower:
+            continue
+        try:
+            size = int(item.get('size') or 0)
+        except ValueError:
+            size = 0
+        if size > best_size:
+            best, best_size = name, size
+    return best
+
+def stream_document_lines(url, chunk_size=64 * 1024):
+    """
+    Yield the lines of a remote document without holding it in memory
+
+    Used for the full {accession}.txt submission when no targeted document exists.
+    """
+    response = get(url, stream=True)
+    try:
+        response.raise_for_status()
+        for line in response.iter_lines(chunk_size=chunk_size, decode_unicode=False):
+            yield line.decode('utf-8', errors='replace')
+    finally:
+        response.close()
+
+def stream_full_submission(cik, accession):
+    """Stream the complete submission text file line by line"""
+    url = f"{filing_base_url(cik, accession)}/{accession}.txt"
+    print(f"Streaming full submission: {url}")
+    return stream_document_lines(url)
+
+def scan_submission_for_xbrl(cik, accession):
+    """
+    Fallback when index.json is unavailable: stream the submission once and report
+    whether it carries XBRL and which statement markers it contains
+    """
+    markers = {
+        'income_statement': 'StatementsOfIncome',
+        'balance_sheet': 'BalanceSheets',
+        'cash_flow': 'StatementsOfCashFlows',
+    }
+    found = {'xbrl': False}
+    lines = stream_full_submission(cik, accession)
+    try:
+        for line in lines:
+            if not found['xbrl'] and ('XBRL INSTANCE DOCUMENT' in line or '<xbrl' in line.lower()):
+                found['xbrl'] = True
+            for statement, marker in markers.items():
+                if statement not in found and marker in line:
+                    found[statement] = True
+            # Stop downloading as soon as there is nothing left to look for
+            if found['xbrl'] and len(found) == len(markers) + 1:
+                break
+    finally:
+        lines.close()
+    return found
@@ -0,0 +1,266 @@
+"""
+Compact output for downloaded filings
+Each filing is appended to filings.jsonl (optionally gzipped) as one line the moment it
+finishes, and optionally to a Parquet file of statement line items. The consolidated view
+is a small index of where each record lives, so nothing is written twice and any one
+filing can be read back with a single seek (a line scan when gzipped).
+"""
+import gzip
+import json
+import os
+import threading
+import zlib
+
+JSONL_NAME = 'filings.jsonl'
+INDEX_NAME = 'consolidated_index.json'
+PARQUET_NAME = 'filings.parquet'
+
+# Filing fields copied onto every Parquet row
+METADATA_FIELDS = ('accession', 'filing_type', 'filing_date')
+STATEMENTS = ('income_statement', 'balance_sheet', 'cash_flow')
+
+class JSONLSink:
+    """
+    Thread-safe append-only JSON lines writer
+
+    Plain files record the byte offset of every line, gzipped files the line number
+    (gzip streams cannot be seeked cheaply). Records already in the file are indexed by
+    accession on open, so a filing that was appended before a crash is not written twice
+    when the download resumes.
+    """
+    def __init__(self, directory, compress=False):
+        self.compress = compress
+        self.path = os.path.join(directory, JSONL_NAME + ('.gz' if compress else ''))
+        self.lock = threading.Lock()
+        self.written, lines = _index_existing(self.path, compress)
+        if compress:
+            self.file = gzip.open(self.path, 'at', encoding='utf-8')
+            self.line = lines
+        else:
+            self.file = open(self.path, 'ab')
+
+    def write(self, record):
+        """
+        Append one record and flush it to disk, unless its accession is already in the file
+
+        Returns:
+            dict: Index entry for the record
+        """
+        line = json.dumps(record, separators=(',', ':'))
+        accession = record.get('accession')
+        with self.lock:
+            if accession and accession in self.written:
+                location = dict(self.written[accession])
+            elif self.compress:
+                self.file.write(line + '\n')
+                self.file.flush()
+                location = {'line': self.line}
+                self.line += 1
+            else:
+                location = {'offset': self.file.tell()}
+                self.file.write(line.encode('utf-8') + b'\n')
+                self.file.flush()
+            if accession:
+                self.written.setdefault(accession, dict(location))
+        location['file'] = os.path.basename(self.path)
+        return location
+
+    def close(self):
+        self.file.close()
+
+def _index_existing(path, compress):
+    """
+    Map the accession of every complete record in an existing JSONL file to its location
+
+    A torn tail left by a crash mid-write is cut off so the next record starts on a line
+    of its own: plain files are truncated, gzip files rewritten with their readable lines.
+
+    Returns:
+        tuple: (accession -> location, number of complete lines)
+    """
+    written = {}
+    if not os.path.exists(path):
+        return written, 0
+    if compress:
+        # Every line counts, numbering must match what read_record scans
+        lines = 0
+        torn = False
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                for number, line in enumerate(f):
+                    if not line.endswith('\n'):
+                        torn = True
+                        break
+                    accession = _record_accession(line)
+                    if accession:
+                        written.setdefault(accession, {'line': number})
+                    lines = number + 1
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            torn = True
+        if torn:
+            _rewrite_gzip_prefix(path, lines)
+        return written, lines
+    offset = 0
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break
+            accession = _record_accession(line)
+            if accession:
+                written.setdefault(accession, {'offset': offset})
+            offset += len(line)
+    if offset < os.path.getsize(path):
+        with open(path, 'r+b') as f:
+            f.truncate(offset)
+    return written, None
+
+def _rewrite_gzip_prefix(path, lines):
+    """Replace a damaged gzip file with its first lines, the ones already indexed"""
+    tmp_path = path + '.tmp'
+    with gzip.open(path, 'rt', encoding='utf-8') as source, gzip.open(tmp_path, 'wt', encoding='utf-8') as target:
+        try:
+            for number, line in enumerate(source):
+                if number >= lines:
+                    break
+                target.write(line)
+        except (EOFError, zlib.error, gzip.BadGzipFile):
+            pass
+    os.replace(tmp_path, path)
+
+def _record_accession(line):
+    try:
+        return json.loads(line).get('accession')
+    except (ValueError, AttributeError):
+        return None
+
+def statement_rows(record):
+    """Long-format rows (statement, period, line item, value) for one filing record"""
+    metadata = {field: record.get(field) for field in METADATA_FIELDS}
+    for statement in STATEMENTS:
+        for period, items in (record.get(statement) or {}).items():
+            for line_item, value in items.items():
+                yield dict(metadata, statement=statement, period=period, line_item=line_item, value=value)
+
+class ParquetSink:
+    """
+    Statement line items as a Parquet table, written in row groups
+
+    Needs pyarrow, which is optional.
+    """
+    def __init__(self, directory, row_group_size=5000):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.path = os.path.join(directory, PARQUET_NAME)
+        self.schema = pa.schema([(field, pa.string()) for field in METADATA_FIELDS] + [
+            ('statement', pa.string()), ('period', pa.string()),
+            ('line_item', pa.string()), ('value', pa.float64())])
+        # Resuming into an existing file would need a rewrite, start a numbered part instead
+        part = 0
+        while os.path.exists(self.path):
+            part += 1
+            self.path = os.path.join(directory, f"filings.{part}.parquet")
+        self.writer = pq.ParquetWriter(self.path, self.schema)
+        self.row_group_size = row_group_size
+        self.rows = []
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        with self.lock:
+            self.rows.extend(statement_rows(record))
+            if len(self.rows) >= self.row_group_size:
+                self._flush()
+
+    def _flush(self):
+        if self.rows:
+            columns = {name: [row[name] for row in self.rows] for name in self.schema.names}
+            self.writer.write_table(self.pa.table(columns, schema=self.schema))
+            self.rows = []
+
+    def close(self):
+        with self.lock:
+            self._flush()
+            self.writer.close()
+
+class FilingOutput:
+    """
+    JSONL output plus the optional Parquet sink for one download directory
+
+    Usage:
+        output = FilingOutput(company_dir, compress=True)
+        entry = output.write(financial_data)
+        ...
+        output.close(entries)
+    """
+    def __init__(self, directory, compress=False, parquet=False):
+        self.directory = directory
+        self.jsonl = JSONLSink(directory, compress)
+        self.parquet = None
+        if parquet:
+            try:
+                self.parquet = ParquetSink(directory)
+            except ImportError:
+                print("pyarrow is not installed, skipping Parquet output")
+
+    def write(self, record):
+        entry = self.jsonl.write(record)
+        if self.parquet is not None:
+            self.parquet.write(record)
+        entry.update({field: record.get(field) for field in METADATA_FIELDS})
+        return entry
+
+    def close(self, entries=None):
+        self.jsonl.close()
+        if self.parquet is not None:
+            self.parquet.close()
+        if entries is not None:
+            write_index(self.directory, entries)
+
+def write_index(directory, entries):
+    """Write the consolidated index: one small entry per filing, sorted by filing date"""
+    entries = sorted(entries, key=lambda entry: entry.get('filing_date') or '')
+    path = os.path.join(directory, INDEX_NAME)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'records': entries}, f)
+    os.replace(tmp_path, path)
+    return path
+
+def read_index(directory):
+    with open(os.path.join(directory, INDEX_NAME), 'r') as f:
+        return json.load(f)['records']
+
+def read_record(directory, entry):
+    """Read one filing back using its index entry"""
+    path = os.path.join(directory, entry['file'])
+    if 'offset' in entry:
+        with open(path, 'rb') as f:
+            f.seek(entry['offset'])
+            return json.loads(f.readline())
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for number, line in enumerate(f):
+            if number == entry['line']:
+                return json.loads(line)
+    return None
+
+def iter_records(directory):
+    """Every indexed filing in filing date order (the consolidated view)"""
+    entries = read_index(directory)
+    # Gzipped files are read once front to back instead of once per record
+    gzipped = {}
+    for entry in entries:
+        if 'line' in entry:
+            gzipped.setdefault(entry['file'], set()).add(entry['line'])
+    lines = {}
+    for name, wanted in gzipped.items():
+        with gzip.open(os.path.join(directory, name), 'rt', encoding='utf-8') as f:
+            for number, line in enumerate(f):
+                if number in wanted:
+                    lines[(name, number)] = line
+    for entry in entries:
+        if 'line' in entry:
+            line = lines.get((entry['file'], entry['line']))
+            yield json.loads(line) if line else None
+        else:
+            yield read_record(directory, entry)
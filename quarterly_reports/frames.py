@@ -0,0 +1,285 @@
+"""
+Cross-sectional concept queries ("frames")
+One call returns a concept for every filer in a period, either from the SEC frames API
+https://data.sec.gov/api/xbrl/frames/{taxonomy}/{concept}/{unit}/{period}.json
+or from the local universe store when one has been built.
+
+Periods use the frames notation: CY2023 (annual), CY2023Q1 (quarter), CY2023Q4I (instant)
+"""
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+import numpy as np
+
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sec_client import get_client
+
+# Columns of a frame: one entry per filer
+FRAME_COLUMNS = {
+    'cik': 'int64',
+    'val': 'float64',
+    'end': 'datetime64[D]',
+    'accn': 'object',
+    'entity_name': 'object',
+}
+
+# Frames for closed periods rarely change, recent ones are refreshed daily
+_RECENT_MAX_AGE = 24 * 3600
+
+# Frames kept in memory, least recently used dropped first
+MEMORY_ITEMS = 64
+
+_memory_cache = OrderedDict()
+_memory_lock = threading.Lock()
+
+def _empty_frame():
+    return {name: np.empty(0, dtype=dtype) for name, dtype in FRAME_COLUMNS.items()}
+
+def _is_recent(period):
+    """True when the period could still receive new filings"""
+    try:
+        year = int(period[2:6])
+    except ValueError:
+        return True
+    return year >= date.today().year - 1
+
+def _max_age(period):
+    return _RECENT_MAX_AGE if _is_recent(period) else None
+
+def _remembered(key, max_age):
+    with _memory_lock:
+        hit = _memory_cache.get(key)
+        if hit is not None and (max_age is None or time.time() - hit[0] <= max_age):
+            _memory_cache.move_to_end(key)
+            return hit[1]
+    return None
+
+def _remember(key, frame):
+    with _memory_lock:
+        _memory_cache[key] = (time.time(), frame)
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > MEMORY_ITEMS:
+            _memory_cache.popitem(last=False)
+
+def _frame_from_api(data):
+    """Convert the frames API JSON into columnar arrays"""
+    rows = data.get('data', [])
+    frame = {
+        'cik': np.array([row.get('cik', 0) for row in rows], dtype='int64'),
+        'val': np.array([row.get('val', np.nan) for row in rows], dtype='float64'),
+        'end': np.array([row.get('end', '') for row in rows], dtype='datetime64[D]'),
+        'accn': np.empty(len(rows), dtype=object),
+        'entity_name': np.empty(len(rows), dtype=object),
+    }
+    frame['accn'][:] = [row.get('accn', '') for row in rows]
+    frame['entity_name'][:] = [row.get('entityName', '') for row in rows]
+    return frame
+
+def _frame_from_store(store, taxonomy, concept, unit, period):
+    """
+    Build a frame from the universe store using the frame tag carried by each fact
+
+    Returns None when the store has no such concept, unit or period.
+    """
+    start, stop = store.concept_range(f"{taxonomy}:{concept}")
+    if start == stop:
+        return None
+
+    raw = store.raw_slice(start, stop)
+    frame_names = store.dictionaries['frame']
+    unit_names = store.dictionaries['unit']
+    frame_code = int(np.searchsorted(frame_names, period))
+    unit_code = int(np.searchsorted(unit_names, unit))
+    if (frame_code >= len(frame_names) or frame_names[frame_code] != period
+            or unit_code >= len(unit_names) or unit_names[unit_code] != unit):
+        return None
+
+    rows = np.flatnonzero((raw['frame'] == frame_code) & (raw['unit'] == unit_code))
+    # A restated fact can carry the same frame twice, keep the latest filing per company
+    ciks = np.asarray(raw['cik'][rows])
+    filed = np.asarray(raw['filed'][rows])
+    order = np.lexsort((filed, ciks))
+    rows = rows[order]
+    last = np.append(ciks[order][1:] != ciks[order][:-1], True)
+    rows = rows[last]
+
+    frame = {
+        'cik': np.asarray(raw['cik'][rows]),
+        'val': np.asarray(raw['val'][rows]),
+        'end': np.asarray(raw['end'][rows]),
+        'accn': store.dictionaries['accn'][np.asarray(raw['accn'][rows])].astype(object),
+        'entity_name': np.empty(len(rows), dtype=object),
+    }
+    # Attach company names from the store metadata
+    company_ciks = store.companies['cik']
+    positions = np.clip(np.searchsorted(company_ciks, frame['cik']), 0, max(len(company_ciks) - 1, 0))
+    if len(company_ciks):
+        known = company_ciks[positions] == frame['cik']
+        frame['entity_name'][:] = ''
+        frame['entity_name'][known] = store.companies['name'][positions[known]].astype(object)
+    else:
+        frame['entity_name'][:] = ''
+    return frame
+
+def get_frame(taxonomy, concept, unit, period, source='auto', data_dir=None):
+    """
+    One concept for every filer in a period
+
+    Args:
+        taxonomy (str): e.g. 'us-gaap'
+        concept (str): e.g. 'Revenues'
+        unit (str): e.g. 'USD', 'USD-per-shares', 'shares'
+        period (str): e.g. 'CY2023', 'CY2023Q1', 'CY2023Q4I'
+        source (str): 'store', 'api', or 'auto' (store when available, otherwise API)
+        data_dir (str, optional): Universe data directory for the local store
+
+    Returns:
+        dict: Column name -> numpy array (cik, val, end, accn, entity_name), sorted by CIK,
+            or None when the frame had to come from the API and could not be fetched
+    """
+    key = (taxonomy, concept, unit, period, source, data_dir)
+    # Recent periods expire from memory on the same schedule as the disk cache
+    max_age = _max_age(period)
+    frame = _remembered(key, max_age)
+    if frame is not None:
+        return frame
+
+    if source in ('auto', 'store'):
+        from universe_store import open_universe_store, DEFAULT_DATA_DIR
+        store = open_universe_store(data_dir or DEFAULT_DATA_DIR)
+        if store is not None:
+            frame = _frame_from_store(store, taxonomy, concept, unit, period)
+        elif source == 'store':
+            print("No local universe store available")
+        if frame is None and source == 'store':
+            frame = _empty_frame()
+
+    if frame is None:
+        print(f"Fetching frame: {taxonomy}/{concept}/{unit}/{period}")
+        data = get_client().frame(taxonomy, concept, unit, period, max_age=max_age)
+        if data is None:
+            # Not remembered, the next call tries the API again
+            print(f"Could not fetch frame: {taxonomy}/{concept}/{unit}/{period}")
+            return None
+        frame = _frame_from_api(data)
+
+    order = np.argsort(frame['cik'], kind='stable')
+    frame = {name: column[order] for name, column in frame.items()}
+    _remember(key, frame)
+    return frame
+
+def get_frames(taxonomy, concept, unit, periods, source='auto', data_dir=None):
+    """Frames for several periods, returned as {period: frame}, None for a failed fetch"""
+    return {period: get_frame(taxonomy, concept, unit, period, source, data_dir) for period in periods}
+
+def align_frames(frames):
+    """
+    Align several frames on CIK
+
+    Args:
+        frames (dict): {period: frame} from get_frames
+
+    Returns:
+        tuple: (ciks, periods, values) where values has shape (len(ciks), len(periods)) and
+            NaN where a company did not report in a period (or its frame could not be fetched)
+    """
+    periods = list(frames)
+    available = [period for period in periods if frames[period] is not None]
+    if not available:
+        return np.empty(0, dtype='int64'), periods, np.full((0, len(periods)), np.nan)
+    ciks = np.unique(np.concatenate([frames[p]['cik'] for p in available]))
+    values = np.full((len(ciks), len(periods)), np.nan)
+    for j, period in enumerate(periods):
+        if frames[period] is None:
+            continue
+        positions = np.searchsorted(ciks, frames[period]['cik'])
+        values[positions, j] = frames[period]['val']
+    return ciks, periods, values
+
+def percentile_ranks(values, axis=0):
+    """
+    Percentile rank (0-100) of every value along an axis, ties share their average rank
+
+    NaN values stay NaN and are left out of the ranking. Works on 1-D frames and on the
+    2-D matrix from align_frames (rank within each period with axis=0).
+    """
+    values = np.asarray(values, dtype='float64')
+    moved = np.moveaxis(values, axis, -1)
+    flat = moved.reshape(-1, moved.shape[-1]) if moved.ndim > 1 else moved[None, :]
+    result = np.full(flat.shape, np.nan)
+
+    n = flat.shape[1]
+    valid = ~np.isnan(flat)
+    counts = valid.sum(axis=1)
+    # NaN sorts last, so the first counts[i] positions of each row are the valid ones
+    order = np.argsort(flat, axis=1, kind='stable')
+    sorted_values = np.take_along_axis(flat, order, axis=1)
+    positions = np.broadcast_to(np.arange(n), flat.shape)
+
+    # Average the ordinal ranks across runs of equal values
+    new_run = np.ones(flat.shape, dtype=bool)
+    new_run[:, 1:] = sorted_values[:, 1:] != sorted_values[:, :-1]
+    run_id = np.cumsum(new_run, axis=1)
+    run_offset = (run_id + np.arange(flat.shape[0])[:, None] * (n + 1)).ravel()
+    run_sum = np.bincount(run_offset, weights=positions.ravel(), minlength=flat.shape[0] * (n + 1))
+    run_len = np.bincount(run_offset, minlength=flat.shape[0] * (n + 1))
+    average_rank = (run_sum / np.maximum(run_len, 1))[run_offset].reshape(flat.shape)
+
+    denominator = np.maximum(counts - 1, 1)[:, None]
+    ranked = 100.0 * average_rank / denominator
+    ranked[positions >= counts[:, None]] = np.nan
+    np.put_along_axis(result, order, ranked, axis=1)
+    # A single valid value ranks at the top
+    result[(counts == 1)[:, None] & valid] = 100.0
+
+    result = result.reshape(moved.shape) if moved.ndim > 1 else result[0]
+    return np.moveaxis(result, -1, axis)
+
+def screen_frame(frame, top=20, ascending=False):
+    """Rows of a frame ordered by value, with their percentile rank"""
+    ranks = percentile_ranks(frame['val'])
+    order = np.argsort(frame['val'])
+    order = order[~np.isnan(frame['val'][order])]
+    if not ascending:
+        order = order[::-1]
+    order = order[:top]
+    return [
+        {
+            'cik': int(frame['cik'][i]),
+            'entity_name': frame['entity_name'][i],
+            'val': float(frame['val'][i]),
+            'end': str(frame['end'][i]),
+            'percentile': float(ranks[i]),
+        }
+        for i in order
+    ]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Screen one XBRL concept across all filers")
+    parser.add_argument('concept', help="taxonomy:concept, e.g. us-gaap:Revenues")
+    parser.add_argument('periods', nargs='+', help="Frame periods, e.g. CY2023 CY2023Q4I")
+    parser.add_argument('--unit', default='USD')
+    parser.add_argument('--source', choices=['auto', 'store', 'api'], default='auto')
+    parser.add_argument('--data', default=None, help="Universe data directory for the local store")
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--ascending', action='store_true', help="List the smallest values first")
+    args = parser.parse_args()
+
+    taxonomy, concept = args.concept.split(':', 1)
+    for period in args.periods:
+        frame = get_frame(taxonomy, concept, args.unit, period, source=args.source, data_dir=args.data)
+        if frame is None:
+            continue
+        print(f"\n{args.concept} {period}: {len(frame['cik'])} filers")
+        print("-" * 80)
+        for row in screen_frame(frame, top=args.top, ascending=args.ascending):
+            print(f"{row['cik']:>10}  {row['entity_name'][:40]:<40} {row['val']:>20,.0f}  "
+                  f"{row['percentile']:5.1f}%")
@@ -0,0 +1,288 @@
+"""
+Multi-company concept panels
+Fetches companyfacts for many companies concurrently (sharing the sec_client rate limiter
+and cache, or reading the local universe store) and assembles a dense
+companies x concepts x fiscal years array with an aligned mask.
+"""
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sec_client import get_client
+from fact_store import flatten_company_facts, concat_fact_tables, take_rows
+from point_in_time import PERIOD_TYPES
+
+# Forms whose facts describe a full fiscal year
+ANNUAL_FORMS = ('10-K', '10-K/A', '10-KT', '20-F', '20-F/A', '40-F', '40-F/A')
+
+# companyfacts only changes when a company files, a day old copy is fine for panels
+COMPANY_FACTS_MAX_AGE = 24 * 3600
+
+class ConceptPanel:
+    """
+    Dense companies x concepts x years panel
+
+    Attributes:
+        ciks (np.ndarray): Company CIKs, axis 0
+        concepts (list): "taxonomy:concept" names, axis 1
+        years (np.ndarray): Fiscal years (calendar year of the period end), axis 2
+        values (np.ndarray): float64 values, NaN where missing
+        mask (np.ndarray): True where a value was reported
+        names (dict): CIK -> company name
+    """
+    def __init__(self, ciks, concepts, years, values, mask, names=None):
+        self.ciks = ciks
+        self.concepts = concepts
+        self.years = years
+        self.values = values
+        self.mask = mask
+        self.names = names or {}
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def concept(self, concept):
+        """companies x years matrix for one concept"""
+        return self.values[:, self.concepts.index(concept), :]
+
+    def to_dataframe(self):
+        """Long-format DataFrame with one row per reported value"""
+        import pandas as pd
+        k, c, p = np.nonzero(self.mask)
+        return pd.DataFrame({
+            'cik': self.ciks[k],
+            'company': [self.names.get(int(cik), '') for cik in self.ciks[k]],
+            'concept': np.asarray(self.concepts, dtype=object)[c],
+            'year': self.years[p],
+            'value': self.values[k, c, p],
+        })
+
+    def to_wide_dataframe(self):
+        """(company, concept) rows x year columns, the layout of the single-company model"""
+        frame = self.to_dataframe()
+        return frame.pivot_table(index=['cik', 'company', 'concept'], columns='year',
+                                 values='value', aggfunc='first')
+
+def fetch_company_facts(cik, store=None):
+    """
+    companyfacts JSON for one company, from the universe store or the cached API
+
+    Args:
+        cik (int or str): Company CIK
+        store (UniverseStore, optional): Local store to read first
+    """
+    if store is not None:
+        facts = store.company_facts(int(cik))
+        if facts:
+            return facts
+    return get_client().company_facts(cik, max_age=COMPANY_FACTS_MAX_AGE)
+
+def fetch_fact_table(cik, store=None):
+    """
+    Fact table for one company, sliced from the universe store or flattened from the API
+
+    Returns:
+        dict: Fact table, or None when the company facts could not be fetched
+    """
+    if store is not None and store.has_facts(cik):
+        return store.fact_table(cik=int(cik))
+    facts = get_client().company_facts(cik, max_age=COMPANY_FACTS_MAX_AGE)
+    if not facts:
+        return None
+    return flatten_company_facts(facts, cik=int(cik))
+
+def fetch_many_company_facts(ciks, store=None, max_workers=8):
+    """
+    Fetch companyfacts for many companies concurrently
+
+    The shared limiter keeps the combined request rate inside SEC's limit no matter how
+    many workers run.
+
+    Returns:
+        dict: CIK -> companyfacts JSON (companies that failed are left out)
+    """
+    def fetch(cik):
+        return int(cik), fetch_company_facts(cik, store)
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for cik, facts in executor.map(fetch, ciks):
+            if facts:
+                results[cik] = facts
+            else:
+                print(f"No company facts for CIK {cik}")
+    return results
+
+def ciks_for_sic(sic, store=None):
+    """
+    CIKs of every company with a SIC code
+
+    Uses the universe store metadata when available, otherwise pages through EDGAR's
+    company browse feed.
+    """
+    if store is not None:
+        ciks = store.ciks_for_sic(sic)
+        if len(ciks):
+            return [int(cik) for cik in ciks]
+
+    from sec_client import get
+    ciks = []
+    start = 0
+    while True:
+        url = (f"https://www.sec.gov/cgi-bin/browse-edgar?action=getcompany&SIC={int(sic)}"
+               f"&type=&dateb=&owner=include&start={start}&count=100&output=atom")
+        try:
+            response = get(url)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Error fetching SIC {sic} company list: {e}")
+            break
+        page = [int(cik) for cik in re.findall(r'<cik>(\d+)</cik>', response.text)]
+        ciks.extend(page)
+        if len(page) < 100:
+            break
+        start += 100
+    return ciks
+
+def _annual_facts(table, concepts, as_of=None):
+    """Keep annual-form facts for the wanted concepts that are full-year durations or instants"""
+    keep = np.isin(table['concept'], concepts) & np.isin(table['form'], ANNUAL_FORMS)
+    keep &= ~np.isnat(table['end']) & ~np.isnan(table['val'])
+    low, high = PERIOD_TYPES['annual']
+    duration = (table['end'] - table['start']).astype('int64')
+    keep &= np.isnat(table['start']) | ((duration >= low) & (duration <= high))
+    if as_of is not None:
+        keep &= table['filed'] <= np.datetime64(as_of, 'D')
+    return take_rows(table, keep)
+
+def assemble_panel(table, ciks, concepts, start_year, end_year, as_of=None, names=None, unit='USD'):
+    """
+    Scatter a fact table into a dense panel without python loops
+
+    For each (company, concept, year) the value comes from the latest period end in that
+    year, and among those the latest filing on or before as_of.
+
+    Args:
+        table (dict): Fact table covering the companies
+        ciks (list): Companies in axis order
+        concepts (list): Concepts in axis order
+        start_year, end_year (int): Inclusive year range
+        as_of (str, optional): Ignore facts filed after this date
+        names (dict, optional): CIK -> company name
+        unit (str, optional): Preferred unit, other units are used only when it is missing
+
+    Returns:
+        ConceptPanel
+    """
+    ciks = np.asarray([int(c) for c in ciks], dtype='int64')
+    concepts = list(concepts)
+    years = np.arange(int(start_year), int(end_year) + 1)
+    values = np.full((len(ciks), len(concepts), len(years)), np.nan)
+
+    facts = _annual_facts(table, concepts, as_of)
+    fact_years = facts['end'].astype('datetime64[Y]').astype('int64') + 1970
+    keep = (fact_years >= years[0]) & (fact_years <= years[-1]) & np.isin(facts['cik'], ciks)
+    facts = take_rows(facts, keep)
+    fact_years = fact_years[keep]
+
+    if len(facts['val']):
+        cik_order = np.argsort(ciks)
+        cik_index = cik_order[np.searchsorted(ciks, facts['cik'], sorter=cik_order)]
+        concept_names = np.asarray(concepts, dtype=str)
+        concept_order = np.argsort(concept_names)
+        concept_index = concept_order[np.searchsorted(concept_names, facts['concept'].astype(str),
+                                                      sorter=concept_order)]
+        year_index = fact_years - years[0]
+        preferred_unit = (facts['unit'] == unit) if unit else np.ones(len(fact_years), dtype=bool)
+
+        # Sort so the winning row of each cell comes last, then keep the last row per cell
+        order = np.lexsort((facts['filed'], facts['end'], preferred_unit,
+                            year_index, concept_index, cik_index))
+        cell = (cik_index * len(concepts) + concept_index) * len(years) + year_index
+        cell = cell[order]
+        last = np.append(cell[1:] != cell[:-1], True)
+        values.reshape(-1)[cell[last]] = facts['val'][order][last]
+
+    return ConceptPanel(ciks, concepts, years, values, ~np.isnan(values), names)
+
+def build_panel(ciks=None, concepts=None, start_year=None, end_year=None, sic=None,
+                as_of=None, max_workers=8, use_store=True):
+    """
+    Build a peer panel in one call
+
+    Args:
+        ciks (list, optional): Companies to include
+        concepts (list): "taxonomy:concept" names
+        start_year, end_year (int): Inclusive year range
+        sic (int, optional): Use every company with this SIC code instead of a CIK list
+        as_of (str, optional): Point-in-time cutoff on the filed date
+        max_workers (int): Concurrent fetches
+        use_store (bool): Read the local universe store when one exists
+
+    Returns:
+        ConceptPanel
+    """
+    store = None
+    if use_store:
+        from universe_store import open_universe_store
+        store = open_universe_store()
+
+    if sic is not None:
+        ciks = ciks_for_sic(sic, store)
+        print(f"Found {len(ciks)} companies with SIC {sic}")
+    if not ciks:
+        raise ValueError("No companies to build a panel for")
+    if not concepts:
+        raise ValueError("No concepts selected")
+
+    tables, names = [], {}
+    missing = list(ciks)
+    if store is not None:
+        # Companies in the store are sliced straight out of the mapped columns
+        stored = [int(cik) for cik in ciks if store.has_facts(cik)]
+        if stored:
+            tables.append(store.panel_facts(concepts, stored))
+            for cik in stored:
+                info = store.company_info(cik)
+                names[cik] = info['name'] if info else ''
+        stored = set(stored)
+        missing = [cik for cik in ciks if int(cik) not in stored]
+
+    company_facts = fetch_many_company_facts(missing, max_workers=max_workers)
+    tables.extend(flatten_company_facts(facts, cik=cik) for cik, facts in company_facts.items())
+    names.update({cik: facts.get('entityName', '') for cik, facts in company_facts.items()})
+    return assemble_panel(concat_fact_tables(tables), ciks, concepts, start_year, end_year, as_of, names)
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a companies x concepts x years panel")
+    group = parser.add_mutually_exclusive_group(required=True)
+    group.add_argument('--ciks', nargs='+', help="Company CIKs")
+    group.add_argument('--sic', type=int, help="Use every company with this SIC code")
+    parser.add_argument('--concepts', nargs='+', required=True, help="taxonomy:concept names")
+    parser.add_argument('--start', type=int, required=True, help="First year")
+    parser.add_argument('--end', type=int, required=True, help="Last year")
+    parser.add_argument('--as-of', default=None, help="Only use facts filed on or before this date")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--out', default=None, help="Write the panel to .xlsx or .csv")
+    args = parser.parse_args()
+
+    panel = build_panel(args.ciks, args.concepts, args.start, args.end, sic=args.sic,
+                        as_of=args.as_of, max_workers=args.workers)
+    print(f"Panel shape {panel.shape}, {int(panel.mask.sum())} of {panel.mask.size} cells filled")
+
+    if args.out:
+        wide = panel.to_wide_dataframe()
+        if args.out.endswith('.csv'):
+            wide.to_csv(args.out)
+        else:
+            wide.to_excel(args.out)
+        print(f"Saved panel to {args.out}")
@@ -0,0 +1,169 @@
+"""
+Point-in-time ("as-of filed date") queries over a fact table
+Answers "value of concept X for period P as known on date D" without look-ahead
+"""
+import numpy as np
+
+from fact_store import take_rows
+
+# Duration filters in days, used to separate quarterly and annual values that share an end date
+PERIOD_TYPES = {
+    'instant': None,
+    'quarter': (80, 100),
+    'annual': (350, 380),
+}
+
+# Multiplier that packs (group, filed day) into one sortable int64
+_FILED_SPAN = 1 << 20
+
+def _to_days(dates):
+    """Convert dates (strings, datetime64 or arrays of them) to int64 day numbers"""
+    return np.asarray(dates, dtype='datetime64[D]').astype('int64')
+
+class AsOfIndex:
+    """
+    Sorted-by-filed index over a fact table
+
+    Rows of one period type (and unit) are grouped by (cik, concept, period end) and sorted
+    by filed date inside each group, so the value known on a date is found with a single
+    binary search per lookup.
+    Whole panels are answered with one vectorized searchsorted call.
+    """
+    def __init__(self, facts, period_type, unit=None):
+        """
+        Args:
+            facts (dict): Fact table from fact_store.flatten_company_facts
+            period_type (str): 'instant', 'quarter' or 'annual', only those facts are kept.
+                Required because 3-month, year-to-date and annual facts can share an end date
+                and even a filing, so a group holding several durations has no single answer.
+            unit (str, optional): Keep only facts reported in this unit (e.g. 'USD'), needed
+                when a concept is reported in more than one unit
+
+        Raises:
+            ValueError: Unknown period type, or a concept reported in several units without
+                a unit to choose
+        """
+        if period_type not in PERIOD_TYPES:
+            raise ValueError(f"Unknown period type: {period_type}")
+        keep = ~np.isnat(facts['end']) & ~np.isnat(facts['filed']) & ~np.isnan(facts['val'])
+        if unit is not None:
+            keep &= facts['unit'] == unit
+        duration = (facts['end'] - facts['start']).astype('int64')
+        if period_type == 'instant':
+            keep &= np.isnat(facts['start'])
+        else:
+            low, high = PERIOD_TYPES[period_type]
+            keep &= ~np.isnat(facts['start']) & (duration >= low) & (duration <= high)
+
+        facts = take_rows(facts, keep)
+        if unit is None and len(facts['val']):
+            pairs = np.unique(np.stack([facts['concept'].astype(str), facts['unit'].astype(str)]), axis=1)
+            concepts, counts = np.unique(pairs[0], return_counts=True)
+            if (counts > 1).any():
+                raise ValueError(f"{concepts[counts > 1][0]} is reported in several units, pass unit")
+
+        # Dictionary-encode the key columns
+        self.ciks, cik_codes = np.unique(facts['cik'], return_inverse=True)
+        self.concepts, concept_codes = np.unique(facts['concept'].astype(str), return_inverse=True)
+        end_days = _to_days(facts['end'])
+        filed_days = _to_days(facts['filed'])
+        self._end_origin = int(end_days.min()) if len(end_days) else 0
+        self._end_span = int(end_days.max()) - self._end_origin + 1 if len(end_days) else 1
+
+        group_keys = self._group_key(cik_codes, concept_codes, end_days)
+
+        # Sort by group, then filed date, then accession so ties resolve deterministically
+        order = np.lexsort((facts['accn'].astype(str), filed_days, group_keys))
+        self.facts = take_rows(facts, order)
+        group_keys = group_keys[order]
+        filed_days = filed_days[order]
+
+        self.group_keys, group_ids = np.unique(group_keys, return_inverse=True)
+        self.group_starts = np.searchsorted(group_keys, self.group_keys, side='left')
+        self._filed_base = int(filed_days.min()) if len(filed_days) else 0
+        self._row_keys = group_ids.astype('int64') * _FILED_SPAN + (filed_days - self._filed_base)
+
+    def _group_key(self, cik_codes, concept_codes, end_days):
+        return ((cik_codes.astype('int64') * len(self.concepts) + concept_codes) * self._end_span
+                + (end_days - self._end_origin))
+
+    def __len__(self):
+        return len(self.facts['val'])
+
+    def lookup(self, ciks, concepts, periods, as_of):
+        """
+        Find the row known on the as-of date for every (cik, concept, period) combination
+
+        Args:
+            ciks (array-like): CIKs, length K
+            concepts (array-like): "taxonomy:concept" names, length C
+            periods (array-like): Period end dates, length P
+            as_of (date or array-like): Knowledge date, a scalar or anything broadcastable
+                to shape (K, C, P), e.g. one rebalance date per period with shape (P,)
+
+        Returns:
+            np.ndarray: Row indices into self.facts with shape (K, C, P), -1 where no value was known
+        """
+        ciks = np.asarray(ciks, dtype='int64')
+        concepts = np.asarray(concepts, dtype=str)
+        period_days = _to_days(periods)
+        as_of_days = np.broadcast_to(_to_days(as_of), (len(ciks), len(concepts), len(period_days)))
+
+        # Map query values onto the dictionary codes, remembering which ones exist
+        cik_codes = np.clip(np.searchsorted(self.ciks, ciks), 0, max(len(self.ciks) - 1, 0))
+        cik_found = (self.ciks[cik_codes] == ciks) if len(self.ciks) else np.zeros(len(ciks), bool)
+        concept_codes = np.clip(np.searchsorted(self.concepts, concepts), 0, max(len(self.concepts) - 1, 0))
+        concept_found = (self.concepts[concept_codes] == concepts) if len(self.concepts) else np.zeros(len(concepts), bool)
+        period_found = (period_days >= self._end_origin) & (period_days < self._end_origin + self._end_span)
+
+        keys = self._group_key(cik_codes[:, None, None], concept_codes[None, :, None], period_days[None, None, :])
+        found = cik_found[:, None, None] & concept_found[None, :, None] & period_found[None, None, :]
+
+        rows = np.full(keys.shape, -1, dtype='int64')
+        if not len(self.group_keys):
+            return rows
+
+        group_ids = np.clip(np.searchsorted(self.group_keys, keys), 0, len(self.group_keys) - 1)
+        found &= self.group_keys[group_ids] == keys
+
+        # Last row in the group with filed <= as_of, the offset is clipped so it never
+        # spills into a neighbouring group
+        offset = np.clip(as_of_days - self._filed_base, -1, _FILED_SPAN - 1)
+        query = group_ids.astype('int64') * _FILED_SPAN + offset
+        last = np.searchsorted(self._row_keys, query, side='right') - 1
+        found &= last >= self.group_starts[group_ids]
+
+        rows[found] = last[found]
+        return rows
+
+    def panel(self, ciks, concepts, periods, as_of):
+        """
+        Build a point-in-time panel of values
+
+        Args:
+            ciks, concepts, periods, as_of: See lookup()
+
+        Returns:
+            tuple: (values, mask) float64 array of shape (K, C, P) with NaN where missing,
+                and a boolean array that is True where a value was known
+        """
+        rows = self.lookup(ciks, concepts, periods, as_of)
+        mask = rows >= 0
+        values = np.full(rows.shape, np.nan)
+        values[mask] = self.facts['val'][rows[mask]]
+        return values, mask
+
+    def value(self, cik, concept, period, as_of):
+        """Value of a single concept for a period as known on a date, or None"""
+        row = self.lookup([cik], [concept], [period], as_of)[0, 0, 0]
+        if row < 0:
+            return None
+        return float(self.facts['val'][row])
+
+    def history(self, cik, concept, period):
+        """All versions of a fact in filed order, useful for auditing restatements"""
+        row = self.lookup([cik], [concept], [period], np.datetime64('9999-12-31'))[0, 0, 0]
+        if row < 0:
+            return take_rows(self.facts, slice(0, 0))
+        group_id = np.searchsorted(self.group_starts, row, side='right') - 1
+        return take_rows(self.facts, slice(self.group_starts[group_id], row + 1))
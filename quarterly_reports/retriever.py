@@ -1,57 +1,37 @@
-import requests
-import pandas as pd
-import tkinter as tk
-from tkinter import ttk, scrolledtext, messagebox, filedialog, simpledialog
-from tkinter.constants import TRUE
-from tkinter import TclError
+import importlib
 import json
 import os
 from datetime import datetime
 import threading
 import webbrowser
-import time
-import random
 import subprocess
+import sys
 
-def add_delay():
-    """Add a small random delay to avoid SEC rate limiting"""
-    delay = random.uniform(0.5, 2.0)
-    time.sleep(delay)
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class _LazyModule:
+    """Stands in for a module and imports it on first attribute access"""
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
+
+# The GUI toolkit is only loaded once a window is built, command line runs never import it
+tk = _LazyModule('tkinter')
+ttk = _LazyModule('tkinter.ttk')
+scrolledtext = _LazyModule('tkinter.scrolledtext')
+messagebox = _LazyModule('tkinter.messagebox')
+filedialog = _LazyModule('tkinter.filedialog')
+simpledialog = _LazyModule('tkinter.simpledialog')
 
 def get_companies_list():
-    headers = {
-        'User-Agent': 'herstromresources@gmail.com',
-        'Accept': 'application/json, text/javascript, */*',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Connection': 'keep-alive',
-        'Host': 'www.sec.gov'
-    }
+    """company_tickers.json (ticker, name and CIK of every listed company), None on error"""
+    from sec_client import get_client
     
     print(f"Fetching company list from SEC...")
-    #get companytickers.json
-    try:
-        # Add delay before request to avoid rate limiting
-        add_delay()
-        
-        response = requests.get(
-            'https://www.sec.gov/files/company_tickers.json',
-            headers=headers,
-            timeout=30
-        )
-        
-        # Check response status
-        if response.status_code == 403:
-            print("SEC API access forbidden. This might be due to rate limiting or invalid headers.")
-            print("Response headers:", response.headers)
-            print("Using backup data source...")
-            # TODO: Implement backup data source if needed
-            return None
-            
-        response.raise_for_status()  # Raise an exception for other bad status codes
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching company list: {e}")
-        return None
+    return get_client().company_tickers()
 
 def print_company_structure():
     """Debug function to print the structure of company_tickers.json"""
@@ -81,86 +61,100 @@ def print_company_structure():
 
 #company json url https://data.sec.gov/submissions/CIK##########.json
 def get_specific_company_json(cik):
-    if isinstance(cik, str) and len(cik) != 10:
-        cik = cik.zfill(10)
-    
-    headers = {
-        'User-Agent': 'Herstromresources@gmail.com',
-        'Accept': 'application/json, text/javascript, */*',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Connection': 'keep-alive',
-        'Host': 'data.sec.gov'
-    }
+    """Submissions JSON for a company, None on error"""
+    from sec_client import get_client
     
-    url = f'https://data.sec.gov/submissions/CIK{cik}.json'
-    print(f"Fetching URL: {url}")
-    
-    try:
-        # Add delay before request to avoid rate limiting
-        add_delay()
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        
-        # Check response status
-        if response.status_code == 403:
-            print("SEC API access forbidden. This might be due to rate limiting or invalid headers.")
-            print("Response headers:", response.headers)
-            return None
-            
-        response.raise_for_status()  # Raise an exception for other bad status codes
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching company data: {e}")
-        return None
+    print(f"Fetching submissions for CIK {str(cik).zfill(10)}")
+    return get_client().submissions(cik)
+
+# Flattened company facts per CIK, so bulk runs over many filings of one company fetch once
+_company_fact_tables = {}
 
-def extract_financial_tables(filing_url, accession, cik):
+def get_company_fact_table(cik, company_facts=None):
     """
-    Extract financial tables from a 10-K/10-Q filing
+    Columnar fact table for a company, built once per process
+
+    Sliced straight out of the universe store when it holds the company, otherwise
+    flattened from companyfacts JSON (the one given, or fetched).
+    """
+    from fact_store import flatten_company_facts
+    from universe_store import open_universe_store
+    
+    cik = str(cik).zfill(10)
+    if cik not in _company_fact_tables:
+        store = open_universe_store()
+        if store is not None and store.has_facts(int(cik)):
+            _company_fact_tables[cik] = store.fact_table(cik=int(cik))
+        else:
+            company_facts = company_facts or get_company_facts(cik, use_local_store=False)
+            if not company_facts:
+                return None
+            _company_fact_tables[cik] = flatten_company_facts(company_facts, cik=int(cik))
+    return _company_fact_tables[cik]
+
+def extract_financial_tables(filing_url, accession, cik, filing_type=None, filed=None):
     """
-    headers = {
-        'User-Agent': 'herstromresources@gmail.com',
-        'Accept': 'text/html,application/xhtml+xml,application/xml',
-    }
+    Extract financial tables from a 10-K/10-Q filing
     
-    # Construct URLs for the complete submission directory
-    accession_no_dash = accession.replace('-', '')
-    base_url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_no_dash}"
+    filed (the filing date) is stamped on the facts read from the filing's own instance,
+    so as-of filters on the filed date keep them.
+    
+    Only the filing's index.json is downloaded to find the XBRL instance, FilingSummary.xml
+    only when there is no instance, and the full {accession}.txt submission is streamed line
+    by line only when the index is unavailable.
+    Statements are assembled from the XBRL facts reported in this filing and returned as
+    {statement: {period end: {line item: value}}}
+    """
+    from statement_assembler import assemble_statements, statements_to_records
+    from filing_documents import (get_filing_index, get_filing_summary, find_statement_reports,
+                                  find_xbrl_instance, filing_base_url, scan_submission_for_xbrl)
     
     try:
-        # First get the filing index page to find the main document
-        index_url = f"{base_url}/{accession}-index.htm"
-        print(f"Fetching index page: {index_url}")
-        response = requests.get(index_url, headers=headers)
-        response.raise_for_status()
-        
-        # Get list of all documents
-        doc_url = f"{base_url}/{accession}.txt"
-        print(f"Fetching document text: {doc_url}")
-        doc_response = requests.get(doc_url, headers=headers)
-        doc_response.raise_for_status()
-        doc_content = doc_response.text
-        
-        # Look for XML files which might contain the financial data
-        # Note: This is a basic approach, actual implementation will need more robust parsing
         financial_data = {
             "income_statement": None,
             "balance_sheet": None,
             "cash_flow": None
         }
         
+        # The small directory listing tells us whether the filing carries XBRL
+        index = get_filing_index(cik, accession)
+        if index is not None:
+            instance = find_xbrl_instance(index)
+            base_url = filing_base_url(cik, accession)
+            if instance:
+                has_xbrl = True
+                financial_data['xbrl_instance'] = f"{base_url}/{instance}"
+            else:
+                # Without an instance the rendered R-files are the only sign of XBRL, the
+                # statements then come from companyfacts
+                reports = find_statement_reports(get_filing_summary(cik, accession, index))
+                has_xbrl = bool(reports)
+                financial_data['statement_reports'] = {
+                    statement: f"{base_url}/{report['html_file']}"
+                    for statement, report in reports.items() if report['html_file']
+                }
+        else:
+            # No index listing, fall back to scanning the full submission without buffering it
+            has_xbrl = scan_submission_for_xbrl(cik, accession)['xbrl']
+        
         # Try to find XBRL data for structured financial information
-        if "XBRL INSTANCE DOCUMENT" in doc_content or "<xbrl" in doc_content.lower():
-            # Process XBRL data
-            # Note: This is a placeholder - actual XBRL processing requires specialized libraries
+        if has_xbrl:
             print("XBRL data found")
             
-            # For now, just extract some basic information to demonstrate the concept
-            if "StatementsOfIncome" in doc_content:
-                financial_data["income_statement"] = "Income statement data found"
-            if "BalanceSheets" in doc_content:
-                financial_data["balance_sheet"] = "Balance sheet data found"
-            if "StatementsOfCashFlows" in doc_content:
-                financial_data["cash_flow"] = "Cash flow statement data found"
+            # Facts from this filing's own instance, companyfacts when it cannot be parsed
+            fact_table = None
+            if financial_data.get('xbrl_instance'):
+                from xbrl_parser import fetch_xbrl_facts
+                fact_table = fetch_xbrl_facts(financial_data['xbrl_instance'], cik=cik,
+                                              accession=accession, filed=filed, form=filing_type or '')
+                if fact_table is not None and not len(fact_table['val']):
+                    fact_table = None
+            if fact_table is None:
+                fact_table = get_company_fact_table(cik)
+            if fact_table is not None:
+                period_type = 'quarter' if filing_type == '10-Q' else 'annual'
+                statements = assemble_statements(fact_table, period_type=period_type, accession=accession)
+                financial_data.update(statements_to_records(statements))
         
         return financial_data
         
@@ -176,7 +170,9 @@ def process_quarterly_filing(filing_info):
         financial_data = extract_financial_tables(
             filing_info['link'], 
             filing_info['accession'],
-            filing_info['cik']
+            filing_info['cik'],
+            filing_info.get('type'),
+            filing_info.get('date')
         )
         
         if financial_data:
@@ -191,66 +187,74 @@ def process_quarterly_filing(filing_info):
         print(f"Error processing filing: {str(e)}")
         return None
 
-def search_companies(search_str, company_list_var, dropdown_menu):
-    """
-    Search for companies by CIK, ticker, or name and update the dropdown menu
-    Supports partial matching with case-insensitive search
+def find_companies(companies_data, search_str, limit=50):
     """
-    if not search_str:
-        return
-    
-    # Get the company data
-    try:
-        companies_data = get_companies_list()
-        if not companies_data:
-            messagebox.showerror("Error", "Failed to retrieve company data")
-            return
-    except Exception as e:
-        messagebox.showerror("Error", f"Error retrieving company data: {str(e)}")
-        return
+    Match companies by CIK, ticker, or name, case-insensitive and partial
     
+    Args:
+        companies_data (dict): company_tickers.json
+        search_str (str): Search text
+        limit (int): Stop after this many matches
+        
+    Returns:
+        list: (ticker, title, zero-padded CIK), an exact ticker match first
+    """
     matches = []
     search_str = search_str.lower().strip()
+    if not search_str:
+        return matches
     
     # Check if search string is numeric (potential CIK search)
     is_cik_search = search_str.isdigit()
     
-    # Loop through all companies in the data
     # Structure is like: {"0": {"cik_str": 1234567, "ticker": "ABC", "title": "ABC Corp"}, "1": {...}, ...}
     for key in companies_data:
         company = companies_data[key]
         
-        # Get company details based on the actual JSON structure
         try:
-            # Fix: Get CIK as integer, convert to string, then pad
             cik_value = company.get('cik_str', company.get('cik', ''))
             if cik_value == '' or cik_value is None:
                 cik_raw = '0'
             else:
                 cik_raw = str(int(cik_value))
-            cik_padded = cik_raw.zfill(10)
-            ticker = company.get('ticker', '').lower()
-            title = company.get('title', '').lower()
+            match = (company.get('ticker', ''), company.get('title', ''), cik_raw.zfill(10))
+            ticker = match[0].lower()
+            title = match[1].lower()
             
             # Search by ticker (exact match takes priority)
             if search_str == ticker:
-                matches.insert(0, f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})")
-            # Search by CIK (if search is numeric)
-            elif is_cik_search and search_str in cik_raw:
-                matches.append(f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})")
-            # Search by ticker (partial match)
-            elif search_str in ticker:
-                matches.append(f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})")
-            # Search by company name (partial match)
-            elif search_str in title:
-                matches.append(f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})")
+                matches.insert(0, match)
+            # Search by CIK, ticker or name (partial match)
+            elif (is_cik_search and search_str in cik_raw) or search_str in ticker or search_str in title:
+                matches.append(match)
         except Exception as e:
             print(f"Error processing company {key}: {e}")
             continue
         
-        # Limit to top 50 matches to prevent overwhelming the dropdown
-        if len(matches) >= 50:
+        if len(matches) >= limit:
             break
+    return matches
+
+def search_companies(search_str, company_list_var, dropdown_menu):
+    """
+    Search for companies by CIK, ticker, or name and update the dropdown menu
+    Supports partial matching with case-insensitive search
+    """
+    if not search_str:
+        return
+    
+    # Get the company data
+    try:
+        companies_data = get_companies_list()
+        if not companies_data:
+            messagebox.showerror("Error", "Failed to retrieve company data")
+            return
+    except Exception as e:
+        messagebox.showerror("Error", f"Error retrieving company data: {str(e)}")
+        return
+    
+    matches = [f"{ticker} - {title} (CIK: {cik})"
+               for ticker, title, cik in find_companies(companies_data, search_str)]
     
     # Update the dropdown menu with search results
     dropdown_menu['menu'].delete(0, 'end')
@@ -286,253 +290,10 @@ def extract_cik_from_selection(selection):
         print(f"Error extracting CIK from selection: {e}")
         return None
 
-class AutocompleteCombobox(ttk.Frame):
-    """Custom autocomplete combobox widget for company search"""
-    def __init__(self, parent, **kwargs):
-        super().__init__(parent, **kwargs)
-        
-        # Create internal widgets
-        self.entry_var = tk.StringVar()
-        self.entry = ttk.Entry(self, textvariable=self.entry_var, width=70)
-        self.entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
-        
-        # Create a popup frame that will be positioned in the toplevel
-        self.popup = tk.Toplevel(self)
-        self.popup.withdraw()
-        self.popup.overrideredirect(True)  # Remove window decorations
-        
-        # Make the popup frame behave as a dropdown
-        self.popup.bind("<Escape>", lambda e: self._hide_listbox())
-        
-        # Create listbox inside popup
-        listbox_frame = ttk.Frame(self.popup)
-        listbox_frame.pack(fill=tk.BOTH, expand=True)
-        
-        # Use the same width as the entry field
-        self.listbox = tk.Listbox(listbox_frame, height=8, exportselection=False)
-        scrollbar = ttk.Scrollbar(listbox_frame, orient=tk.VERTICAL, command=self.listbox.yview)
-        self.listbox.configure(yscrollcommand=scrollbar.set)
-        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        
-        # Track popup visibility
-        self.popup_visible = False
-        
-        # Bind events
-        self.entry.bind("<KeyRelease>", self._on_key_release)
-        self.entry.bind("<FocusOut>", lambda e: self.after(200, self._hide_listbox))
-        self.entry.bind("<FocusIn>", self._on_focus_in)
-        self.listbox.bind("<ButtonRelease-1>", self._on_listbox_select)
-        self.listbox.bind("<Return>", self._on_listbox_select)
-        self.listbox.bind("<Double-Button-1>", self._on_listbox_select)
-        
-        # Store values for search delay
-        self._after_id = None
-        self._delay_ms = 300  # Delay after typing in milliseconds
-        
-        # Store company data
-        self.matches = []
-        
-    def _on_key_release(self, event):
-        """Handle key release in entry widget"""
-        # Handle special keys
-        if event.keysym in ('Down', 'Up'):
-            self._handle_arrow_keys(event.keysym)
-            return
-        elif event.keysym == 'Return' and self.popup_visible:
-            self._on_listbox_select(None)
-            return
-        elif event.keysym == 'Escape':
-            self._hide_listbox()
-            return
-            
-        # Cancel previous delayed search if any
-        if self._after_id:
-            self.after_cancel(self._after_id)
-        
-        search_text = self.entry_var.get().strip()
-        
-        # If search text is too short, hide listbox
-        if len(search_text) < 2:
-            self._hide_listbox()
-            return
-            
-        # Schedule new search with delay
-        self._after_id = self.after(self._delay_ms, lambda: self._search_companies(search_text))
-    
-    def _handle_arrow_keys(self, key):
-        """Handle up/down arrow keys for listbox navigation"""
-        if not self.popup_visible:
-            self._search_companies(self.entry_var.get().strip())
-            return
-            
-        if not self.listbox.curselection():
-            # No selection, select first item
-            if self.listbox.size() > 0:
-                self.listbox.selection_set(0)
-            return
-                
-        # Get current selection
-        selection = self.listbox.curselection()[0]
-        
-        # Clear current selection
-        self.listbox.selection_clear(selection)
-        
-        # Calculate new selection
-        if key == 'Down':
-            new_selection = selection + 1 if selection < self.listbox.size() - 1 else 0
-        else:  # Up
-            new_selection = selection - 1 if selection > 0 else self.listbox.size() - 1
-            
-        # Set new selection
-        self.listbox.selection_set(new_selection)
-        self.listbox.see(new_selection)
-    
-    def _search_companies(self, search_str):
-        """Search companies and update listbox"""
-        self._after_id = None  # Clear the after ID since it has executed
-        
-        # Clear the listbox
-        self.listbox.delete(0, tk.END)
-        self.matches = []
-        
-        if not search_str:
-            self._hide_listbox()
-            return
-        
-        # Get the company data
-        try:
-            companies_data = get_companies_list()
-            if not companies_data:
-                messagebox.showerror("Error", "Failed to retrieve company data")
-                return
-        except Exception as e:
-            messagebox.showerror("Error", f"Error retrieving company data: {str(e)}")
-            return
-        
-        # Check if search string is numeric (potential CIK search)
-        is_cik_search = search_str.isdigit()
-        search_str = search_str.lower().strip()
-        
-        # Search companies
-        for key in companies_data:
-            company = companies_data[key]
-            
-            # Get company details
-            try:
-                # Fix: Get CIK as integer, convert to string, then pad
-                cik_value = company.get('cik_str', company.get('cik', ''))
-                if cik_value == '' or cik_value is None:
-                    cik_raw = '0'
-                else:
-                    cik_raw = str(int(cik_value))
-                cik_padded = cik_raw.zfill(10)
-                ticker = company.get('ticker', '').lower()
-                title = company.get('title', '').lower()
-                
-                # Search by ticker (exact match takes priority)
-                if search_str == ticker:
-                    display_text = f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})"
-                    self.listbox.insert(0, display_text)
-                    self.matches.insert(0, display_text)
-                # Search by CIK (if search is numeric)
-                elif is_cik_search and search_str in cik_raw:
-                    display_text = f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})"
-                    self.listbox.insert(tk.END, display_text)
-                    self.matches.append(display_text)
-                # Search by ticker (partial match)
-                elif search_str in ticker:
-                    display_text = f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})"
-                    self.listbox.insert(tk.END, display_text)
-                    self.matches.append(display_text)
-                # Search by company name (partial match)
-                elif search_str in title:
-                    display_text = f"{company.get('ticker', '')} - {company.get('title', '')} (CIK: {cik_padded})"
-                    self.listbox.insert(tk.END, display_text)
-                    self.matches.append(display_text)
-            except Exception as e:
-                print(f"Error processing company {key}: {e}")
-                continue
-            
-            # Limit to top 50 matches
-            if len(self.matches) >= 50:
-                break
-        
-        # Show listbox if we have matches
-        if self.matches:
-            if self.listbox.size() > 0:
-                self.listbox.selection_set(0)  # Select first item by default
-            self._show_listbox()
-        else:
-            self._hide_listbox()
-            self.listbox.insert(0, "No matches found")
-            self._show_listbox()
-    
-    def _on_listbox_select(self, event):
-        """Handle listbox item selection"""
-        try:
-            if self.listbox.curselection():
-                index = self.listbox.curselection()[0]
-                value = self.listbox.get(index)
-                if value != "No matches found":
-                    self.entry_var.set(value)
-                self._hide_listbox()
-                
-                # Trigger any bound selection events
-                self.event_generate("<<ComboboxSelected>>")
-                # Give focus back to the entry widget
-                self.entry.focus_set()
-        except (IndexError, TclError) as e:
-            print(f"Error in listbox selection: {e}")
-    
-    def _show_listbox(self):
-        """Show the dropdown listbox"""
-        if not self.popup_visible:
-            try:
-                # Position the popup correctly
-                x = self.entry.winfo_rootx()
-                y = self.entry.winfo_rooty() + self.entry.winfo_height()
-                
-                # Make the dropdown width match the entry field width exactly
-                width = self.entry.winfo_width()
-                
-                # Adjust the geometry and make sure the dropdown doesn't exceed the content
-                self.popup.geometry(f"{width}x200+{x}+{y}")
-                self.popup.deiconify()
-                self.popup.lift()
-                
-                # After showing, adjust height based on actual content
-                if self.listbox.size() < 8:
-                    height = self.listbox.size() * 24 + 10  # Estimate height based on item count
-                    if height < 50:  # Minimum height
-                        height = 30
-                    self.popup.geometry(f"{width}x{height}+{x}+{y}")
-                
-                self.popup_visible = True
-            except Exception as e:
-                print(f"Error showing listbox: {e}")
-    
-    def _hide_listbox(self):
-        """Hide the dropdown listbox"""
-        if self.popup_visible:
-            self.popup.withdraw()
-            self.popup_visible = False
-    
-    def _on_focus_in(self, event):
-        """Handle entry widget focus in"""
-        if len(self.entry_var.get().strip()) >= 2 and self.matches:
-            self._show_listbox()
-    
-    def get(self):
-        """Get the current value of the combobox"""
-        return self.entry_var.get()
-    
-    def set(self, value):
-        """Set the value of the combobox"""
-        self.entry_var.set(value)
-
 def create_gui():
     """Create Tkinter GUI for SEC Quarterly Report Retriever"""
+    from company_combobox import AutocompleteCombobox
+    
     root = tk.Tk()
     root.title("SEC Quarterly Report Retriever")
     root.geometry("1000x700")  # Increased window size
@@ -571,7 +332,7 @@ def create_gui():
     # Replace separate search box and dropdown with autocomplete combobox
     ttk.Label(top_frame, text="Search Company:").grid(row=0, column=0, sticky=tk.W, padx=5, pady=5)
     
-    company_combo = AutocompleteCombobox(top_frame)
+    company_combo = AutocompleteCombobox(top_frame, get_companies_list)
     company_combo.grid(row=0, column=1, sticky=tk.W+tk.E, padx=5, pady=5, columnspan=2)
     
     # Filing type selection
@@ -834,51 +595,18 @@ def fetch_filings_thread(cik, filing_type, root, company_selection):
         
         company_name = company_data.get('name', 'Unknown Company')
         
-        # Get filings
-        filings = company_data.get('filings', {}).get('recent', {})
+        # Get filings, including the older history pages beyond filings.recent
+        from sec_client import load_filing_history
+        filings = load_filing_history(cik, submissions=company_data)
         if not filings:
             root.after(0, lambda: messagebox.showerror("Error", "No filings found for this company"))
             return
         
-        # Get the arrays of data
-        dates = filings.get('acceptanceDateTime', [])
-        accession_numbers = filings.get('accessionNumber', [])
-        filing_types = filings.get('form', [])
-        descriptions = filings.get('primaryDocument', [])
-        
-        # Filter by filing type
-        filtered_filings = []
-        for i in range(len(dates)):
-            current_type = filing_types[i]
-            
-            # Skip if doesn't match selected types
-            if filing_type != 'Both' and current_type != filing_type:
-                continue
-                
-            if current_type not in ['10-K', '10-Q']:
-                continue
-                
-            try:
-                date = datetime.strptime(dates[i].replace('T', ' ').replace('Z', ''), 
-                                         '%Y-%m-%d %H:%M:%S.%f').strftime('%Y-%m-%d')
-            except ValueError:
-                date = dates[i].split('T')[0]
-                
-            accession = accession_numbers[i]
-            description = descriptions[i] if i < len(descriptions) else "Unknown"
-            
-            # Construct the filing URL
-            accession_formatted = accession.replace('-', '')
-            link = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_formatted}/{accession}-index.htm"
-            
-            filtered_filings.append({
-                'date': date,
-                'type': current_type,
-                'accession': accession,
-                'description': description,
-                'link': link,
-                'cik': cik
-            })
+        # Filter the typed columns with masks, then build records for the survivors only
+        from sec_client import FilingIndex
+        index = FilingIndex(filings, cik)
+        forms = ['10-K', '10-Q'] if filing_type == 'Both' else [f for f in ('10-K', '10-Q') if f == filing_type]
+        filtered_filings = index.records(index.select(forms))
         
         # Update the filings display
         root.after(0, lambda: display_filings_as_cards(filtered_filings, company_name, root))
@@ -1210,42 +938,59 @@ def download_selected_filings(selected_filings, company_name, root):
                     args=(to_download, save_dir, company_name, 
                           progress_window, status_label)).start()
 
-def download_data_thread(selected_filings, save_dir, company_name, progress_window, status_label):
-    """Thread function to download financial data"""
+def download_data_thread(selected_filings, save_dir, company_name, progress_window, status_label,
+                         compress=False, parquet=False):
+    """
+    Thread function to download financial data
+    
+    Filings are processed in parallel and tracked in a job manifest inside the company
+    directory. If an earlier download of the same filings stopped partway, its directory
+    is reused and only the unfinished filings are processed.
+    Each filing is appended to filings.jsonl (gzipped when compress is set, plus a Parquet
+    table when parquet is set) as soon as it finishes, and consolidated_index.json points
+    at every record.
+    """
+    from download_manager import DownloadManifest, find_resumable_directory, run_download_jobs, PARSED, FAILED
+    from filing_output import FilingOutput
+    
     try:
-        # Create company directory
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        # Create company directory, or resume an unfinished one
         clean_company_name = "".join(c for c in company_name if c.isalnum() or c in (' ', '-', '_')).strip()
-        company_dir = os.path.join(save_dir, f"{clean_company_name}_{timestamp}")
-        os.makedirs(company_dir, exist_ok=True)
+        accessions = [filing['accession'] for filing in selected_filings]
+        company_dir = find_resumable_directory(save_dir, clean_company_name, accessions)
+        if company_dir:
+            print(f"Resuming download in {company_dir}")
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            company_dir = os.path.join(save_dir, f"{clean_company_name}_{timestamp}")
+            os.makedirs(company_dir, exist_ok=True)
+        
+        manifest = DownloadManifest(company_dir)
+        manifest.add(selected_filings)
         
-        all_financial_data = []
+        output = FilingOutput(company_dir, compress=compress, parquet=parquet)
         
-        for i, filing in enumerate(selected_filings):
+        def write_filing(filing, financial_data):
+            # One line per filing, written as soon as it is done
+            return output.write(financial_data)
+        
+        def show_progress(done, total, filing, state):
             progress_window.after(0, lambda: status_label.config(
-                text=f"Processing filing {i+1}/{len(selected_filings)}: {filing['date']} {filing['type']}"
+                text=f"Processed {done}/{total}: {filing['date']} {filing['type']} ({state})"
             ))
-            
-            # Process the filing to extract financial data
-            financial_data = process_quarterly_filing(filing)
-            
-            if financial_data:
-                all_financial_data.append(financial_data)
-                
-                # Save individual filing data
-                filing_date = filing['date'].replace('-', '')
-                filing_file = os.path.join(company_dir, f"{filing['type']}_{filing_date}.json")
-                
-                with open(filing_file, 'w') as f:
-                    json.dump(financial_data, f, indent=4)
         
-        # Save consolidated data
-        consolidated_file = os.path.join(company_dir, "consolidated_financial_data.json")
-        with open(consolidated_file, 'w') as f:
-            json.dump(all_financial_data, f, indent=4)
+        try:
+            states = run_download_jobs(manifest, process_quarterly_filing, write_filing, progress=show_progress,
+                                       accessions=accessions)
+        finally:
+            # The consolidated view is an index over the JSONL records, not a second copy
+            output.close(manifest.outputs())
         
         # Show completion message and automatically close the window after 3 seconds
-        message = f"Financial data for {len(all_financial_data)} filings has been downloaded to {company_dir}"
+        message = f"Financial data for {states.get(PARSED, 0)} filings has been downloaded to {company_dir}"
+        failed = states.get(FAILED, 0)
+        if failed:
+            message += f"\n{failed} filings failed after every retry, see {company_dir} for details"
         progress_window.after(0, lambda: status_label.config(text=f"Download complete. Files saved to {company_dir}"))
         progress_window.after(0, lambda: messagebox.showinfo("Download Complete", message))
         # Automatically close progress window after showing the message
@@ -1273,55 +1018,23 @@ def test_search(search_term):
         print(f"Error retrieving company data: {str(e)}")
         return
     
-    matches = []
-    search_str = search_term.lower().strip()
-    
-    # Check if search string is numeric (potential CIK search)
-    is_cik_search = search_str.isdigit()
-    
-    # Loop through all companies in the data
-    # Structure is like: {"0": {"cik": 1234567, "ticker": "ABC", "title": "ABC Corp"}, "1": {...}, ...}
-    for key in companies_data:
-        company = companies_data[key]
-        
-        # Get company details based on the actual JSON structure
-        try:
-            cik_raw = str(company.get('cik', ''))
-            cik_padded = cik_raw.zfill(10)
-            ticker = company.get('ticker', '').lower()
-            title = company.get('title', '').lower()
-            
-            # Search by ticker (exact match takes priority)
-            if search_str == ticker:
-                matches.insert(0, (company.get('ticker', ''), company.get('title', ''), cik_padded))
-            # Search by CIK (if search is numeric)
-            elif is_cik_search and search_str in cik_raw:
-                matches.append((company.get('ticker', ''), company.get('title', ''), cik_padded))
-            # Search by ticker (partial match)
-            elif search_str in ticker:
-                matches.append((company.get('ticker', ''), company.get('title', ''), cik_padded))
-            # Search by company name (partial match)
-            elif search_str in title:
-                matches.append((company.get('ticker', ''), company.get('title', ''), cik_padded))
-        except Exception as e:
-            print(f"Error processing company {key}: {e}")
-            continue
-        
-        # Limit to top 50 matches to show
-        if len(matches) >= 50:
-            break
+    matches = find_companies(companies_data, search_term)
     
     # Print results
     print(f"Found {len(matches)} matches:")
     for i, (ticker, title, cik) in enumerate(matches, 1):
         print(f"{i}. {ticker} - {title} (CIK: {cik})")
 
-def get_company_facts(cik):
+def get_company_facts(cik, use_local_store=True):
     """
     Fetch all XBRL facts for a company using the SEC's companyfacts API
     
+    Views that walk the JSON use this, code that works on values should call
+    get_company_fact_table instead, which slices the store without building JSON.
+    
     Args:
         cik (str): Company CIK number (10 digits, zero-padded)
+        use_local_store (bool): Read from the memory-mapped universe store first if it exists
         
     Returns:
         dict: JSON response containing all company facts
@@ -1329,34 +1042,20 @@ def get_company_facts(cik):
     if isinstance(cik, str) and len(cik) != 10:
         cik = cik.zfill(10)
     
-    headers = {
-        'User-Agent': 'herstromresources@gmail.com',
-        'Accept': 'application/json, text/javascript, */*',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Connection': 'keep-alive',
-        'Host': 'data.sec.gov'
-    }
+    # Serve from the local universe store when one has been built
+    if use_local_store:
+        from universe_store import open_universe_store
+        store = open_universe_store()
+        if store is not None:
+            company_facts = store.company_facts(int(cik))
+            if company_facts:
+                print(f"Loaded company facts for CIK {cik} from local universe store")
+                return company_facts
     
-    url = f'https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json'
-    print(f"Fetching company facts: {url}")
+    from sec_client import get_client
     
-    try:
-        # Add delay before request to avoid rate limiting
-        add_delay()
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        
-        # Check response status
-        if response.status_code == 403:
-            print("SEC API access forbidden. This might be due to rate limiting or invalid headers.")
-            print("Response headers:", response.headers)
-            return None
-            
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching company facts: {e}")
-        return None
+    print(f"Fetching company facts for CIK {cik}")
+    return get_client().company_facts(cik)
 
 def get_company_concept(cik, taxonomy, concept):
     """
@@ -1370,40 +1069,13 @@ def get_company_concept(cik, taxonomy, concept):
     Returns:
         dict: JSON response containing the concept data
     """
-    if isinstance(cik, str) and len(cik) != 10:
-        cik = cik.zfill(10)
-    
-    headers = {
-        'User-Agent': 'herstromresources@gmail.com',
-        'Accept': 'application/json, text/javascript, */*',
-        'Accept-Language': 'en-US,en;q=0.5',
-        'Connection': 'keep-alive',
-        'Host': 'data.sec.gov'
-    }
-    
-    url = f'https://data.sec.gov/api/xbrl/companyconcept/CIK{cik}/{taxonomy}/{concept}.json'
-    print(f"Fetching concept data: {url}")
+    from sec_client import get_client
     
-    try:
-        # Add delay before request to avoid rate limiting
-        add_delay()
-        
-        response = requests.get(url, headers=headers, timeout=30)
-        
-        # Check response status
-        if response.status_code == 403:
-            print("SEC API access forbidden. This might be due to rate limiting or invalid headers.")
-            print("Response headers:", response.headers)
-            return None
-        elif response.status_code == 404:
-            print(f"Concept not found: {concept}")
-            return None
-            
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching concept data: {e}")
-        return None
+    print(f"Fetching concept data: {taxonomy}/{concept} for CIK {cik}")
+    data = get_client().company_concept(cik, taxonomy, concept)
+    if data is None:
+        print(f"Concept not found: {concept}")
+    return data
 
 def open_model_builder(root):
     """Open the model builder window"""
@@ -1541,6 +1213,10 @@ def open_model_builder(root):
                               command=lambda: export_model_to_excel(model_window))
     export_button.pack(side=tk.RIGHT, padx=10)
     
+    dcf_button = ttk.Button(export_frame, text="DCF Valuation", 
+                           command=lambda: run_dcf_valuation(root, model_window))
+    dcf_button.pack(side=tk.RIGHT, padx=10)
+    
     # Store model state in the window object
     model_window.concept_listbox = concept_listbox
     model_window.df_tree = df_tree
@@ -1662,7 +1338,10 @@ def generate_model(root, model_window, concept_listbox, start_year, end_year):
     
     try:
         # Extract data for the selected concepts in the date range
-        df = extract_concept_data_to_dataframe(root.company_facts, selected_concepts, start_year, end_year)
+        fact_table = get_company_fact_table(root.current_cik, root.company_facts)
+        if fact_table is None:
+            raise ValueError("No company facts available")
+        df = extract_concept_data_to_dataframe(fact_table, selected_concepts, start_year, end_year)
         
         # Display the DataFrame in the tree
         update_dataframe_display(model_window.df_tree, df)
@@ -1683,64 +1362,50 @@ def generate_model(root, model_window, concept_listbox, start_year, end_year):
         loading_label.destroy()
         messagebox.showerror("Error", f"Failed to generate model: {str(e)}")
 
-def extract_concept_data_to_dataframe(company_facts, selected_concepts, start_year, end_year):
-    """Extract data for selected concepts and convert to pandas DataFrame"""
-    import pandas as pd
-    
-    # Create a dictionary to store the data
-    # Structure: {concept: {year: value}}
-    data = {}
+def extract_concept_data_to_dataframe(fact_table, selected_concepts, start_year, end_year):
+    """
+    Extract data for selected concepts and convert to pandas DataFrame
     
-    facts = company_facts.get('facts', {})
+    Each (concept, year) cell takes the latest filed value of a period ending in that year,
+    USD values first when a concept is reported in several units.
     
-    for concept_full in selected_concepts:
-        # Split the concept into taxonomy and name
-        taxonomy, concept = concept_full.split(':')
-        
-        if taxonomy in facts and concept in facts[taxonomy]:
-            # Get the concept data
-            concept_data = facts[taxonomy][concept]
-            
-            # Initialize dictionary for this concept
-            concept_dict = {}
-            
-            # Get all units
-            for unit in concept_data.get('units', {}):
-                # Prefer USD for monetary values, otherwise take first unit
-                if unit == 'USD' or not concept_dict:
-                    for value in concept_data['units'][unit]:
-                        if 'end' in value and 'val' in value:
-                            try:
-                                year = int(value['end'][:4])
-                                if start_year <= year <= end_year:
-                                    # Handle duplicates by taking the most recent filing
-                                    # This could be enhanced with more sophisticated logic
-                                    if year not in concept_dict or value.get('filed', '') > concept_dict[year].get('filed', ''):
-                                        concept_dict[year] = value
-                            except:
-                                pass
-            
-            # Add to the data dictionary
-            if concept_dict:
-                data[concept_full] = {year: float(value['val']) if isinstance(value['val'], (int, float)) else value['val'] 
-                                    for year, value in concept_dict.items()}
+    Args:
+        fact_table (dict): Company fact table from get_company_fact_table
+        selected_concepts (list): "taxonomy:concept" names, the rows of the model
+        start_year, end_year (int): Inclusive year range, the columns of the model
+    """
+    import numpy as np
+    import pandas as pd
+    from fact_store import take_rows
     
-    # Create a pandas DataFrame from the data
-    # First, create a list of all years in the range
     years = list(range(start_year, end_year + 1))
-    
-    # Create the DataFrame
-    df = pd.DataFrame(index=selected_concepts, columns=years)
-    
-    # Fill the DataFrame with data
-    for concept in data:
-        for year in data[concept]:
-            df.loc[concept, year] = data[concept][year]
-    
-    return df
+    values = np.full((len(selected_concepts), len(years)), np.nan)
+    
+    keep = np.isin(fact_table['concept'], selected_concepts)
+    keep &= ~np.isnat(fact_table['end']) & ~np.isnan(fact_table['val'])
+    fact_years = fact_table['end'].astype('datetime64[Y]').astype('int64') + 1970
+    keep &= (fact_years >= start_year) & (fact_years <= end_year)
+    facts = take_rows(fact_table, keep)
+    fact_years = fact_years[keep]
+    
+    if len(facts['val']):
+        concept_names = np.asarray(selected_concepts, dtype=str)
+        concept_order = np.argsort(concept_names)
+        concept_index = concept_order[np.searchsorted(concept_names, facts['concept'].astype(str),
+                                                      sorter=concept_order)]
+        year_index = fact_years - start_year
+        # The winning row of each cell sorts last
+        order = np.lexsort((facts['filed'], facts['unit'] == 'USD', year_index, concept_index))
+        cell = (concept_index * len(years) + year_index)[order]
+        last = np.append(cell[1:] != cell[:-1], True)
+        values.reshape(-1)[cell[last]] = facts['val'][order][last]
+    
+    return pd.DataFrame(values, index=selected_concepts, columns=years)
 
 def update_dataframe_display(tree, df):
     """Update the treeview with DataFrame data"""
+    import pandas as pd
+    
     # Clear the tree
     tree.delete(*tree.get_children())
     
@@ -1800,6 +1465,48 @@ def export_model_to_excel(model_window):
     except Exception as e:
         messagebox.showerror("Error", f"Failed to export model: {str(e)}")
 
+def run_dcf_valuation(root, model_window):
+    """Run the Monte Carlo DCF on the loaded company facts and show the distribution"""
+    if not root.company_facts:
+        messagebox.showerror("Error", "Please select a company and load XBRL data first")
+        return
+    
+    price = simpledialog.askfloat("DCF Valuation", "Current share price (optional):", 
+                                  parent=model_window, minvalue=0.0)
+    
+    loading_label = ttk.Label(model_window, text="Running DCF scenarios...")
+    loading_label.pack(side=tk.BOTTOM, fill=tk.X)
+    
+    def dcf_thread():
+        try:
+            from dcf import cash_flow_inputs_from_table, value_inputs
+            fact_table = get_company_fact_table(root.current_cik, root.company_facts)
+            result = None
+            if fact_table is not None:
+                inputs = cash_flow_inputs_from_table(fact_table, root.company_facts.get('entityName', ''),
+                                                     cik=int(root.current_cik))
+                result = value_inputs(inputs)
+            summary = result.summary(price) if result else "Not enough cash flow or share data, or negative free cash flow, for a DCF"
+            model_window.after(0, lambda: show_dcf_result(model_window, summary))
+        except Exception as e:
+            error_msg = f"Failed to run DCF: {str(e)}"
+            model_window.after(0, lambda: messagebox.showerror("Error", error_msg))
+        finally:
+            model_window.after(0, loading_label.destroy)
+    
+    threading.Thread(target=dcf_thread).start()
+
+def show_dcf_result(model_window, summary):
+    """Show the DCF summary in its own window"""
+    result_window = tk.Toplevel(model_window)
+    result_window.title("DCF Valuation")
+    result_window.geometry("600x300")
+    
+    text = scrolledtext.ScrolledText(result_window, font=("Courier", 10))
+    text.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+    text.insert(tk.END, summary)
+    text.config(state=tk.DISABLED)
+
 # def suggest_relevant_concepts(root):
 #     """Use Google Gemini API to suggest relevant concepts for a DCF model"""
 #     import json
@@ -0,0 +1,371 @@
+"""
+Local full-text search over extracted filing sections
+An on-disk inverted index in SQLite: one postings row per (term, section) holding the term
+frequency and delta-encoded positions, ranked with BM25. Quoted phrases are matched
+through the positions. New sections are added incrementally, nothing is ever rebuilt and
+queries need no network access.
+"""
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+from collections import Counter, defaultdict
+
+import numpy as np
+
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sec_client.transport import CACHE_DIR
+
+DEFAULT_INDEX_PATH = os.path.join(CACHE_DIR, 'sections_index.sqlite3')
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_QUERY = re.compile(r'"([^"]+)"|(\S+)')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    doc_id INTEGER PRIMARY KEY,
+    accession TEXT NOT NULL,
+    item TEXT NOT NULL,
+    cik INTEGER,
+    form TEXT,
+    period TEXT,
+    length INTEGER,
+    UNIQUE (accession, item)
+);
+CREATE INDEX IF NOT EXISTS documents_cik ON documents (cik, form, period);
+CREATE TABLE IF NOT EXISTS terms (
+    term_id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE,
+    df INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    positions BLOB NOT NULL,
+    PRIMARY KEY (term_id, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+CREATE TABLE IF NOT EXISTS stats (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+def tokenize(text):
+    """Lowercase word tokens, positions are their index in this list"""
+    return _TOKEN.findall(text.lower())
+
+def _encode_positions(positions):
+    return np.diff(np.asarray(positions, dtype='uint32'), prepend=np.uint32(0)).tobytes()
+
+def _decode_positions(blob):
+    return np.cumsum(np.frombuffer(blob, dtype='uint32'), dtype='int64')
+
+def parse_query(query):
+    """
+    Split a query into quoted phrases and loose terms
+
+    Returns:
+        tuple: (phrases as token lists, loose terms)
+    """
+    phrases, terms = [], []
+    for phrase, word in _QUERY.findall(query):
+        if phrase:
+            tokens = tokenize(phrase)
+            if len(tokens) > 1:
+                phrases.append(tokens)
+            else:
+                terms.extend(tokens)
+        else:
+            terms.extend(tokenize(word))
+    return phrases, terms
+
+class SearchIndex:
+    """
+    Inverted index of filing sections keyed by accession and item
+
+    Usage:
+        index = SearchIndex()
+        index.add_section('0000320193-23-000106', '1A', text, cik=320193, form='10-K', period='2023-09-30')
+        hits = index.search('"going concern" liquidity', form='10-K')
+    """
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
+    def close(self):
+        self.conn.close()
+
+    def _stat(self, key):
+        row = self.conn.execute("SELECT value FROM stats WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def _add_stat(self, key, delta):
+        self.conn.execute("INSERT INTO stats (key, value) VALUES (?, ?) "
+                          "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value", (key, delta))
+
+    def has_section(self, accession, item):
+        return self.conn.execute("SELECT 1 FROM documents WHERE accession = ? AND item = ?",
+                                 (accession, item)).fetchone() is not None
+
+    def remove_section(self, accession, item):
+        row = self.conn.execute("SELECT doc_id, length FROM documents WHERE accession = ? AND item = ?",
+                                (accession, item)).fetchone()
+        if row is None:
+            return
+        doc_id, length = row
+        self.conn.execute("UPDATE terms SET df = df - 1 WHERE term_id IN "
+                          "(SELECT term_id FROM postings WHERE doc_id = ?)", (doc_id,))
+        # Terms only this section used would otherwise stay behind with df 0
+        self.conn.execute("DELETE FROM terms WHERE df <= 0 AND term_id IN "
+                          "(SELECT term_id FROM postings WHERE doc_id = ?)", (doc_id,))
+        self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+        self.conn.execute("DELETE FROM documents WHERE doc_id = ?", (doc_id,))
+        self._add_stat('documents', -1)
+        self._add_stat('tokens', -length)
+
+    def add_section(self, accession, item, text, cik=None, form='', period='', replace=False, commit=True):
+        """
+        Index one section, skipped when it is already indexed unless replace is set
+
+        Returns:
+            bool: True when the section was indexed
+        """
+        if self.has_section(accession, item):
+            if not replace:
+                return False
+            self.remove_section(accession, item)
+
+        tokens = tokenize(text)
+        positions = defaultdict(list)
+        for position, token in enumerate(tokens):
+            positions[token].append(position)
+
+        cursor = self.conn.execute(
+            "INSERT INTO documents (accession, item, cik, form, period, length) VALUES (?, ?, ?, ?, ?, ?)",
+            (accession, item, int(cik) if cik is not None else None, form, period or '', len(tokens)))
+        doc_id = cursor.lastrowid
+
+        terms = list(positions)
+        self.conn.executemany("INSERT INTO terms (term, df) VALUES (?, 1) "
+                              "ON CONFLICT(term) DO UPDATE SET df = df + 1", [(term,) for term in terms])
+        term_ids = self._term_ids(terms)
+        self.conn.executemany(
+            "INSERT INTO postings (term_id, doc_id, tf, positions) VALUES (?, ?, ?, ?)",
+            [(term_ids[term], doc_id, len(positions[term]), _encode_positions(positions[term])) for term in terms])
+        self._add_stat('documents', 1)
+        self._add_stat('tokens', len(tokens))
+        if commit:
+            self.conn.commit()
+        return True
+
+    def _term_ids(self, terms):
+        ids = {}
+        # Stay under SQLite's bound parameter limit
+        for i in range(0, len(terms), 900):
+            chunk = terms[i:i + 900]
+            placeholders = ','.join('?' * len(chunk))
+            ids.update(self.conn.execute(
+                f"SELECT term, term_id FROM terms WHERE term IN ({placeholders})", chunk).fetchall())
+        return ids
+
+    def add_record(self, record, replace=False):
+        """Index every section of a cached section_extractor record"""
+        added = 0
+        for item, text in record.get('sections', {}).items():
+            added += self.add_section(record['accession'], item, text, record.get('cik'), record.get('form', ''),
+                                      record.get('report_date', ''), replace=replace, commit=False)
+        self.conn.commit()
+        return added
+
+    def index_section_cache(self, cache_dir=None):
+        """
+        Add every cached section that is not indexed yet
+
+        Returns:
+            int: Number of sections added
+        """
+        from section_extractor import SECTION_CACHE_DIR
+        cache_dir = cache_dir or SECTION_CACHE_DIR
+        if not os.path.isdir(cache_dir):
+            return 0
+        indexed = {row[0] for row in self.conn.execute("SELECT DISTINCT accession FROM documents")}
+        added = 0
+        for name in sorted(os.listdir(cache_dir)):
+            if not name.endswith('.json') or name[:-5] in indexed:
+                continue
+            try:
+                with open(os.path.join(cache_dir, name), 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Skipping {name}: {e}")
+                continue
+            added += self.add_record(record)
+        return added
+
+    def _postings(self, term, filters, params, positions=True):
+        """(doc_id, tf, positions, length) rows, positions is None unless asked for"""
+        columns = "p.positions" if positions else "NULL"
+        return self.conn.execute(
+            f"SELECT p.doc_id, p.tf, {columns}, d.length FROM postings p "
+            "JOIN terms t ON t.term_id = p.term_id JOIN documents d ON d.doc_id = p.doc_id "
+            f"WHERE t.term = ?{filters}", [term] + params).fetchall()
+
+    def _document_frequencies(self, terms):
+        """term -> number of indexed sections containing it, over the whole index"""
+        terms = list(set(terms))
+        placeholders = ','.join('?' * len(terms))
+        return dict(self.conn.execute(f"SELECT term, df FROM terms WHERE term IN ({placeholders})", terms).fetchall())
+
+    def search(self, query, limit=10, cik=None, form=None, start=None, end=None):
+        """
+        BM25 ranked search
+
+        Quoted phrases must appear exactly, loose terms add to the score.
+
+        Args:
+            query (str): e.g. '"going concern" liquidity'
+            limit (int): Number of hits to return
+            cik (int, optional): Only this company
+            form (str, optional): Only this form type
+            start, end (str, optional): Period of report range, inclusive
+
+        Returns:
+            list: Hit dicts (accession, item, cik, form, period, score) best first
+        """
+        phrases, terms = parse_query(query)
+        if not phrases and not terms:
+            return []
+
+        filters, params = '', []
+        for clause, value in ((' AND d.cik = ?', int(cik) if cik is not None else None),
+                              (' AND d.form = ?', form), (' AND d.period >= ?', start), (' AND d.period <= ?', end)):
+            if value is not None:
+                filters += clause
+                params.append(value)
+
+        n_docs = max(self._stat('documents'), 1)
+        avg_length = self._stat('tokens') / n_docs or 1.0
+        # idf comes from the whole index so filters narrow the hits without changing their ranking
+        document_frequencies = self._document_frequencies([term for phrase in phrases for term in phrase] + terms)
+        scores = Counter()
+
+        def score_term(rows, term):
+            df = document_frequencies.get(term, 0)
+            idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for doc_id, tf, _, length in rows:
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length))
+
+        required = None
+        for phrase in phrases:
+            postings = [{row[0]: row for row in self._postings(term, filters, params)} for term in phrase]
+            candidates = set.intersection(*(set(p) for p in postings))
+            matched = set()
+            for doc_id in candidates:
+                # Positions of the first word shifted so every word lines up at the phrase start
+                starts = _decode_positions(postings[0][doc_id][2])
+                for offset, term_postings in enumerate(postings[1:], 1):
+                    starts = np.intersect1d(starts, _decode_positions(term_postings[doc_id][2]) - offset,
+                                            assume_unique=True)
+                    if not len(starts):
+                        break
+                if len(starts):
+                    matched.add(doc_id)
+            required = matched if required is None else required & matched
+            for term, term_postings in zip(phrase, postings):
+                score_term([row for doc_id, row in term_postings.items() if doc_id in matched], term)
+
+        for term in terms:
+            # Loose terms are scored from tf alone, their positions are never read
+            score_term(self._postings(term, filters, params, positions=False), term)
+
+        if required is not None:
+            scores = Counter({doc_id: score for doc_id, score in scores.items() if doc_id in required})
+        best = scores.most_common(limit)
+        if not best:
+            return []
+
+        placeholders = ','.join('?' * len(best))
+        documents = {row[0]: row for row in self.conn.execute(
+            f"SELECT doc_id, accession, item, cik, form, period FROM documents WHERE doc_id IN ({placeholders})",
+            [doc_id for doc_id, _ in best])}
+        return [
+            {
+                'accession': documents[doc_id][1],
+                'item': documents[doc_id][2],
+                'cik': documents[doc_id][3],
+                'form': documents[doc_id][4],
+                'period': documents[doc_id][5],
+                'score': score,
+            }
+            for doc_id, score in best
+        ]
+
+def snippet(hit, query, width=160):
+    """Text around the first match of a hit, read from the section cache"""
+    from section_extractor import load_cached_sections
+    record = load_cached_sections(hit['accession'])
+    text = (record or {}).get('sections', {}).get(hit['item'], '')
+    if not text:
+        return ''
+    phrases, terms = parse_query(query)
+    needles = [' '.join(phrase) for phrase in phrases] + terms
+    lower = text.lower()
+    found = [lower.find(needle) for needle in needles if needle]
+    found = [position for position in found if position >= 0]
+    start = max(0, min(found) - width // 3) if found else 0
+    return ' '.join(text[start:start + width].split())
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Full-text search over extracted filing sections")
+    parser.add_argument('--db', default=DEFAULT_INDEX_PATH, help="Index file")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build = subparsers.add_parser('build', help="Index cached sections that are not indexed yet")
+    build.add_argument('--sections', default=None, help="Section cache directory")
+
+    query_parser = subparsers.add_parser('query', help="Search the index")
+    query_parser.add_argument('query', help='Terms and "quoted phrases"')
+    query_parser.add_argument('--cik', type=int, default=None)
+    query_parser.add_argument('--form', default=None)
+    query_parser.add_argument('--from', dest='start', default=None, help="First period of report")
+    query_parser.add_argument('--to', dest='end', default=None, help="Last period of report")
+    query_parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    index = SearchIndex(args.db)
+    if args.command == 'build':
+        start_time = time.time()
+        added = index.index_section_cache(args.sections)
+        print(f"Indexed {added} new sections in {time.time() - start_time:.1f}s "
+              f"({index._stat('documents')} sections total)")
+    else:
+        start_time = time.time()
+        hits = index.search(args.query, args.limit, args.cik, args.form, args.start, args.end)
+        elapsed = (time.time() - start_time) * 1000
+        print(f"{len(hits)} hits in {elapsed:.1f} ms")
+        for hit in hits:
+            print(f"{hit['score']:7.2f}  CIK {hit['cik']:<10} {hit['form']:<6} {hit['period']:<10} "
+                  f"{hit['accession']} Item {hit['item']}")
+            text = snippet(hit, args.query)
+            if text:
+                print(f"         {text}")
+    index.close()
@@ -0,0 +1,313 @@
+"""
+10-K / 10-Q Item section extractor
+Streams a filing's primary HTML document through a small tokenizer state machine that
+turns it into text blocks and spots "PART"/"Item" headings as the blocks are closed, so
+the document is read once and never held as HTML. Sections are cached per accession,
+which makes pulling Risk Factors and MD&A for hundreds of filings a single batch job.
+"""
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sec_client.transport import CACHE_DIR
+from filing_documents import filing_base_url, find_primary_document, get_filing_index, stream_document_lines
+
+SECTION_CACHE_DIR = os.path.join(CACHE_DIR, 'sections')
+
+# Standard Item structure, see common_elements.txt
+ITEMS_10K = {
+    '1': 'Business',
+    '1A': 'Risk Factors',
+    '1B': 'Unresolved Staff Comments',
+    '1C': 'Cybersecurity',
+    '2': 'Properties',
+    '3': 'Legal Proceedings',
+    '4': 'Mine Safety Disclosures',
+    '5': 'Market for Registrant\'s Common Equity',
+    '6': '[Reserved]',
+    '7': 'Management\'s Discussion and Analysis',
+    '7A': 'Quantitative and Qualitative Disclosures about Market Risk',
+    '8': 'Financial Statements and Supplementary Data',
+    '9': 'Changes in and Disagreements with Accountants',
+    '9A': 'Controls and Procedures',
+    '9B': 'Other Information',
+    '9C': 'Disclosure Regarding Foreign Jurisdictions that Prevent Inspections',
+    '10': 'Directors, Executive Officers and Corporate Governance',
+    '11': 'Executive Compensation',
+    '12': 'Security Ownership',
+    '13': 'Certain Relationships and Related Transactions',
+    '14': 'Principal Accountant Fees and Services',
+    '15': 'Exhibits and Financial Statement Schedules',
+    '16': 'Form 10-K Summary',
+}
+
+# 10-Q item numbers repeat between Part I and Part II, so they are keyed with the part
+ITEMS_10Q = {
+    'I-1': 'Financial Statements',
+    'I-2': 'Management\'s Discussion and Analysis',
+    'I-3': 'Quantitative and Qualitative Disclosures about Market Risk',
+    'I-4': 'Controls and Procedures',
+    'II-1': 'Legal Proceedings',
+    'II-1A': 'Risk Factors',
+    'II-2': 'Unregistered Sales of Equity Securities and Use of Proceeds',
+    'II-3': 'Defaults Upon Senior Securities',
+    'II-4': 'Mine Safety Disclosures',
+    'II-5': 'Other Information',
+    'II-6': 'Exhibits',
+}
+
+# Friendly names for the sections people ask for most
+SECTION_ALIASES = {
+    'business': {'10-K': '1'},
+    'risk_factors': {'10-K': '1A', '10-Q': 'II-1A'},
+    'mdna': {'10-K': '7', '10-Q': 'I-2'},
+    'market_risk': {'10-K': '7A', '10-Q': 'I-3'},
+    'financial_statements': {'10-K': '8', '10-Q': 'I-1'},
+    'legal_proceedings': {'10-K': '3', '10-Q': 'II-1'},
+    'controls': {'10-K': '9A', '10-Q': 'I-4'},
+}
+
+# Tags that end a block of text
+_BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'li', 'table', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'section', 'center'}
+# Tags whose content is never visible text (ix:header holds the hidden XBRL contexts)
+_SKIP_TAGS = {'script', 'style', 'head', 'title', 'ix:header'}
+
+_HEADING = re.compile(
+    r'^(?:part\s+(?P<part>iv|i{1,3})\b[\s.,:\-–—]*)?item\s*(?P<number>\d{1,2})\s*(?P<letter>[a-c])?\b',
+    re.I)
+_PART = re.compile(r'^part\s+(iv|i{1,3})\b', re.I)
+_SPACE = re.compile(r'\s+')
+
+def _base_form(form):
+    return '10-Q' if form and form.upper().startswith('10-Q') else '10-K'
+
+def resolve_item(name, form='10-K'):
+    """Map an alias ('mdna') or plain item ('7A', 'II-1A') to the item key for a form"""
+    alias = SECTION_ALIASES.get(name.lower())
+    if alias:
+        return alias.get(_base_form(form))
+    return name.upper()
+
+class _ItemScanner(HTMLParser):
+    """
+    Streaming tokenizer: collects visible text into blocks and records Item headings
+
+    States are just the skip depth (inside script/style/ix:header) and the block being
+    built. Each closed block is tested once against a compiled heading pattern.
+    """
+    def __init__(self, form):
+        super().__init__(convert_charrefs=True)
+        self.quarterly = _base_form(form) == '10-Q'
+        self.blocks = []
+        self.headings = []   # (item key or None for a part heading, block index)
+        self.current = []
+        self.skip_depth = 0
+        self.part = 'I'
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in _BLOCK_TAGS:
+            self.close_block()
+        elif tag == 'td':
+            self.current.append(' ')
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in _BLOCK_TAGS:
+            self.close_block()
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in _BLOCK_TAGS:
+            self.close_block()
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.current.append(data)
+
+    def close_block(self):
+        if not self.current:
+            return
+        text = _SPACE.sub(' ', ''.join(self.current)).strip()
+        self.current = []
+        if not text:
+            return
+
+        part = _PART.match(text)
+        if part:
+            self.part = part.group(1).upper()
+            # A part heading closes the previous item without starting a new one
+            self.headings.append((None, len(self.blocks)))
+        heading = _HEADING.match(text) if text[:1] in 'IiPp' else None
+        if heading:
+            if heading.group('part'):
+                self.part = heading.group('part').upper()
+                self.headings.pop()
+            key = heading.group('number') + (heading.group('letter') or '').upper()
+            if self.quarterly:
+                key = f"{self.part}-{key}"
+            self.headings.append((key, len(self.blocks)))
+        self.blocks.append(text)
+
+    def close(self):
+        super().close()
+        self.close_block()
+
+def split_sections(blocks, headings):
+    """
+    Cut the block list at the headings
+
+    The table of contents repeats every heading with almost no text under it, so when an
+    item appears more than once the longest section wins.
+
+    Returns:
+        dict: item key -> section text
+    """
+    sections = {}
+    bounds = headings + [(None, len(blocks))]
+    for (key, start), (_, end) in zip(bounds[:-1], bounds[1:]):
+        if key is None:
+            continue
+        text = '\n'.join(blocks[start:end])
+        if len(text) > len(sections.get(key, '')):
+            sections[key] = text
+    return sections
+
+def scan_document(lines, form='10-K'):
+    """
+    Extract every Item section from an iterable of HTML lines
+
+    Returns:
+        dict: item key -> section text
+    """
+    scanner = _ItemScanner(form)
+    for line in lines:
+        scanner.feed(line)
+        scanner.feed('\n')
+    scanner.close()
+    return split_sections(scanner.blocks, scanner.headings)
+
+def _cache_path(accession):
+    return os.path.join(SECTION_CACHE_DIR, f"{accession}.json")
+
+def load_cached_sections(accession):
+    try:
+        with open(_cache_path(accession), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def save_cached_sections(record):
+    os.makedirs(SECTION_CACHE_DIR, exist_ok=True)
+    path = _cache_path(record['accession'])
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(record, f)
+    os.replace(tmp_path, path)
+
+def extract_sections(cik, accession, form='10-K', primary_document=None, items=None, use_cache=True,
+                     report_date=None):
+    """
+    Item sections of one filing, from the cache or by streaming the primary document
+
+    Args:
+        cik (int or str): Company CIK
+        accession (str): Accession number with dashes
+        form (str): '10-K' or '10-Q' (amendments are treated like the base form)
+        primary_document (str, optional): File name from submissions, found from index.json otherwise
+        items (list, optional): Item keys or aliases to return, all sections by default
+        use_cache (bool): Read and write the per-accession cache
+        report_date (str, optional): Period of report, kept in the cache for the search index
+
+    Returns:
+        dict: item key -> section text, or None when the document could not be read
+    """
+    record = load_cached_sections(accession) if use_cache else None
+    if record is None:
+        if not primary_document:
+            primary_document = find_primary_document(get_filing_index(cik, accession))
+            if not primary_document:
+                print(f"No primary document found for {accession}")
+                return None
+        url = f"{filing_base_url(cik, accession)}/{primary_document}"
+        print(f"Extracting sections from {url}")
+        try:
+            sections = scan_document(stream_document_lines(url), form)
+        except Exception as e:
+            print(f"Error extracting sections from {url}: {e}")
+            return None
+        record = {'cik': int(cik), 'accession': accession, 'form': form,
+                  'primary_document': primary_document, 'report_date': report_date or '',
+                  'sections': sections}
+        if use_cache:
+            save_cached_sections(record)
+
+    sections = record['sections']
+    if items:
+        keys = [resolve_item(item, form) for item in items]
+        sections = {key: sections[key] for key in keys if key in sections}
+    return sections
+
+def extract_many(filings, items=None, max_workers=8, use_cache=True):
+    """
+    Extract sections for many filings concurrently
+
+    Args:
+        filings (list): Dicts with cik, accession, form and optionally primary_document, report_date
+        items (list, optional): Item keys or aliases to keep
+
+    Returns:
+        dict: accession -> {item key: text}, filings that failed are left out
+    """
+    def extract(filing):
+        return filing['accession'], extract_sections(
+            filing['cik'], filing['accession'], filing.get('form', '10-K'),
+            filing.get('primary_document'), items, use_cache, filing.get('report_date'))
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for accession, sections in executor.map(extract, filings):
+            if sections is not None:
+                results[accession] = sections
+    return results
+
+if __name__ == "__main__":
+    import argparse
+    import csv
+
+    parser = argparse.ArgumentParser(description="Extract Item sections from 10-K/10-Q filings")
+    parser.add_argument('--cik', help="Company CIK for a single filing")
+    parser.add_argument('--accession', help="Accession number for a single filing")
+    parser.add_argument('--form', default='10-K')
+    parser.add_argument('--filings', help="CSV with cik, accession, form and optional primary_document, report_date columns")
+    parser.add_argument('--items', nargs='+', default=None, help="Items or aliases, e.g. 1A 7 or risk_factors mdna")
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--out', default=None, help="Write the sections as JSON")
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    if args.filings:
+        with open(args.filings, newline='') as f:
+            filings = [row for row in csv.DictReader(f)]
+    elif args.cik and args.accession:
+        filings = [{'cik': args.cik, 'accession': args.accession, 'form': args.form}]
+    else:
+        parser.error("give --cik and --accession, or --filings")
+
+    results = extract_many(filings, args.items, args.workers, not args.no_cache)
+    for accession, sections in results.items():
+        print(f"\n{accession}")
+        for key, text in sections.items():
+            print(f"  Item {key:<6} {len(text):>9,} chars  {text[:70]!r}")
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(results, f)
+        print(f"Saved sections to {args.out}")
@@ -0,0 +1,388 @@
+"""
+Local HTTP API over the shared SEC client
+One process serves a whole team: every endpoint goes through the same sec_client rate
+limiter, on-disk cache and in-memory LRU, so 20 analysts share one SEC request budget and
+one warm cache. Identical requests that arrive together are answered by a single
+computation, and recent answers are kept in memory.
+
+Endpoints (GET, JSON by default, format=arrow returns tabular results as an Arrow IPC stream):
+    /search?q=apple&limit=20
+    /filings?cik=320193&forms=10-K,10-Q&start=2020-01-01&end=2024-12-31&limit=100
+    /concept?cik=320193&taxonomy=us-gaap&concept=Revenues&unit=USD
+    /panel?ciks=320193,789019&concepts=us-gaap:Revenues,us-gaap:NetIncomeLoss&start=2018&end=2023
+    /frame?taxonomy=us-gaap&concept=Revenues&unit=USD&period=CY2023
+    /holdings?cik=1067983&accession=0000950123-24-002518
+    /holdings/diff?cik=1067983&before=<accession>&after=<accession>
+    /status
+
+Usage:
+    python service.py --port 8750
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRAPER_DIR = os.path.join(ROOT, '13f')
+
+# Make the shared sec_client package and the 13F parser importable when run as a script
+sys.path.insert(0, ROOT)
+sys.path.insert(1, SCRAPER_DIR)
+
+from sec_client import get_client
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8750
+
+# How long a computed answer is served from memory, in seconds (None: filed data never changes)
+SEARCH_MAX_AGE = 3600
+FILINGS_MAX_AGE = 600
+FACTS_MAX_AGE = 3600
+
+ARROW_TYPE = 'application/vnd.apache.arrow.stream'
+
+class ResultCache:
+    """
+    Computed responses by request key
+
+    Concurrent requests for one key wait for the first computation instead of repeating it,
+    the same way SECClient coalesces fetches of one URL.
+
+    Args:
+        max_items (int): Responses kept in memory, least recently used dropped first
+    """
+    def __init__(self, max_items=256):
+        self.max_items = max_items
+        self.hits = 0
+        self.coalesced = 0
+        self.computed = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _remembered(self, key, max_age):
+        hit = self._memory.get(key)
+        if hit is not None and (max_age is None or time.time() - hit[0] <= max_age):
+            self._memory.move_to_end(key)
+            return hit[1]
+        return None
+
+    def get(self, key, max_age, compute):
+        """Remembered response for key, or compute() shared by everyone asking at once"""
+        with self._lock:
+            response = self._remembered(key, max_age)
+            if response is not None:
+                self.hits += 1
+                return response
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                response = self._remembered(key, max_age)
+                if response is not None:
+                    self.coalesced += 1
+                    return response
+            try:
+                response = compute()
+            except Exception:
+                # Errors are not remembered, the next request tries again
+                with self._lock:
+                    self._key_locks.pop(key, None)
+                raise
+            with self._lock:
+                self.computed += 1
+                self._memory[key] = (time.time(), response)
+                while len(self._memory) > self.max_items:
+                    self._memory.popitem(last=False)
+                self._key_locks.pop(key, None)
+        return response
+
+    def stats(self):
+        with self._lock:
+            return {'items': len(self._memory), 'hits': self.hits,
+                    'coalesced': self.coalesced, 'computed': self.computed}
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+def _fetched(data, what):
+    """SEC data a handler cannot answer without, a failed fetch is a 502 and not a 404"""
+    if data is None:
+        raise ServiceError(502, f"Could not fetch {what} from the SEC")
+    return data
+
+def _param(params, name, default=None, required=False):
+    values = params.get(name)
+    if not values or not values[0].strip():
+        if required:
+            raise ValueError(f"Missing parameter: {name}")
+        return default
+    return values[0].strip()
+
+def _list_param(params, name, required=False):
+    value = _param(params, name, required=required)
+    return [item.strip() for item in value.split(',') if item.strip()] if value else None
+
+def _int_param(params, name, default=None, required=False):
+    value = _param(params, name, required=required)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Parameter {name} must be an integer")
+
+def _to_list(values):
+    """numpy column -> JSON-safe list (NaN and NaT become null)"""
+    values = np.asarray(values)
+    if values.dtype.kind == 'M':
+        return [None if text == 'NaT' else text for text in np.datetime_as_string(values, unit='D').tolist()]
+    if values.dtype.kind == 'f':
+        return [None if value != value else value for value in values.tolist()]
+    return values.tolist()
+
+def _table(columns):
+    """Column name -> array-like, as JSON-safe lists"""
+    return {name: _to_list(values) for name, values in columns.items()}
+
+def _rows_to_table(rows, fields):
+    return {field: [row.get(field) for row in rows] for field in fields}
+
+def search(params):
+    """Companies matching a ticker, name or CIK"""
+    from retriever import find_companies
+
+    query = _param(params, 'q', required=True)
+    companies = _fetched(get_client().company_tickers(), "company tickers")
+    matches = find_companies(companies, query, _int_param(params, 'limit', 50))
+    return {'query': query, 'table': {
+        'ticker': [ticker for ticker, _, _ in matches],
+        'title': [title for _, title, _ in matches],
+        'cik': [cik for _, _, cik in matches],
+    }}
+
+def filings(params):
+    """A company's filings from its full history, filtered by form type and acceptance date"""
+    from sec_client import FilingIndex, load_filing_history
+
+    cik = _param(params, 'cik', required=True)
+    history = _fetched(load_filing_history(cik), "filing history")
+    index = FilingIndex(history, cik)
+    rows = index.select(_list_param(params, 'forms'), _param(params, 'start'), _param(params, 'end'))
+    rows = rows[:_int_param(params, 'limit', len(rows))]
+    return {'cik': index.cik, 'table': {
+        'accession': _to_list(index.accession[rows]),
+        'form': _to_list(index.forms[rows]),
+        'accepted': _to_list(index.acceptance_day[rows]),
+        'filing_date': _to_list(index.filing_date[rows]),
+        'report_date': _to_list(index.report_date[rows]),
+        'primary_document': _to_list(index.primary_document[rows]),
+        'description': _to_list(index.description[rows]),
+        'link': [index.link(row) for row in rows],
+    }}
+
+def concept(params):
+    """Every reported value of one concept for one company, in one unit"""
+    cik = _param(params, 'cik', required=True)
+    taxonomy = _param(params, 'taxonomy', 'us-gaap')
+    name = _param(params, 'concept', required=True)
+    data = _fetched(get_client().company_concept(cik, taxonomy, name), "company concept")
+    units = data.get('units', {})
+    unit = _param(params, 'unit') or next(iter(units), None)
+    if unit not in units:
+        raise ValueError(f"Unit {unit} not reported, available: {', '.join(units)}")
+    fields = ['end', 'val', 'accn', 'fy', 'fp', 'form', 'filed', 'frame', 'start']
+    return {'cik': str(int(cik)).zfill(10), 'taxonomy': taxonomy, 'concept': name,
+            'label': data.get('label'), 'unit': unit, 'units': list(units),
+            'table': _rows_to_table(units[unit], fields)}
+
+def panel(params):
+    """companies x concepts x years panel in long format"""
+    from panel_builder import build_panel
+
+    ciks = _list_param(params, 'ciks')
+    result = build_panel(
+        ciks=[int(cik) for cik in ciks] if ciks else None,
+        concepts=_list_param(params, 'concepts', required=True),
+        start_year=_int_param(params, 'start', required=True),
+        end_year=_int_param(params, 'end', required=True),
+        sic=_int_param(params, 'sic'),
+        as_of=_param(params, 'as_of'),
+    )
+    frame = result.to_dataframe()
+    return {'shape': list(result.shape), 'filled': int(result.mask.sum()),
+            'table': _table({name: frame[name].to_numpy() for name in frame.columns})}
+
+def frame(params):
+    """One concept for every filer in one period"""
+    from frames import get_frame
+
+    columns = _fetched(get_frame(
+        _param(params, 'taxonomy', 'us-gaap'),
+        _param(params, 'concept', required=True),
+        _param(params, 'unit', 'USD'),
+        _param(params, 'period', required=True),
+        source=_param(params, 'source', 'auto'),
+    ), "frame")
+    return {'table': _table(columns)}
+
+def _holdings(params, name):
+    from filing_processor import fetch_holdings, find_info_table
+
+    cik = _param(params, 'cik', required=True)
+    accession = _param(params, name, required=True)
+    _fetched(get_client().filing_index(cik, accession), f"filing index of {accession}")
+    table = fetch_holdings(cik, accession, _param(params, 'date', ''))
+    # None is only "not found" when the filing has no information table, the index is held in memory
+    if table is None and find_info_table(cik, accession) is not None:
+        raise ServiceError(502, f"Could not fetch information table of {accession} from the SEC")
+    return table
+
+def holdings(params):
+    """Information table of one 13F filing"""
+    table = _holdings(params, 'accession')
+    if table is None:
+        return None
+    size = len(table)
+    return {'accession': _param(params, 'accession'), 'table': _table(
+        {name: values[:size] for name, values in table.columns.items()})}
+
+def holdings_diff(params):
+    """Position changes between two 13F filings of one filer"""
+    from filing_processor import diff_holdings
+
+    before = _holdings(params, 'before')
+    after = _holdings(params, 'after')
+    if before is None or after is None:
+        return None
+    changes = diff_holdings(before, after)
+    fields = ['cusip', 'name', 'shares_before', 'shares_after', 'value_before', 'value_after', 'change']
+    return {'before': _param(params, 'before'), 'after': _param(params, 'after'),
+            'table': _rows_to_table(changes, fields)}
+
+# path -> (handler, seconds its answers are reused)
+ROUTES = {
+    '/search': (search, SEARCH_MAX_AGE),
+    '/filings': (filings, FILINGS_MAX_AGE),
+    '/concept': (concept, FACTS_MAX_AGE),
+    '/panel': (panel, FACTS_MAX_AGE),
+    '/frame': (frame, FACTS_MAX_AGE),
+    '/holdings': (holdings, None),
+    '/holdings/diff': (holdings_diff, None),
+}
+
+def _arrow_stream(table):
+    """Columns as an Arrow IPC stream, needs pyarrow, which is optional"""
+    import pyarrow as pa
+
+    table = pa.table(table)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def _json_body(payload):
+    return json.dumps(payload, allow_nan=False).encode('utf-8')
+
+class SECService:
+    """Routes requests to the endpoint handlers through one shared ResultCache"""
+    def __init__(self, max_items=256):
+        self.cache = ResultCache(max_items)
+        self.started = time.time()
+
+    def status(self):
+        return {'uptime': round(time.time() - self.started, 1), 'cache': self.cache.stats()}
+
+    def respond(self, path, params):
+        """
+        Returns:
+            tuple: (HTTP status, content type, body bytes)
+        """
+        if path == '/status':
+            return 200, 'application/json', _json_body(self.status())
+        route = ROUTES.get(path)
+        if route is None:
+            raise ServiceError(404, f"Unknown endpoint: {path}")
+        handler, max_age = route
+        output = _param(params, 'format', 'json')
+        if output not in ('json', 'arrow'):
+            raise ServiceError(400, f"Unknown format: {output}")
+        if output == 'arrow':
+            # Refuse before doing the work, not after
+            try:
+                import pyarrow
+            except ImportError:
+                raise ServiceError(406, "pyarrow is not installed, use format=json")
+        key = (path, output, tuple(sorted((name, tuple(values)) for name, values in params.items())))
+
+        def compute():
+            try:
+                payload = handler(params)
+            except ValueError as e:
+                raise ServiceError(400, str(e))
+            if payload is None:
+                raise ServiceError(404, "No data found")
+            if output == 'arrow':
+                return 200, ARROW_TYPE, _arrow_stream(payload['table'])
+            return 200, 'application/json', _json_body(payload)
+
+        return self.cache.get(key, max_age, compute)
+
+class SECRequestHandler(BaseHTTPRequestHandler):
+    server_version = 'SECService/1.0'
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        try:
+            status, content_type, body = self.server.service.respond(url.path.rstrip('/') or '/',
+                                                                     parse_qs(url.query))
+        except ServiceError as e:
+            status, content_type, body = e.status, 'application/json', _json_body({'error': str(e)})
+        except Exception as e:
+            print(f"Error serving {self.path}: {e}")
+            status, content_type, body = 500, 'application/json', _json_body({'error': str(e)})
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+def make_server(host=DEFAULT_HOST, port=DEFAULT_PORT, max_items=256, quiet=False):
+    """Threaded server, one thread per connection, all sharing one SECService"""
+    server = ThreadingHTTPServer((host, port), SECRequestHandler)
+    server.daemon_threads = True
+    server.service = SECService(max_items)
+    server.quiet = quiet
+    return server
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve SEC search, filings, facts and 13F holdings over local HTTP")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="Interface to bind (0.0.0.0 to share on the network)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--memory-items', type=int, default=256, help="Computed responses kept in memory")
+    parser.add_argument('--quiet', action='store_true', help="Do not log every request")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, args.memory_items, args.quiet)
+    print(f"Serving on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
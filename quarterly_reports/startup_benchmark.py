@@ -0,0 +1,122 @@
+"""
+Startup time benchmark for the command line entry points
+Runs each command in a fresh interpreter, reports the median wall time over several runs
+and, from one `python -X importtime` run, the slowest imports and whether any of the heavy
+libraries (pandas, numpy, matplotlib, seaborn, bs4, GUI toolkits) were loaded.
+
+Usage:
+    python startup_benchmark.py
+    python startup_benchmark.py --budget 200 --record startup_history.jsonl
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+SCRAPER_DIR = os.path.join(ROOT, '13f')
+
+# Libraries a headless command should never need at startup
+HEAVY_MODULES = ('pandas', 'numpy', 'matplotlib', 'seaborn', 'bs4', 'tkinter', 'PySimpleGUI', 'lxml')
+
+# label -> (argv after the interpreter, working directory)
+COMMANDS = {
+    'interpreter': (['-c', 'pass'], HERE),
+    'retriever --help': ([os.path.join(HERE, 'retriever.py'), '--help'], HERE),
+    'retriever --search': ([os.path.join(HERE, 'retriever.py'), '--search', 'AAPL'], HERE),
+    'import filing_processor': (['-c', 'import filing_processor'], SCRAPER_DIR),
+    'import sec_client': (['-c', f'import sys; sys.path.insert(0, {ROOT!r}); import sec_client; sec_client.get_client()'], HERE),
+}
+
+def time_command(argv, cwd, repeat=5):
+    """Median wall time in milliseconds of running the interpreter with argv"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable] + argv, cwd=cwd, stdout=subprocess.DEVNULL,
+                       stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+def import_profile(argv, cwd):
+    """
+    Parse one `-X importtime` run
+
+    Returns:
+        list: (cumulative microseconds, module) for top-level imports, slowest first
+        set: Top-level package names that were imported
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + argv, cwd=cwd,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=False)
+    imports = []
+    packages = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        packages.add(module.split('.')[0])
+        # Nested imports are indented, only count the ones made by the command itself
+        if not name[1:].startswith(' '):
+            imports.append((int(cumulative), module))
+    imports.sort(reverse=True)
+    return imports, packages
+
+def run_benchmark(labels=None, repeat=5, top=5):
+    """
+    Returns:
+        list: One dict per command with label, median_ms, heavy modules and slowest imports
+    """
+    results = []
+    for label, (argv, cwd) in COMMANDS.items():
+        if labels and label not in labels:
+            continue
+        median_ms = time_command(argv, cwd, repeat)
+        imports, packages = import_profile(argv, cwd)
+        results.append({
+            'label': label,
+            'median_ms': round(median_ms, 1),
+            'heavy': sorted(module for module in HEAVY_MODULES if module in packages),
+            'slowest': [(module, round(us / 1000, 1)) for us, module in imports[:top]],
+        })
+    return results
+
+def print_results(results, budget=None):
+    for result in results:
+        over = budget is not None and result['label'] != 'interpreter' and result['median_ms'] > budget
+        flag = '  OVER BUDGET' if over else ''
+        print(f"{result['label']:<26} {result['median_ms']:>8.1f} ms{flag}")
+        if result['heavy']:
+            print(f"    heavy imports: {', '.join(result['heavy'])}")
+        for module, ms in result['slowest']:
+            print(f"    {ms:>8.1f} ms  {module}")
+
+def record_results(path, results):
+    """Append one line per command so startup time can be tracked across changes"""
+    stamp = datetime.now().isoformat(timespec='seconds')
+    with open(path, 'a') as f:
+        for result in results:
+            f.write(json.dumps(dict(result, timestamp=stamp)) + '\n')
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Measure startup time of the command line entry points")
+    parser.add_argument('--only', nargs='+', choices=list(COMMANDS), help="Commands to run (default: all)")
+    parser.add_argument('--repeat', type=int, default=5, help="Runs per command")
+    parser.add_argument('--top', type=int, default=5, help="Slowest imports to list per command")
+    parser.add_argument('--budget', type=float, help="Exit with status 1 when a command's median exceeds this (ms)")
+    parser.add_argument('--record', help="JSON lines file to append the results to")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.only, args.repeat, args.top)
+    print_results(results, args.budget)
+    if args.record:
+        record_results(args.record, results)
+    if args.budget is not None and any(result['median_ms'] > args.budget for result in results
+                                       if result['label'] != 'interpreter'):
+        sys.exit(1)
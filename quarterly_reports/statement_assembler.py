@@ -0,0 +1,253 @@
+"""
+Standardized financial statements from XBRL facts
+Maps the many us-gaap concepts companies use (see concepts.txt) onto standard income
+statement, balance sheet and cash flow line items, picking the best concept each company
+reports through a precomputed priority lookup.
+"""
+from functools import lru_cache
+
+import numpy as np
+
+from fact_store import take_rows
+from point_in_time import PERIOD_TYPES
+
+# statement -> [(line item, [concept aliases in priority order])]
+STATEMENT_MAP = {
+    'income_statement': [
+        ('Revenue', [
+            'us-gaap:Revenues',
+            'us-gaap:RevenueFromContractWithCustomerExcludingAssessedTax',
+            'us-gaap:RevenueFromContractWithCustomerIncludingAssessedTax',
+            'us-gaap:SalesRevenueNet',
+            'us-gaap:SalesRevenueGoodsNet',
+        ]),
+        ('Cost of Revenue', [
+            'us-gaap:CostOfRevenue',
+            'us-gaap:CostOfGoodsAndServicesSold',
+            'us-gaap:CostOfGoodsSold',
+        ]),
+        ('Gross Profit', ['us-gaap:GrossProfit']),
+        ('Research and Development', [
+            'us-gaap:ResearchAndDevelopmentExpense',
+            'us-gaap:ResearchAndDevelopmentExpenseExcludingAcquiredInProcessCost',
+        ]),
+        ('Selling, General and Administrative', [
+            'us-gaap:SellingGeneralAndAdministrativeExpense',
+            'us-gaap:GeneralAndAdministrativeExpense',
+        ]),
+        ('Operating Expenses', ['us-gaap:OperatingExpenses', 'us-gaap:CostsAndExpenses']),
+        ('Operating Income', ['us-gaap:OperatingIncomeLoss']),
+        ('Interest Expense', ['us-gaap:InterestExpense', 'us-gaap:InterestExpenseDebt']),
+        ('Pretax Income', [
+            'us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesExtraordinaryItemsNoncontrollingInterest',
+            'us-gaap:IncomeLossFromContinuingOperationsBeforeIncomeTaxesMinorityInterestAndIncomeLossFromEquityMethodInvestments',
+        ]),
+        ('Income Tax', ['us-gaap:IncomeTaxExpenseBenefit']),
+        ('Net Income', ['us-gaap:NetIncomeLoss', 'us-gaap:ProfitLoss',
+                        'us-gaap:NetIncomeLossAvailableToCommonStockholdersBasic']),
+        ('EPS Basic', ['us-gaap:EarningsPerShareBasic']),
+        ('EPS Diluted', ['us-gaap:EarningsPerShareDiluted', 'us-gaap:EarningsPerShareBasicAndDiluted']),
+        ('Diluted Shares', ['us-gaap:WeightedAverageNumberOfDilutedSharesOutstanding']),
+    ],
+    'balance_sheet': [
+        ('Cash and Equivalents', [
+            'us-gaap:CashAndCashEquivalentsAtCarryingValue',
+            'us-gaap:CashCashEquivalentsRestrictedCashAndRestrictedCashEquivalents',
+            'us-gaap:Cash',
+        ]),
+        ('Short-term Investments', ['us-gaap:ShortTermInvestments', 'us-gaap:MarketableSecuritiesCurrent',
+                                   'us-gaap:AvailableForSaleSecuritiesDebtSecuritiesCurrent']),
+        ('Accounts Receivable', ['us-gaap:AccountsReceivableNetCurrent', 'us-gaap:ReceivablesNetCurrent']),
+        ('Inventory', ['us-gaap:InventoryNet']),
+        ('Total Current Assets', ['us-gaap:AssetsCurrent']),
+        ('Property, Plant and Equipment', [
+            'us-gaap:PropertyPlantAndEquipmentNet',
+            'us-gaap:PropertyPlantAndEquipmentAndFinanceLeaseRightOfUseAssetAfterAccumulatedDepreciationAndAmortization',
+        ]),
+        ('Goodwill', ['us-gaap:Goodwill']),
+        ('Intangible Assets', ['us-gaap:IntangibleAssetsNetExcludingGoodwill',
+                               'us-gaap:FiniteLivedIntangibleAssetsNet']),
+        ('Total Assets', ['us-gaap:Assets']),
+        ('Accounts Payable', ['us-gaap:AccountsPayableCurrent', 'us-gaap:AccountsPayable']),
+        ('Total Current Liabilities', ['us-gaap:LiabilitiesCurrent']),
+        ('Long-term Debt', ['us-gaap:LongTermDebtNoncurrent', 'us-gaap:LongTermDebt']),
+        ('Total Liabilities', ['us-gaap:Liabilities']),
+        ('Stockholders Equity', [
+            'us-gaap:StockholdersEquity',
+            'us-gaap:StockholdersEquityIncludingPortionAttributableToNoncontrollingInterest',
+        ]),
+        ('Total Liabilities and Equity', ['us-gaap:LiabilitiesAndStockholdersEquity']),
+    ],
+    'cash_flow': [
+        ('Net Income', ['us-gaap:NetIncomeLoss', 'us-gaap:ProfitLoss']),
+        ('Depreciation and Amortization', [
+            'us-gaap:DepreciationDepletionAndAmortization',
+            'us-gaap:DepreciationAndAmortization',
+            'us-gaap:DepreciationAmortizationAndAccretionNet',
+            'us-gaap:Depreciation',
+        ]),
+        ('Share-based Compensation', ['us-gaap:ShareBasedCompensation',
+                                      'us-gaap:AllocatedShareBasedCompensationExpense']),
+        ('Operating Cash Flow', [
+            'us-gaap:NetCashProvidedByUsedInOperatingActivities',
+            'us-gaap:NetCashProvidedByUsedInOperatingActivitiesContinuingOperations',
+        ]),
+        ('Capital Expenditure', [
+            'us-gaap:PaymentsToAcquirePropertyPlantAndEquipment',
+            'us-gaap:PaymentsToAcquireProductiveAssets',
+        ]),
+        ('Investing Cash Flow', [
+            'us-gaap:NetCashProvidedByUsedInInvestingActivities',
+            'us-gaap:NetCashProvidedByUsedInInvestingActivitiesContinuingOperations',
+        ]),
+        ('Dividends Paid', ['us-gaap:PaymentsOfDividends', 'us-gaap:PaymentsOfDividendsCommonStock']),
+        ('Share Repurchases', ['us-gaap:PaymentsForRepurchaseOfCommonStock']),
+        ('Financing Cash Flow', [
+            'us-gaap:NetCashProvidedByUsedInFinancingActivities',
+            'us-gaap:NetCashProvidedByUsedInFinancingActivitiesContinuingOperations',
+        ]),
+    ],
+}
+
+# Balance sheet items are point-in-time, the other statements cover a duration
+INSTANT_STATEMENTS = {'balance_sheet'}
+
+# 10-Q cash flow statements report year to date (3, 6 or 9 months), not the quarter alone
+YEAR_TO_DATE_STATEMENTS = {'cash_flow'}
+
+class CompiledStatementMap:
+    """
+    Flattened, sorted form of a statement map
+
+    concepts[i] maps to (statements[i], items[i]) with priority[i], lower is better.
+    A concept used by several statements (Net Income) appears once per statement.
+    """
+    def __init__(self, statement_map):
+        rows = []
+        self.statement_names = list(statement_map)
+        self.item_names = []
+        for statement_code, statement in enumerate(self.statement_names):
+            for line_item, aliases in statement_map[statement]:
+                item_code = len(self.item_names)
+                self.item_names.append(line_item)
+                for priority, concept in enumerate(aliases):
+                    rows.append((concept, statement_code, item_code, priority))
+
+        rows.sort()
+        self.concepts = np.array([row[0] for row in rows], dtype=str)
+        self.statements = np.array([row[1] for row in rows], dtype='int32')
+        self.items = np.array([row[2] for row in rows], dtype='int32')
+        self.priority = np.array([row[3] for row in rows], dtype='int32')
+        self.item_statement = np.zeros(len(self.item_names), dtype='int32')
+        self.item_statement[self.items] = self.statements
+
+    def match(self, concepts):
+        """
+        Look up many fact concepts at once
+
+        Returns:
+            tuple: (fact_index, map_index) pairs for every fact/mapping match
+        """
+        concepts = np.asarray(concepts, dtype=str)
+        left = np.searchsorted(self.concepts, concepts, side='left')
+        right = np.searchsorted(self.concepts, concepts, side='right')
+        counts = right - left
+        fact_index = np.repeat(np.arange(len(concepts)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        map_index = np.repeat(left, counts) + offsets
+        return fact_index, map_index
+
+@lru_cache(maxsize=None)
+def compiled_statement_map():
+    """Compile the default map once per process, bulk runs reuse it"""
+    return CompiledStatementMap(STATEMENT_MAP)
+
+def _period_mask(table, statement_codes, compiled, period_type):
+    """
+    Instant facts for the balance sheet, matching durations for the other statements
+
+    For quarters the cash flow statement also takes year-to-date durations, the longest
+    one ending on a period end wins when cells are picked.
+    """
+    names = np.asarray(compiled.statement_names)[statement_codes]
+    instant = np.isnat(table['start'])
+    wants_instant = np.isin(names, list(INSTANT_STATEMENTS))
+    low, high = PERIOD_TYPES[period_type]
+    if period_type == 'quarter':
+        high = np.where(np.isin(names, list(YEAR_TO_DATE_STATEMENTS)), PERIOD_TYPES['annual'][0] - 1, high)
+    duration = (table['end'] - table['start']).astype('int64')
+    duration_ok = ~instant & (duration >= low) & (duration <= high)
+    return np.where(wants_instant, instant, duration_ok)
+
+def assemble_statements(table, period_type='annual', accession=None, as_of=None, compiled=None):
+    """
+    Build standardized statements from a fact table
+
+    Args:
+        table (dict): Fact table for one company (companyfacts or an XBRL instance)
+        period_type (str): 'annual' or 'quarter' for the income and cash flow statements
+        accession (str, optional): Only use facts reported in this filing
+        as_of (str, optional): Only use facts filed on or before this date
+        compiled (CompiledStatementMap, optional): Custom map, defaults to STATEMENT_MAP
+
+    Returns:
+        dict: statement name -> DataFrame (line items x period end dates, float64)
+    """
+    import pandas as pd
+
+    compiled = compiled or compiled_statement_map()
+    keep = ~np.isnat(table['end']) & ~np.isnan(table['val'])
+    if accession is not None:
+        keep &= table['accn'] == accession
+    if as_of is not None:
+        keep &= table['filed'] <= np.datetime64(as_of, 'D')
+    if 'dims' in table:
+        # Dimensional facts describe segments, not the consolidated statement
+        keep &= table['dims'] == ''
+    table = take_rows(table, keep)
+
+    fact_index, map_index = compiled.match(table['concept'])
+    facts = take_rows(table, fact_index)
+    statements = compiled.statements[map_index]
+    keep = _period_mask(facts, statements, compiled, period_type)
+    facts = take_rows(facts, keep)
+    statements = statements[keep]
+    items = compiled.items[map_index][keep]
+    priority = compiled.priority[map_index][keep]
+
+    # For each (item, period end): best priority, then the longest duration, then the latest filing
+    filed = facts['filed'].astype('int64')
+    end_days = facts['end'].astype('int64')
+    duration = np.where(np.isnat(facts['start']), 0, (facts['end'] - facts['start']).astype('int64'))
+    order = np.lexsort((filed, duration, -priority, end_days, items))
+    cell_items = items[order]
+    cell_ends = end_days[order]
+    last = np.append((cell_items[1:] != cell_items[:-1]) | (cell_ends[1:] != cell_ends[:-1]), True)
+    winners = order[last]
+
+    result = {}
+    for statement_code, statement in enumerate(compiled.statement_names):
+        in_statement = statements[winners] == statement_code
+        rows = winners[in_statement]
+        item_order = [i for i in range(len(compiled.item_names)) if compiled.item_statement[i] == statement_code]
+        periods = np.unique(facts['end'][rows])
+        frame = pd.DataFrame(np.nan, index=[compiled.item_names[i] for i in item_order],
+                             columns=pd.DatetimeIndex(periods), dtype='float64')
+        if len(rows):
+            row_positions = np.searchsorted(np.array(item_order), items[rows])
+            col_positions = np.searchsorted(periods, facts['end'][rows])
+            values = frame.to_numpy(copy=True)
+            values[row_positions, col_positions] = facts['val'][rows]
+            frame = pd.DataFrame(values, index=frame.index, columns=frame.columns)
+        result[statement] = frame.dropna(how='all')
+    return result
+
+def statements_to_records(statements):
+    """JSON-friendly form: {statement: {period: {line item: value}}}"""
+    records = {}
+    for statement, frame in statements.items():
+        records[statement] = {
+            str(period.date()): {item: float(value) for item, value in frame[period].dropna().items()}
+            for period in frame.columns
+        }
+    return records
@@ -0,0 +1,378 @@
+"""
+HTML financial table extraction
+Turns the tables in R-files or a filing's primary document into typed DataFrames with
+lxml, normalizing the numbers along the way: "$" and ")" fragments in their own cells,
+parentheses negatives, dashes for zero and "in thousands"/"in millions" scaling.
+Results are cached per accession and document, and batches parse in a process pool while
+downloads stay in threads behind the shared rate limiter.
+"""
+import io
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sec_client.transport import CACHE_DIR
+
+TABLE_CACHE_DIR = os.path.join(CACHE_DIR, 'tables')
+
+_SCALE = re.compile(r'in\s+(thousands|millions|billions)', re.I)
+# R-file titles read "shares in Thousands, $ in Millions", the dollar note wins
+_DOLLAR_SCALE = re.compile(r'\$\s*in\s+(thousands|millions|billions)', re.I)
+_SHARE_SCALE = re.compile(r'shares\s+in\s+(thousands|millions|billions)', re.I)
+# Per-share rows are never scaled, share count rows follow the share note when there is one
+_PER_SHARE = re.compile(r'per share|\(in dollars|per unit', re.I)
+_SHARES = re.compile(r'\(in shares\)|shares outstanding', re.I)
+SCALES = {'thousands': 1e3, 'millions': 1e6, 'billions': 1e9}
+_NUMBER = re.compile(r'^\(?-?\$?\s*\(?\s*-?[\d,]*\.?\d+\s*\)?%?\)?$')
+_DASHES = {'-', '–', '—', '—%', '-%'}
+# Text elements checked for a units note ahead of the next table
+_TEXT_TAGS = ('p', 'div', 'span', 'font', 'b', 'strong')
+
+def parse_number(text):
+    """
+    Convert a displayed number to a float, NaN when the text is not numeric
+
+    "(1,234)" -> -1234.0, "—" -> 0.0, "12.5%" -> 12.5
+    """
+    text = text.strip().replace('\xa0', ' ')
+    if text in _DASHES:
+        return 0.0
+    if not text or not _NUMBER.match(text):
+        return np.nan
+    negative = '(' in text or text.lstrip('($ ').startswith('-')
+    digits = re.sub(r'[^\d.]', '', text)
+    try:
+        value = float(digits)
+    except ValueError:
+        return np.nan
+    return -value if negative else value
+
+def detect_scale(text):
+    """1e3/1e6/1e9 when the text says the figures are in thousands/millions/billions, else 1"""
+    match = _DOLLAR_SCALE.search(text or '') or _SCALE.search(text or '')
+    return SCALES[match.group(1).lower()] if match else 1.0
+
+def detect_share_scale(text):
+    """Share count multiplier from an R-file note like "shares in Thousands", None when absent"""
+    match = _SHARE_SCALE.search(text or '')
+    return SCALES[match.group(1).lower()] if match else None
+
+def _cell_text(cell):
+    return ' '.join(''.join(cell.itertext()).split())
+
+def table_grid(table):
+    """
+    Expand an lxml table element into rows of cell text
+
+    Colspans are repeated across the spanned columns and rowspans carried down, the copies
+    are flagged so numbers are only counted once. The "$" / ")" / "%" fragments SEC filers
+    put in their own cells are merged into the number.
+
+    Returns:
+        tuple: (grid, copies) lists of equal-length rows
+    """
+    grid, copies = [], []
+    carried = {}   # column -> (text, rows left)
+    for tr in table.iter('tr'):
+        row, copied = [], []
+        column = 0
+        for cell in tr:
+            if cell.tag not in ('td', 'th'):
+                continue
+            while column in carried:
+                text, left = carried[column]
+                row.append(text)
+                copied.append(True)
+                if left <= 1:
+                    del carried[column]
+                else:
+                    carried[column] = (text, left - 1)
+                column += 1
+            text = _cell_text(cell)
+            colspan = cell.get('colspan') or '1'
+            rowspan = cell.get('rowspan') or '1'
+            span = int(colspan) if colspan.isdigit() else 1
+            rows_down = int(rowspan) if rowspan.isdigit() else 1
+            for offset in range(max(span, 1)):
+                row.append(text)
+                copied.append(offset > 0)
+                if rows_down > 1:
+                    carried[column] = (text, rows_down - 1)
+                column += 1
+        row = _merge_fragments(row)
+        if any(row):
+            grid.append(row)
+            copies.append(copied)
+
+    width = max((len(row) for row in grid), default=0)
+    grid = [row + [''] * (width - len(row)) for row in grid]
+    copies = [copied + [True] * (width - len(copied)) for copied in copies]
+    return grid, copies
+
+def _merge_fragments(row):
+    merged = list(row)
+    for i, text in enumerate(merged):
+        if text in (')', ')%', '%') and i:
+            # Attach to the nearest number on the left
+            for j in range(i - 1, -1, -1):
+                if merged[j]:
+                    merged[j] = merged[j] + text
+                    break
+            merged[i] = ''
+        elif text in ('$', '€', '£'):
+            merged[i] = ''
+    return merged
+
+def grid_to_dataframe(grid, copies=None, scale=1.0, share_scale=None):
+    """
+    Typed DataFrame from a cell grid
+
+    Leading rows are column labels until the first row with both a line item and a number,
+    the first column is the line item index. Columns that are mostly numeric become
+    float64 (scaled), the rest stay text.
+
+    Args:
+        grid (list): Rows of cell text from table_grid
+        copies (list, optional): Span copy flags from table_grid
+        scale (float): Multiplier for money values
+        share_scale (float, optional): Multiplier for share counts when it differs
+    """
+    import pandas as pd
+
+    if not grid:
+        return pd.DataFrame()
+    cells = np.array(grid, dtype=object)
+    copied = np.array(copies, dtype=bool) if copies is not None else np.zeros(cells.shape, dtype=bool)
+    numbers = np.vectorize(parse_number, otypes=['float64'])(cells)
+    has_number = ~np.isnan(numbers)
+
+    labelled = cells[:, 0] != ''
+    data_rows = np.flatnonzero(labelled & has_number[:, 1:].any(axis=1)) if cells.shape[1] > 1 else []
+    if not len(data_rows) and cells.shape[1] > 1:
+        data_rows = np.flatnonzero(has_number[:, 1:].any(axis=1))
+    header_count = int(data_rows[0]) if len(data_rows) else 0
+    header = cells[:header_count]
+
+    # Span copies count in the labels but not in the body
+    body_cells = np.where(copied[header_count:], '', cells[header_count:])
+    body_numbers = np.where(copied[header_count:], np.nan, numbers[header_count:])
+    body_has = ~np.isnan(body_numbers)
+
+    # Keep the line item column and every column with something in the body
+    used = [0] + [c for c in range(1, cells.shape[1]) if (body_cells[:, c] != '').any()]
+
+    labels = []
+    for column in used[1:]:
+        parts = [text for text in header[:, column] if text] if header_count else []
+        parts = [part for k, part in enumerate(parts) if part not in parts[:k]]
+        labels.append(' '.join(parts) or f"col{column}")
+    seen = {}
+    for k, label in enumerate(labels):
+        if label in seen:
+            seen[label] += 1
+            labels[k] = f"{label} ({seen[label]})"
+        else:
+            seen[label] = 0
+
+    row_labels = body_cells[:, 0]
+    row_scale = np.full(len(row_labels), scale)
+    row_scale[[bool(_PER_SHARE.search(label)) for label in row_labels]] = 1.0
+    if share_scale is not None:
+        row_scale[[bool(_SHARES.search(label)) for label in row_labels]] = share_scale
+
+    columns = {}
+    for label, column in zip(labels, used[1:]):
+        filled = body_cells[:, column] != ''
+        if body_has[filled, column].mean() >= 0.5:
+            # Percentages are ratios, never scaled
+            percent = np.array([text.endswith('%') for text in body_cells[:, column]], dtype=bool)
+            columns[label] = body_numbers[:, column] * np.where(percent, 1.0, row_scale)
+        else:
+            columns[label] = body_cells[:, column]
+
+    frame = pd.DataFrame(columns, index=pd.Index(row_labels, name=header[0, 0] if header_count else None))
+    numeric = frame.select_dtypes('number')
+    # Rows that are only a label (section captions) are kept, rows that are fully blank are not
+    keep = (frame.index != '') | numeric.notna().any(axis=1).to_numpy()
+    return frame[keep]
+
+def parse_tables(content, min_rows=2):
+    """
+    Extract every table from an HTML document
+
+    Streams through the document with lxml iterparse, so the scale note that precedes a
+    table is picked up without keeping the whole tree.
+
+    Args:
+        content (bytes): HTML document
+        min_rows (int): Skip layout tables with fewer data rows
+
+    Returns:
+        list: [{'table_id', 'title', 'scale', 'frame'}] with DataFrames
+    """
+    from lxml import etree
+
+    tables = []
+    pending_scale = 1.0
+    table_number = 0
+    context = etree.iterparse(io.BytesIO(content), events=('end',), html=True, recover=True,
+                              tag=('table',) + _TEXT_TAGS)
+    for _, elem in context:
+        if elem.tag != 'table':
+            # Short text elements outside tables may carry the units note for the next table
+            if len(elem) < 20 and elem.getparent() is not None and elem.getparent().tag != 'tr':
+                text = ''.join(elem.itertext())
+                if len(text) < 400 and _SCALE.search(text):
+                    pending_scale = detect_scale(text)
+            continue
+
+        grid, copies = table_grid(elem)
+        table_number += 1
+        if grid:
+            head_text = ' '.join(' '.join(row) for row in grid[:3])
+            scale = detect_scale(head_text) if _SCALE.search(head_text) else pending_scale
+            frame = grid_to_dataframe(grid, copies, scale, detect_share_scale(head_text))
+            if len(frame) >= min_rows and len(frame.columns):
+                tables.append({'table_id': f"t{table_number}", 'title': grid[0][0],
+                               'scale': scale, 'frame': frame})
+        pending_scale = 1.0
+        # Free the table and everything before it
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+    return tables
+
+def _cache_path(accession, document):
+    return os.path.join(TABLE_CACHE_DIR, accession, f"{document}.json")
+
+def save_tables(accession, document, tables):
+    path = _cache_path(accession, document)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    records = [{'table_id': t['table_id'], 'title': t['title'], 'scale': t['scale'],
+                'frame': json.loads(t['frame'].to_json(orient='split'))} for t in tables]
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(records, f)
+    os.replace(tmp_path, path)
+
+def load_tables(accession, document):
+    """Cached tables for one document, or None"""
+    import pandas as pd
+    try:
+        with open(_cache_path(accession, document), 'r', encoding='utf-8') as f:
+            records = json.load(f)
+    except (OSError, ValueError):
+        return None
+    tables = []
+    for record in records:
+        data = record['frame']
+        frame = pd.DataFrame(data['data'], index=pd.Index(data['index'], name=None), columns=data['columns'])
+        tables.append({'table_id': record['table_id'], 'title': record['title'],
+                       'scale': record['scale'], 'frame': frame.infer_objects()})
+    return tables
+
+def extract_document_tables(cik, accession, document, use_cache=True):
+    """
+    Tables of one filing document (an R-file such as R4.htm or the primary document)
+
+    Returns:
+        list: Table dicts, or None when the document could not be fetched
+    """
+    if use_cache:
+        cached = load_tables(accession, document)
+        if cached is not None:
+            return cached
+    from filing_documents import fetch_document
+    content = fetch_document(cik, accession, document)
+    if content is None:
+        return None
+    tables = parse_tables(content)
+    if use_cache:
+        save_tables(accession, document, tables)
+    return tables
+
+def get_table(cik, accession, document, table_id):
+    """One table by id, from the cache when possible"""
+    for table in extract_document_tables(cik, accession, document) or []:
+        if table['table_id'] == table_id:
+            return table
+    return None
+
+def extract_many(documents, max_workers=None, fetch_workers=8, use_cache=True):
+    """
+    Extract tables from many documents
+
+    Downloads run in threads that share the process-wide rate limiter, parsing runs in a
+    process pool because it is CPU bound.
+
+    Args:
+        documents (list): (cik, accession, document name) tuples
+
+    Returns:
+        dict: (accession, document) -> list of table dicts
+    """
+    from filing_documents import fetch_document
+
+    results = {}
+    todo = []
+    for cik, accession, document in documents:
+        cached = load_tables(accession, document) if use_cache else None
+        if cached is not None:
+            results[(accession, document)] = cached
+        else:
+            todo.append((cik, accession, document))
+
+    def fetch(job):
+        return job, fetch_document(*job)
+
+    with ThreadPoolExecutor(max_workers=fetch_workers) as fetcher, \
+            ProcessPoolExecutor(max_workers=max_workers) as parser:
+        futures = {}
+        for (cik, accession, document), content in fetcher.map(fetch, todo):
+            if content is not None:
+                futures[(accession, document)] = parser.submit(parse_tables, content)
+        for key, future in futures.items():
+            try:
+                tables = future.result()
+            except Exception as e:
+                print(f"Error parsing tables in {key[1]} of {key[0]}: {e}")
+                continue
+            if use_cache:
+                save_tables(key[0], key[1], tables)
+            results[key] = tables
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract HTML tables from filing documents")
+    parser.add_argument('--cik', required=True)
+    parser.add_argument('--accession', required=True)
+    parser.add_argument('--documents', nargs='+', default=None,
+                        help="Document names, defaults to the statement R-files from FilingSummary.xml")
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-cache', action='store_true')
+    args = parser.parse_args()
+
+    documents = args.documents
+    if not documents:
+        from filing_documents import get_filing_summary, find_statement_reports
+        reports = find_statement_reports(get_filing_summary(args.cik, args.accession))
+        documents = [report['html_file'] for report in reports.values() if report['html_file']]
+    if not documents:
+        print("No documents to extract")
+        sys.exit(1)
+
+    results = extract_many([(args.cik, args.accession, document) for document in documents],
+                           args.workers, use_cache=not args.no_cache)
+    for (accession, document), tables in results.items():
+        for table in tables:
+            print(f"\n{document} {table['table_id']}: {table['title']} (scale {table['scale']:g})")
+            print(table['frame'].head(15).to_string())
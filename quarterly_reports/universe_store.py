@@ -0,0 +1,376 @@
+"""
+Memory-mapped universe fact store
+Built once from the partitions written by bulk_ingest, then opened read-only by any number
+of processes. Every column is a fixed-width .npy file loaded with mmap_mode='r', so all
+readers share the OS page cache and lookups are zero-copy slices.
+
+Layout of <data_dir>/universe/:
+    cik.npy, concept.npy, unit.npy, ...   one fixed-width array per fact column
+                                          (string columns hold int32 codes)
+    dict_<column>.npy                     sorted fixed-width unicode dictionary per string column
+    index_keys.npy, index_starts.npy      concept x CIK offset index into the fact rows
+    cik_keys.npy, cik_starts.npy,         per-CIK index: the (concept, cik) runs of each company,
+    cik_pairs.npy                         as positions into index_keys grouped by CIK
+    company_<column>.npy                  company metadata, sorted by CIK
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+from fact_store import FACT_COLUMNS, empty_fact_table
+from bulk_ingest import COMPANY_COLUMNS, list_partitions, read_partition, read_table
+
+DEFAULT_DATA_DIR = os.environ.get('SEC_UNIVERSE_DATA', 'universe_data')
+
+# Fact columns that are dictionary-encoded on disk
+STRING_COLUMNS = [name for name, dtype in FACT_COLUMNS.items() if dtype == 'object']
+
+# Fact rows are sorted by concept, then CIK, so each (concept, cik) pair is one contiguous run
+_CIK_BITS = 32
+
+def _universe_dir(data_dir):
+    return os.path.join(data_dir, 'universe')
+
+def _cik_index(index_keys):
+    """
+    Group the (concept, cik) runs by company
+
+    Returns:
+        tuple: (sorted CIKs, starts into pairs with a closing sentinel, positions into
+            index_keys ordered by CIK and then concept)
+    """
+    pair_ciks = index_keys & ((1 << _CIK_BITS) - 1)
+    pairs = np.argsort(pair_ciks, kind='stable')
+    keys, starts = np.unique(pair_ciks[pairs], return_index=True)
+    return keys, np.append(starts, len(pairs)).astype('int64'), pairs.astype('int64')
+
+def _save(directory, name, array):
+    tmp_path = os.path.join(directory, name + '.tmp.npy')
+    np.save(tmp_path, array, allow_pickle=False)
+    os.replace(tmp_path, os.path.join(directory, name + '.npy'))
+
+def build_universe_store(data_dir=DEFAULT_DATA_DIR):
+    """
+    Compact the ingested fact partitions into the memory-mapped store
+
+    Strings are dictionary-encoded partition by partition, so peak memory during the build
+    is the numeric columns of the whole universe rather than the python objects.
+
+    Args:
+        data_dir (str): Directory written by bulk_ingest
+
+    Returns:
+        str: Path of the universe store directory
+    """
+    out_dir = _universe_dir(data_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    partitions = list_partitions(data_dir, 'facts')
+    if not partitions:
+        print(f"No fact partitions found in {data_dir}, run bulk_ingest first")
+        return None
+
+    # Pass 1: collect the dictionary of every string column
+    print(f"Building dictionaries from {len(partitions)} partitions...")
+    dictionaries = {name: set() for name in STRING_COLUMNS}
+    for path in partitions:
+        part = read_partition(path, STRING_COLUMNS)
+        for name in STRING_COLUMNS:
+            dictionaries[name].update(np.unique(part[name].astype(str)).tolist())
+    dictionaries = {name: np.array(sorted(values), dtype=str) for name, values in dictionaries.items()}
+    for name, values in dictionaries.items():
+        if not len(values):
+            values = np.array([''], dtype=str)
+            dictionaries[name] = values
+        _save(out_dir, f'dict_{name}', values)
+
+    # Pass 2: encode every partition into compact numeric columns
+    print("Encoding fact columns...")
+    encoded = {name: [] for name in FACT_COLUMNS}
+    for path in partitions:
+        part = read_partition(path, list(FACT_COLUMNS))
+        for name in FACT_COLUMNS:
+            column = part[name]
+            if name in dictionaries:
+                column = np.searchsorted(dictionaries[name], column.astype(str)).astype('int32')
+            encoded[name].append(column)
+    encoded = {name: np.concatenate(chunks) for name, chunks in encoded.items()}
+
+    # Sort by (concept, cik, end, filed) and write the columns in that order
+    order = np.lexsort((encoded['filed'], encoded['end'], encoded['cik'], encoded['concept']))
+    for name in FACT_COLUMNS:
+        _save(out_dir, name, encoded[name][order])
+
+    # Offset index: one entry per (concept, cik) run, plus a closing sentinel
+    row_keys = (encoded['concept'][order].astype('int64') << _CIK_BITS) | encoded['cik'][order]
+    index_keys, index_starts = np.unique(row_keys, return_index=True)
+    _save(out_dir, 'index_keys', index_keys)
+    _save(out_dir, 'index_starts', np.append(index_starts, len(row_keys)).astype('int64'))
+    for name, array in zip(('cik_keys', 'cik_starts', 'cik_pairs'), _cik_index(index_keys)):
+        _save(out_dir, name, array)
+
+    # Company metadata, sorted by CIK for binary search
+    companies = read_table(data_dir, 'companies')
+    company_order = np.argsort(companies['cik'], kind='stable')
+    for name, dtype in COMPANY_COLUMNS.items():
+        column = companies[name][company_order]
+        if dtype == 'object':
+            column = column.astype(str) if len(column) else np.empty(0, dtype='U1')
+        _save(out_dir, f'company_{name}', column)
+
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump({'rows': int(len(row_keys)), 'pairs': int(len(index_keys)),
+                   'companies': int(len(companies['cik']))}, f)
+
+    print(f"Universe store written to {out_dir}: {len(row_keys):,} facts, "
+          f"{len(index_keys):,} concept/company pairs")
+    return out_dir
+
+class UniverseStore:
+    """Read-only, memory-mapped view of the universe fact store"""
+    def __init__(self, data_dir=DEFAULT_DATA_DIR):
+        self.path = _universe_dir(data_dir)
+
+        def load(name):
+            return np.load(os.path.join(self.path, name + '.npy'), mmap_mode='r', allow_pickle=False)
+
+        self.columns = {name: load(name) for name in FACT_COLUMNS}
+        self.dictionaries = {name: load(f'dict_{name}') for name in STRING_COLUMNS}
+        self.index_keys = load('index_keys')
+        self.index_starts = load('index_starts')
+        if os.path.exists(os.path.join(self.path, 'cik_pairs.npy')):
+            self.cik_keys = load('cik_keys')
+            self.cik_starts = load('cik_starts')
+            self.cik_pairs = load('cik_pairs')
+        else:
+            # Stores built before the per-CIK index existed
+            self.cik_keys, self.cik_starts, self.cik_pairs = _cik_index(np.asarray(self.index_keys))
+        self.companies = {name: load(f'company_{name}') for name in COMPANY_COLUMNS}
+
+    def __len__(self):
+        return len(self.columns['val'])
+
+    def concept_code(self, concept):
+        """Dictionary code of a "taxonomy:concept" name, or None when it is not in the store"""
+        names = self.dictionaries['concept']
+        code = int(np.searchsorted(names, concept))
+        if code < len(names) and names[code] == concept:
+            return code
+        return None
+
+    def concept_range(self, concept):
+        """(start, stop) row range holding every fact of a concept across all companies"""
+        code = self.concept_code(concept)
+        if code is None:
+            return 0, 0
+        first = np.searchsorted(self.index_keys, code << _CIK_BITS, side='left')
+        last = np.searchsorted(self.index_keys, (code + 1) << _CIK_BITS, side='left')
+        return int(self.index_starts[first]), int(self.index_starts[last])
+
+    def pair_range(self, concept, cik):
+        """(start, stop) row range for one concept of one company"""
+        code = self.concept_code(concept)
+        if code is None:
+            return 0, 0
+        key = (code << _CIK_BITS) | int(cik)
+        i = int(np.searchsorted(self.index_keys, key))
+        if i < len(self.index_keys) and self.index_keys[i] == key:
+            return int(self.index_starts[i]), int(self.index_starts[i + 1])
+        return 0, 0
+
+    def raw_slice(self, start, stop):
+        """Zero-copy slice of the encoded columns"""
+        return {name: column[start:stop] for name, column in self.columns.items()}
+
+    def decode(self, rows):
+        """
+        Turn encoded rows (a slice dict or an index array) into a regular fact table
+
+        Args:
+            rows (dict or np.ndarray): Output of raw_slice, or row indices into the store
+        """
+        if not isinstance(rows, dict):
+            rows = {name: column[rows] for name, column in self.columns.items()}
+        table = {}
+        for name, dtype in FACT_COLUMNS.items():
+            column = np.asarray(rows[name])
+            if name in self.dictionaries:
+                column = self.dictionaries[name][column].astype(object)
+            table[name] = column
+        return table
+
+    def fact_table(self, concept=None, cik=None):
+        """Decoded fact table for a concept, a company/concept pair, or a whole company"""
+        if concept is not None and cik is not None:
+            return self.decode(self.raw_slice(*self.pair_range(concept, cik)))
+        if concept is not None:
+            return self.decode(self.raw_slice(*self.concept_range(concept)))
+        if cik is not None:
+            return self.decode(self.company_rows(cik))
+        return empty_fact_table()
+
+    def _company_pairs(self, cik):
+        """Positions into index_keys of one company's (concept, cik) runs"""
+        i = int(np.searchsorted(self.cik_keys, int(cik)))
+        if i >= len(self.cik_keys) or self.cik_keys[i] != int(cik):
+            return self.cik_pairs[:0]
+        return self.cik_pairs[self.cik_starts[i]:self.cik_starts[i + 1]]
+
+    def has_facts(self, cik):
+        """True when the store holds facts for the company"""
+        return len(self._company_pairs(cik)) > 0
+
+    def company_rows(self, cik):
+        """Row indices of every fact for one company, in concept order"""
+        pairs = np.asarray(self._company_pairs(cik))
+        if not len(pairs):
+            return np.empty(0, dtype='int64')
+        starts = self.index_starts[pairs]
+        stops = self.index_starts[pairs + 1]
+        lengths = stops - starts
+        # Expand the runs into one index array without a python loop
+        offsets = np.repeat(starts - np.cumsum(np.append(0, lengths[:-1])), lengths)
+        return offsets + np.arange(lengths.sum())
+
+    def has_company(self, cik):
+        ciks = self.companies['cik']
+        i = int(np.searchsorted(ciks, int(cik)))
+        if i < len(ciks) and ciks[i] == int(cik):
+            return True
+        return self.has_facts(cik)
+
+    def company_info(self, cik):
+        """Company metadata dict, or None"""
+        ciks = self.companies['cik']
+        i = int(np.searchsorted(ciks, int(cik)))
+        if i >= len(ciks) or ciks[i] != int(cik):
+            return None
+        return {name: column[i].item() for name, column in self.companies.items()}
+
+    def ciks_for_sic(self, sic):
+        """All CIKs with the given SIC code"""
+        return np.asarray(self.companies['cik'][self.companies['sic'] == int(sic)])
+
+    def company_facts(self, cik):
+        """
+        Rebuild a companyfacts-style JSON dict for one company
+
+        Compatibility path for the views that walk the JSON (concept tree and lists), code
+        that works on values should take fact_table(cik=...) instead.
+        Returns None when the company is not in the store.
+        """
+        rows = self.company_rows(cik)
+        if not len(rows):
+            return None
+        table = self.decode(rows)
+        info = self.company_info(cik)
+        result = {'cik': int(cik), 'entityName': info['name'] if info else '', 'facts': {}}
+
+        def date_text(value):
+            return '' if np.isnat(value) else str(value)
+
+        for i in range(len(rows)):
+            taxonomy, concept = table['concept'][i].split(':', 1)
+            units = result['facts'].setdefault(taxonomy, {}).setdefault(concept, {'units': {}})['units']
+            value = {
+                'end': date_text(table['end'][i]),
+                'val': table['val'][i].item(),
+                'accn': table['accn'][i],
+                'fy': int(table['fy'][i]),
+                'fp': table['fp'][i],
+                'form': table['form'][i],
+                'filed': date_text(table['filed'][i]),
+            }
+            if not np.isnat(table['start'][i]):
+                value['start'] = date_text(table['start'][i])
+            if table['frame'][i]:
+                value['frame'] = table['frame'][i]
+            units.setdefault(table['unit'][i], []).append(value)
+        return result
+
+    def panel_facts(self, concepts, ciks=None):
+        """
+        Fact table holding only the given concepts (and companies), ready for an AsOfIndex
+
+        Concept runs are contiguous, so this gathers a handful of slices instead of scanning
+        the whole store.
+        """
+        pieces = []
+        cik_filter = None if ciks is None else np.asarray(ciks, dtype='int64')
+        for concept in concepts:
+            start, stop = self.concept_range(concept)
+            if start == stop:
+                continue
+            if cik_filter is None:
+                pieces.append(np.arange(start, stop))
+            else:
+                ciks_in_run = self.columns['cik'][start:stop]
+                pieces.append(start + np.flatnonzero(np.isin(ciks_in_run, cik_filter)))
+        rows = np.concatenate(pieces) if pieces else np.empty(0, dtype='int64')
+        return self.decode(rows)
+
+    def concept_panel(self, ciks, concepts, periods, as_of='9999-12-31', period_type='annual', unit=None):
+        """
+        Companies x concepts x periods panel read straight from the store
+
+        Args:
+            ciks (array-like): Companies
+            concepts (list): "taxonomy:concept" names
+            periods (array-like): Period end dates
+            as_of (date or array-like): Knowledge date, see point_in_time.AsOfIndex.lookup
+            period_type (str): 'instant', 'quarter' or 'annual'
+            unit (str, optional): Restrict to one unit, needed when a concept has several
+
+        Returns:
+            tuple: (values, mask) arrays of shape (K, C, P)
+        """
+        from point_in_time import AsOfIndex
+        index = AsOfIndex(self.panel_facts(concepts, ciks), period_type=period_type, unit=unit)
+        return index.panel(ciks, concepts, periods, as_of)
+
+_open_stores = {}
+
+def open_universe_store(data_dir=DEFAULT_DATA_DIR):
+    """
+    Open the store once per process and reuse it
+
+    Returns:
+        UniverseStore or None: None when no store has been built in data_dir
+    """
+    data_dir = os.path.abspath(data_dir)
+    if data_dir not in _open_stores:
+        if not os.path.exists(os.path.join(_universe_dir(data_dir), 'meta.json')):
+            return None
+        _open_stores[data_dir] = UniverseStore(data_dir)
+    return _open_stores[data_dir]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build or query the memory-mapped universe fact store")
+    parser.add_argument('command', choices=['build', 'company', 'concept'])
+    parser.add_argument('args', nargs='*', help="CIK for 'company', taxonomy:concept for 'concept'")
+    parser.add_argument('--data', default=DEFAULT_DATA_DIR, help="Data directory written by bulk_ingest")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        build_universe_store(args.data)
+        sys.exit(0)
+
+    store = open_universe_store(args.data)
+    if store is None:
+        print(f"No universe store in {args.data}, run 'python universe_store.py build' first")
+        sys.exit(1)
+
+    if args.command == 'company' and args.args:
+        facts = store.company_facts(int(args.args[0]))
+        if not facts:
+            print("Company not found in store")
+        else:
+            for taxonomy in facts['facts']:
+                print(f"  {taxonomy}: {len(facts['facts'][taxonomy])} concepts")
+    elif args.command == 'concept' and args.args:
+        start, stop = store.concept_range(args.args[0])
+        print(f"{args.args[0]}: {stop - start:,} facts across "
+              f"{len(np.unique(store.columns['cik'][start:stop]))} companies")
@@ -0,0 +1,289 @@
+"""
+Streaming XBRL instance parser
+Reads an XBRL instance document, or the inline XBRL embedded in a filing's primary HTML,
+with iterparse and emits the same columnar fact table as the companyfacts flattener.
+Unlike companyfacts it keeps dimensional (segment) facts, described in an extra 'dims'
+column as "axis=member;axis=member" ('' for the consolidated value).
+
+Elements are cleared and detached as soon as they are read, so memory stays bounded by
+the facts kept rather than by the size of the document.
+"""
+import io
+import os
+import re
+import sys
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+# Make the shared sec_client package at the repo root importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sec_client import get_client
+from fact_store import FACT_COLUMNS
+
+XBRLI = 'http://www.xbrl.org/2003/instance'
+XBRLDI = 'http://xbrl.org/2006/xbrldi'
+XSI_NIL = '{http://www.w3.org/2001/XMLSchema-instance}nil'
+# Inline XBRL 1.0 and 1.1
+IX_NAMESPACES = ('http://www.xbrl.org/2008/inlineXBRL', 'http://www.xbrl.org/2013/inlineXBRL')
+# Namespaces whose elements are never facts
+NON_FACT_NAMESPACES = {XBRLI, XBRLDI, 'http://www.xbrl.org/2003/linkbase', 'http://www.w3.org/1999/xlink',
+                       'http://www.w3.org/1999/xhtml'} | set(IX_NAMESPACES)
+
+# dei facts that describe the filing itself
+DEI_METADATA = {
+    'dei:DocumentFiscalYearFocus': 'fy',
+    'dei:DocumentFiscalPeriodFocus': 'fp',
+    'dei:DocumentType': 'form',
+}
+
+_DASHES = {'-', '–', '—', ''}
+_NUMBER = re.compile(r'[^0-9.]')
+
+def _split(tag):
+    """'{namespace}local' -> (namespace, local)"""
+    if tag[:1] == '{':
+        namespace, _, local = tag[1:].partition('}')
+        return namespace, local
+    return '', tag
+
+def _strip_prefix(measure):
+    """'iso4217:USD' -> 'USD', matching the companyfacts unit names"""
+    return measure.strip().rpartition(':')[2]
+
+def _inline_number(text, format_name):
+    """
+    Convert the displayed text of an ix:nonFraction to a float
+
+    Handles the common transformation formats: zero dashes, comma decimals and
+    thousands separators. Returns None when the text is not a number.
+    """
+    text = text.strip()
+    format_name = (format_name or '').lower()
+    if 'zerodash' in format_name or 'fixed-zero' in format_name or text in _DASHES:
+        return 0.0
+    if 'numcommadecimal' in format_name or 'num-comma-decimal' in format_name:
+        text = text.replace('.', '').replace(' ', '').replace(',', '.')
+    text = _NUMBER.sub('', text)
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+class _StreamingParser:
+    """One-pass state for a single document"""
+    def __init__(self):
+        self.prefixes = {}
+        self.contexts = {}   # id -> (entity, start, end, dims)
+        self.units = {}      # id -> unit name
+        self.facts = []      # (concept, context id, unit id, value)
+        self.seen = set()
+        self.metadata = {}
+
+    def concept_name(self, namespace, local):
+        prefix = self.prefixes.get(namespace) or namespace.rstrip('/').rpartition('/')[2]
+        return f"{prefix}:{local}"
+
+    def add_fact(self, concept, context_id, unit_id, value):
+        key = (concept, context_id, unit_id, value)
+        # Inline documents repeat the same fact wherever it is displayed
+        if key not in self.seen:
+            self.seen.add(key)
+            self.facts.append(key)
+
+    def read_context(self, elem):
+        entity = elem.findtext(f'{{{XBRLI}}}entity/{{{XBRLI}}}identifier', '').strip()
+        period = elem.find(f'{{{XBRLI}}}period')
+        start = end = ''
+        if period is not None:
+            instant = period.findtext(f'{{{XBRLI}}}instant')
+            if instant:
+                end = instant.strip()
+            else:
+                start = period.findtext(f'{{{XBRLI}}}startDate', '').strip()
+                end = period.findtext(f'{{{XBRLI}}}endDate', '').strip()
+
+        members = []
+        for member in elem.iter(f'{{{XBRLDI}}}explicitMember'):
+            members.append(f"{member.get('dimension', '')}={(member.text or '').strip()}")
+        for member in elem.iter(f'{{{XBRLDI}}}typedMember'):
+            members.append(f"{member.get('dimension', '')}={''.join(member.itertext()).strip()}")
+        self.contexts[elem.get('id')] = (entity, start[:10], end[:10], ';'.join(sorted(members)))
+
+    def read_unit(self, elem):
+        divide = elem.find(f'{{{XBRLI}}}divide')
+        def measures(parent):
+            return '*'.join(_strip_prefix(m.text or '') for m in parent.iter(f'{{{XBRLI}}}measure'))
+
+        if divide is not None:
+            numerator = divide.find(f'{{{XBRLI}}}unitNumerator')
+            denominator = divide.find(f'{{{XBRLI}}}unitDenominator')
+            name = f"{measures(numerator)}/{measures(denominator)}"
+        else:
+            name = measures(elem)
+        self.units[elem.get('id')] = name
+
+    def read_inline_fraction(self, elem):
+        if elem.get(XSI_NIL) == 'true':
+            return
+        value = _inline_number(''.join(elem.itertext()), elem.get('format'))
+        if value is None:
+            return
+        scale = elem.get('scale')
+        if scale:
+            value *= 10.0 ** int(scale)
+        if elem.get('sign') == '-':
+            value = -value
+        self.add_fact(elem.get('name', ''), elem.get('contextRef'), elem.get('unitRef'), value)
+
+    def read_instance_fact(self, elem, concept):
+        text = (elem.text or '').strip()
+        if concept in DEI_METADATA:
+            self.metadata[DEI_METADATA[concept]] = text
+        if elem.get('unitRef') is None or elem.get(XSI_NIL) == 'true':
+            return
+        try:
+            value = float(text)
+        except ValueError:
+            return
+        self.add_fact(concept, elem.get('contextRef'), elem.get('unitRef'), value)
+
+    def parse(self, source):
+        stack = []
+        # Elements whose subtree is read at their end event must not be cleared early
+        capturing = 0
+        for event, item in ET.iterparse(source, events=('start-ns', 'start', 'end')):
+            if event == 'start-ns':
+                prefix, uri = item
+                self.prefixes.setdefault(uri, prefix)
+                continue
+
+            namespace, local = _split(item.tag)
+            is_inline = namespace in IX_NAMESPACES
+            captures = (namespace == XBRLI and local in ('context', 'unit')) or \
+                       (is_inline and local == 'nonFraction') or \
+                       (is_inline and local == 'nonNumeric' and item.get('name', '') in DEI_METADATA)
+
+            if event == 'start':
+                stack.append(item)
+                capturing += captures
+                continue
+
+            stack.pop()
+            capturing -= captures
+            if namespace == XBRLI and local == 'context':
+                self.read_context(item)
+            elif namespace == XBRLI and local == 'unit':
+                self.read_unit(item)
+            elif is_inline and local == 'nonFraction':
+                self.read_inline_fraction(item)
+            elif is_inline and local == 'nonNumeric' and item.get('name', '') in DEI_METADATA:
+                self.metadata[DEI_METADATA[item.get('name')]] = ''.join(item.itertext()).strip()
+            elif item.get('contextRef') is not None and namespace not in NON_FACT_NAMESPACES:
+                self.read_instance_fact(item, self.concept_name(namespace, local))
+
+            if not capturing:
+                # Done with this element: free its content and detach it from the parent
+                item.clear()
+                if stack and len(stack[-1]) and stack[-1][-1] is item:
+                    del stack[-1][-1]
+
+def _to_table(parser, cik=None, accession='', filed=None, form=''):
+    """Resolve context and unit references and build the fact table"""
+    facts = [fact for fact in parser.facts if fact[1] in parser.contexts]
+    contexts = [parser.contexts[fact[1]] for fact in facts]
+    n = len(facts)
+
+    def objects(values):
+        array = np.empty(n, dtype=object)
+        array[:] = values
+        return array
+
+    def dates(values):
+        return np.array([value or 'NaT' for value in values], dtype='datetime64[D]')
+
+    if cik is None:
+        entity = contexts[0][0] if contexts else ''
+        cik = int(entity) if entity.isdigit() else 0
+    fy = parser.metadata.get('fy', '')
+
+    table = {
+        'cik': np.full(n, int(cik), dtype='int64'),
+        'concept': objects([fact[0] for fact in facts]),
+        'unit': objects([parser.units.get(fact[2], '') for fact in facts]),
+        'start': dates([context[1] for context in contexts]),
+        'end': dates([context[2] for context in contexts]),
+        'val': np.array([fact[3] for fact in facts], dtype='float64'),
+        'filed': np.full(n, np.datetime64(filed or 'NaT', 'D')),
+        'accn': objects([accession] * n),
+        'fy': np.full(n, int(fy) if fy.isdigit() else 0, dtype='int32'),
+        'fp': objects([parser.metadata.get('fp', '')] * n),
+        'form': objects([form or parser.metadata.get('form', '')] * n),
+        'frame': objects([''] * n),
+    }
+    table = {name: table[name] for name in FACT_COLUMNS}
+    table['dims'] = objects([context[3] for context in contexts])
+    return table
+
+def parse_xbrl_facts(source, cik=None, accession='', filed=None, form=''):
+    """
+    Parse an XBRL instance or inline XBRL document into a fact table
+
+    Args:
+        source (str or file): Path or binary file object (a streamed HTTP response works)
+        cik (int, optional): CIK for every row, defaults to the entity identifier
+        accession (str): Accession number recorded on every row
+        filed (str, optional): Filing date recorded on every row
+        form (str, optional): Form type, defaults to dei:DocumentType
+
+    Returns:
+        dict: FACT_COLUMNS arrays plus a 'dims' column
+    """
+    parser = _StreamingParser()
+    parser.parse(source)
+    return _to_table(parser, cik, accession, filed, form)
+
+def fetch_xbrl_facts(url, cik=None, accession='', filed=None, form=''):
+    """
+    Download an instance document from EDGAR and parse it
+
+    Goes through the shared client, so a filed instance (which never changes) is read from
+    the on-disk cache after the first download.
+
+    Returns:
+        dict: Fact table, or None when the download or parse fails
+    """
+    print(f"Fetching XBRL instance: {url}")
+    content = get_client().document(url)
+    if content is None:
+        return None
+    try:
+        return parse_xbrl_facts(io.BytesIO(content), cik, accession, filed, form)
+    except Exception as e:
+        print(f"Error parsing XBRL instance {url}: {e}")
+        return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parse an XBRL instance or inline XBRL document")
+    parser.add_argument('source', help="Local path or EDGAR URL")
+    parser.add_argument('--accession', default='')
+    parser.add_argument('--dimensional', action='store_true', help="Also list dimensional facts")
+    args = parser.parse_args()
+
+    if args.source.startswith('http'):
+        table = fetch_xbrl_facts(args.source, accession=args.accession)
+    else:
+        table = parse_xbrl_facts(args.source, accession=args.accession)
+    if table is None:
+        sys.exit(1)
+
+    consolidated = table['dims'] == ''
+    print(f"{len(table['val'])} facts, {int((~consolidated).sum())} dimensional")
+    show = np.ones(len(table['val']), dtype=bool) if args.dimensional else consolidated
+    for i in np.flatnonzero(show)[:50]:
+        period = f"{table['start'][i]}..{table['end'][i]}" if not np.isnat(table['start'][i]) else str(table['end'][i])
+        dims = f" [{table['dims'][i]}]" if table['dims'][i] else ''
+        print(f"{table['concept'][i]:<60} {period:<24} {table['val'][i]:>20,.2f} {table['unit'][i]}{dims}")
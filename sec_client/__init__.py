@@ -0,0 +1,46 @@
+"""
+Shared SEC access layer used by the GUIs and batch tools
+
+Scripts in 13f/ and quarterly_reports/ add the repository root to sys.path so this
+package imports the same way whether they are run directly or imported.
+
+Names are resolved from their submodules on first use, so importing the package does not
+pull in requests or numpy until something needs them.
+"""
+import importlib
+
+_EXPORTS = {
+    'RateLimiter': 'sec_client.transport',
+    'limiter': 'sec_client.transport',
+    'get': 'sec_client.transport',
+    'get_session': 'sec_client.transport',
+    'fetch_json': 'sec_client.transport',
+    'fetch_bytes': 'sec_client.transport',
+    'read_cache': 'sec_client.transport',
+    'write_cache': 'sec_client.transport',
+    'SECClient': 'sec_client.client',
+    'get_client': 'sec_client.client',
+    'load_filing_history': 'sec_client.history',
+    'merge_filing_columns': 'sec_client.history',
+    'FilingIndex': 'sec_client.filing_index',
+    'Filing': 'sec_client.records',
+    'FilingList': 'sec_client.records',
+    'Holding': 'sec_client.records',
+    'HoldingTable': 'sec_client.records',
+    'FeedEntry': 'sec_client.feeds',
+    'parse_feed': 'sec_client.feeds',
+    'FilingWatcher': 'sec_client.watcher',
+    'JSONLSubscriber': 'sec_client.watcher',
+    'PollScheduler': 'sec_client.schedule',
+    'ScheduledWatcher': 'sec_client.schedule',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'sec_client' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,143 @@
+"""
+Typed access to the SEC endpoints the tools use
+Every method goes through the shared limiter, pooled session and on-disk cache. On top of
+that the client keeps recently used JSON documents in memory and coalesces concurrent
+requests for the same URL, so a GUI, a CLI command and a batch job running in one process
+never fetch the same document twice.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sec_client.transport import fetch_bytes, fetch_json
+
+DATA_URL = "https://data.sec.gov"
+ARCHIVES_URL = "https://www.sec.gov/Archives/edgar/data"
+TICKERS_URL = "https://www.sec.gov/files/company_tickers.json"
+
+# How long cached copies stay fresh, in seconds (None: filed data never changes)
+SUBMISSIONS_MAX_AGE = 3600
+COMPANY_FACTS_MAX_AGE = 24 * 3600
+TICKERS_MAX_AGE = 24 * 3600
+RSS_MAX_AGE = 60
+
+def _cik(cik):
+    return str(int(cik)).zfill(10)
+
+class SECClient:
+    """
+    SEC API client
+
+    Returned JSON documents are shared between callers and must be treated as read-only.
+
+    Args:
+        use_cache (bool): Read and write the on-disk cache
+        memory_items (int): JSON documents kept in memory, least recently used dropped first
+    """
+    def __init__(self, use_cache=True, memory_items=32):
+        self.use_cache = use_cache
+        self.memory_items = memory_items
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._url_locks = {}
+
+    def _remembered(self, url, max_age):
+        hit = self._memory.get(url)
+        if hit is not None and (max_age is None or time.time() - hit[0] <= max_age):
+            self._memory.move_to_end(url)
+            return hit[1]
+        return None
+
+    def _fetch(self, url, max_age, fetch, remember=True):
+        with self._lock:
+            data = self._remembered(url, max_age)
+            if data is not None:
+                return data
+            url_lock = self._url_locks.setdefault(url, threading.Lock())
+
+        # Concurrent callers of one URL wait for the first fetch instead of repeating it
+        with url_lock:
+            with self._lock:
+                data = self._remembered(url, max_age)
+            if data is not None:
+                return data
+            data = fetch(url, max_age=max_age, use_cache=self.use_cache)
+            with self._lock:
+                if data is not None and remember:
+                    self._memory[url] = (time.time(), data)
+                    while len(self._memory) > self.memory_items:
+                        self._memory.popitem(last=False)
+                self._url_locks.pop(url, None)
+        return data
+
+    def json(self, url, max_age=None):
+        """Any JSON document, None on error"""
+        return self._fetch(url, max_age, fetch_json)
+
+    def document(self, url, max_age=None, remember=False):
+        """Any raw document as bytes, None on error"""
+        return self._fetch(url, max_age, fetch_bytes, remember)
+
+    def submissions(self, cik, max_age=SUBMISSIONS_MAX_AGE):
+        """Company metadata and recent filings (data.sec.gov/submissions)"""
+        return self.json(f"{DATA_URL}/submissions/CIK{_cik(cik)}.json", max_age)
+
+    def submissions_page(self, name):
+        """Older filings sidecar page named in filings.files, never changes once published"""
+        return self.json(f"{DATA_URL}/submissions/{name}")
+
+    def company_facts(self, cik, max_age=COMPANY_FACTS_MAX_AGE):
+        """Every XBRL fact a company has reported (api/xbrl/companyfacts)"""
+        return self.json(f"{DATA_URL}/api/xbrl/companyfacts/CIK{_cik(cik)}.json", max_age)
+
+    def company_concept(self, cik, taxonomy, concept, max_age=COMPANY_FACTS_MAX_AGE):
+        """One concept for one company (api/xbrl/companyconcept)"""
+        return self.json(f"{DATA_URL}/api/xbrl/companyconcept/CIK{_cik(cik)}/{taxonomy}/{concept}.json", max_age)
+
+    def frame(self, taxonomy, concept, unit, period, max_age=None):
+        """One concept for every company in one period (api/xbrl/frames)"""
+        return self.json(f"{DATA_URL}/api/xbrl/frames/{taxonomy}/{concept}/{unit}/{period}.json", max_age)
+
+    def company_tickers(self, max_age=TICKERS_MAX_AGE):
+        """Ticker, name and CIK of every listed company"""
+        return self.json(TICKERS_URL, max_age)
+
+    def rss(self, cik, count=100, max_age=RSS_MAX_AGE):
+        """Atom feed of a company's latest filings, as bytes"""
+        return self.document(f"{DATA_URL}/rss?cik={cik}&count={count}", max_age, remember=True)
+
+    def filings_feed(self, cik, form='', start=0, count=100, max_age=RSS_MAX_AGE):
+        """Atom page of a company's filings filtered by form type, as bytes"""
+        from sec_client.feeds import company_filings_url
+
+        return self.document(company_filings_url(cik, form, start, count), max_age)
+
+    def filing_url(self, cik, accession, name=''):
+        return f"{ARCHIVES_URL}/{int(cik)}/{accession.replace('-', '')}/{name}".rstrip('/')
+
+    def filing_index(self, cik, accession):
+        """
+        Documents of one filing from its index.json
+
+        Returns:
+            list: [{'name', 'type', 'size', 'last-modified'}], or None on error
+        """
+        data = self.json(self.filing_url(cik, accession, 'index.json'))
+        if not data:
+            return None
+        return data.get('directory', {}).get('item', [])
+
+    def archive(self, cik, accession, name):
+        """One document of a filing as bytes, filed documents are cached permanently"""
+        return self.document(self.filing_url(cik, accession, name))
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Process-wide client shared by the GUIs, CLIs and batch jobs"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SECClient()
+    return _client
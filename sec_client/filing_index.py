@@ -0,0 +1,103 @@
+"""
+Columnar filing index
+Loads the submissions filing columns once as typed arrays (form as integer category codes,
+dates as datetime64) so filtering by form type and date is a few boolean mask operations.
+Display records and URLs are only built for the rows that survive the filter.
+"""
+import numpy as np
+
+from sec_client.records import ARCHIVES_URL, FilingList
+
+def _acceptance_times(values):
+    """'2024-02-14T16:05:12.000Z' strings -> datetime64[ms], NaT when empty"""
+    cleaned = np.char.rstrip(np.asarray(values, dtype=str), 'Z') if len(values) else np.array([], dtype=str)
+    cleaned = np.where(cleaned == '', 'NaT', cleaned)
+    return cleaned.astype('datetime64[ms]')
+
+def _dates(values):
+    values = np.asarray(values, dtype=str) if len(values) else np.array([], dtype=str)
+    return np.where(values == '', 'NaT', values).astype('datetime64[D]')
+
+class FilingIndex:
+    """
+    Typed columns for one company's filings
+
+    Attributes:
+        cik (str): Zero-padded CIK
+        accession (np.ndarray): Accession numbers (str)
+        form_codes (np.ndarray): int32 codes into form_names
+        form_names (np.ndarray): Sorted distinct form types
+        acceptance (np.ndarray): datetime64[ms] acceptance times
+        filing_date, report_date (np.ndarray): datetime64[D]
+        primary_document, description (np.ndarray): str
+    """
+    def __init__(self, columns, cik):
+        self.cik = str(int(cik)).zfill(10)
+        self.accession = np.asarray(columns.get('accessionNumber', []), dtype=str)
+        n = len(self.accession)
+
+        def column(name):
+            values = columns.get(name) or [''] * n
+            return np.asarray(values, dtype=str)
+
+        self.form_names, codes = np.unique(column('form'), return_inverse=True)
+        self.form_codes = codes.astype('int32')
+        self.acceptance = _acceptance_times(column('acceptanceDateTime'))
+        self.acceptance_day = self.acceptance.astype('datetime64[D]')
+        self.filing_date = _dates(column('filingDate'))
+        self.report_date = _dates(column('reportDate'))
+        self.primary_document = column('primaryDocument')
+        self.description = column('primaryDocDescription')
+
+    def __len__(self):
+        return len(self.accession)
+
+    @property
+    def forms(self):
+        return self.form_names[self.form_codes]
+
+    def mask(self, forms=None, start=None, end=None):
+        """
+        Boolean mask of the rows matching every given filter
+
+        Args:
+            forms (list, optional): Form types to keep, all when None
+            start, end (str, optional): Inclusive acceptance date range
+        """
+        keep = np.ones(len(self), dtype=bool)
+        if forms is not None:
+            # Compare small integer codes instead of strings
+            wanted = np.flatnonzero(np.isin(self.form_names, list(forms)))
+            keep &= np.isin(self.form_codes, wanted)
+        if start is not None:
+            keep &= self.acceptance_day >= np.datetime64(start, 'D')
+        if end is not None:
+            keep &= self.acceptance_day <= np.datetime64(end, 'D')
+        return keep
+
+    def select(self, forms=None, start=None, end=None):
+        """Row positions matching the filters, newest first as in the submissions order"""
+        return np.flatnonzero(self.mask(forms, start, end))
+
+    def link(self, row):
+        accession = self.accession[row]
+        return f"{ARCHIVES_URL}/{self.cik}/{accession.replace('-', '')}/{accession}-index.htm"
+
+    def records(self, rows):
+        """
+        Filing records for the given rows only
+
+        Returns:
+            FilingList: Array-backed, Filing objects are built as rows are read
+        """
+        rows = np.asarray(rows, dtype=int)
+        dates = np.datetime_as_string(self.acceptance_day[rows])
+        return FilingList(
+            self.cik,
+            np.where(dates == 'NaT', '', dates),
+            self.forms[rows],
+            self.accession[rows],
+            # The filing lists have always shown the primary document name as the description
+            self.primary_document[rows],
+            self.primary_document[rows],
+        )
@@ -0,0 +1,118 @@
+"""
+Complete filing history for a company
+The submissions API only lists about the last 1,000 filings in filings.recent, older ones
+live in the sidecar pages named in filings.files. The sidecars are fetched concurrently,
+merged with the recent block into one columnar index and cached, so later calls only
+fetch the submissions document and any sidecar pages that are new.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from sec_client.client import get_client
+from sec_client.transport import CACHE_DIR
+
+HISTORY_DIR = os.path.join(CACHE_DIR, 'history')
+# Columns of filings.recent and of every sidecar page
+FILING_COLUMNS = [
+    'accessionNumber', 'filingDate', 'reportDate', 'acceptanceDateTime', 'act', 'form',
+    'fileNumber', 'filmNumber', 'items', 'core_type', 'size', 'isXBRL', 'isInlineXBRL',
+    'primaryDocument', 'primaryDocDescription',
+]
+
+_locks = {}
+_locks_guard = threading.Lock()
+
+def _cik_lock(cik):
+    with _locks_guard:
+        return _locks.setdefault(cik, threading.Lock())
+
+def _history_path(cik):
+    return os.path.join(HISTORY_DIR, f"CIK{cik}.json")
+
+def _load_cached_history(cik):
+    try:
+        with open(_history_path(cik), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _save_history(cik, history):
+    os.makedirs(HISTORY_DIR, exist_ok=True)
+    path = _history_path(cik)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(history, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def merge_filing_columns(blocks):
+    """
+    Merge several columnar filing blocks, newest acceptance first, one row per accession
+
+    Args:
+        blocks (list): Dicts of column name -> list, as in filings.recent
+
+    Returns:
+        dict: Column name -> list
+    """
+    columns = [name for name in FILING_COLUMNS if any(name in block for block in blocks)]
+    rows = {}
+    for block in blocks:
+        accessions = block.get('accessionNumber', [])
+        for i, accession in enumerate(accessions):
+            if accession in rows:
+                continue
+            rows[accession] = [block[name][i] if name in block and i < len(block[name]) else ''
+                               for name in columns]
+
+    order = columns.index('acceptanceDateTime') if 'acceptanceDateTime' in columns else None
+    ordered = sorted(rows.values(), key=lambda row: row[order] or '', reverse=True) if order is not None \
+        else list(rows.values())
+    return {name: [row[k] for row in ordered] for k, name in enumerate(columns)}
+
+def load_filing_history(cik, submissions=None, max_workers=4, use_cache=True):
+    """
+    Every filing a company has made, as columns shaped like filings.recent
+
+    Args:
+        cik (int or str): Company CIK
+        submissions (dict, optional): Submissions document already fetched by the caller
+        max_workers (int): Concurrent sidecar fetches
+        use_cache (bool): Reuse and update the cached history
+
+    Returns:
+        dict: Column name -> list, newest filing first, or None when nothing could be fetched
+    """
+    cik = str(int(cik)).zfill(10)
+    with _cik_lock(cik):
+        if submissions is None:
+            submissions = get_client().submissions(cik)
+        if not submissions:
+            cached = _load_cached_history(cik) if use_cache else None
+            return cached['filings'] if cached else None
+
+        filings = submissions.get('filings', {})
+        recent = filings.get('recent', {})
+        sidecars = [page['name'] for page in filings.get('files', []) if page.get('name')]
+
+        cached = _load_cached_history(cik) if use_cache else None
+        loaded = set(cached['files']) if cached else set()
+        missing = [name for name in sidecars if name not in loaded]
+
+        pages = []
+        if missing:
+            print(f"Fetching {len(missing)} older filing pages for CIK {cik}")
+            # Sidecar pages cover closed date ranges, so their cached copies never expire
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                results = list(executor.map(get_client().submissions_page, missing))
+            for name, page in zip(missing, results):
+                if page:
+                    pages.append(page)
+                    loaded.add(name)
+
+        blocks = [recent] + pages + ([cached['filings']] if cached else [])
+        merged = merge_filing_columns(blocks)
+        if use_cache:
+            _save_history(cik, {'files': sorted(loaded), 'filings': merged})
+        return merged
@@ -0,0 +1,196 @@
+"""
+Shared record types for filings and 13F holdings
+Filing is a slotted record whose URLs are derived on access instead of stored, and it
+still answers filing['link'] style lookups so code written against the old dicts keeps
+working. FilingList and HoldingTable keep large lists as columns and only build record
+objects for the rows that are actually touched.
+"""
+from typing import NamedTuple
+
+import numpy as np
+
+ARCHIVES_URL = "https://www.sec.gov/Archives/edgar/data"
+
+class Filing:
+    """
+    One filing as shown in the filing lists
+
+    Supports the mapping protocol (filing['date'], filing.get('link'), dict(filing)) with the
+    keys in FIELDS, so it can stand in for the old filing dicts and be serialized as one.
+    """
+    __slots__ = ('date', 'type', 'accession', 'description', 'cik', 'primary_document')
+
+    # Keys of the mapping view, link is computed
+    FIELDS = ('date', 'type', 'accession', 'description', 'link', 'cik')
+
+    def __init__(self, date, type, accession, description='', cik='', primary_document=''):
+        self.date = date
+        self.type = type
+        self.accession = accession
+        self.description = description
+        self.cik = str(cik)
+        self.primary_document = primary_document
+
+    @property
+    def base_url(self):
+        """Archive folder of the filing"""
+        return f"{ARCHIVES_URL}/{self.cik}/{self.accession.replace('-', '')}"
+
+    @property
+    def link(self):
+        """Filing index page"""
+        return f"{self.base_url}/{self.accession}-index.htm"
+
+    @property
+    def index_json_url(self):
+        return f"{self.base_url}/index.json"
+
+    @property
+    def document_url(self):
+        """Primary document, None when it is not known"""
+        return f"{self.base_url}/{self.primary_document}" if self.primary_document else None
+
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.FIELDS else default
+
+    def keys(self):
+        return self.FIELDS
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('date', ''), data.get('type', ''), data['accession'],
+                   data.get('description', ''), data.get('cik', ''), data.get('primary_document', ''))
+
+    def __eq__(self, other):
+        return isinstance(other, Filing) and self.accession == other.accession and self.cik == other.cik
+
+    def __hash__(self):
+        return hash((self.cik, self.accession))
+
+    def __repr__(self):
+        return f"Filing({self.type!r}, {self.date!r}, {self.accession!r})"
+
+class FilingList:
+    """
+    Array-backed sequence of filings
+
+    Columns are numpy string arrays, a Filing is only built when a row is indexed or iterated.
+
+    Args:
+        cik (str): Zero-padded CIK shared by every row
+        date, type, accession, description, primary_document (array-like): One value per row
+    """
+    COLUMNS = ('date', 'type', 'accession', 'description', 'primary_document')
+
+    def __init__(self, cik, date, type, accession, description, primary_document):
+        self.cik = str(cik)
+        self.columns = {
+            'date': np.asarray(date, dtype=str),
+            'type': np.asarray(type, dtype=str),
+            'accession': np.asarray(accession, dtype=str),
+            'description': np.asarray(description, dtype=str),
+            'primary_document': np.asarray(primary_document, dtype=str),
+        }
+
+    def __len__(self):
+        return len(self.columns['accession'])
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            row = {name: values[item].item() for name, values in self.columns.items()}
+            return Filing(row['date'], row['type'], row['accession'], row['description'] or 'Unknown',
+                          self.cik, row['primary_document'])
+        # Slices, masks and position arrays give another FilingList sharing no Python objects
+        return FilingList(self.cik, *(self.columns[name][item] for name in self.COLUMNS))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def to_dicts(self):
+        return [filing.to_dict() for filing in self]
+
+class Holding(NamedTuple):
+    """One 13F information table row"""
+    date: str
+    name: str
+    type: str
+    cusip: str
+    value: float
+    shares: float
+    share_type: str = ''
+    investment_discretion: str = ''
+    voting_authority: float = 0.0
+
+class HoldingTable:
+    """
+    Column store of holdings, appended row by row and turned into a DataFrame in one step
+
+    Numeric columns are kept in growable float64 arrays so a large information table
+    does not become one Python object per value.
+    """
+    NUMERIC = ('value', 'shares', 'voting_authority')
+
+    def __init__(self, capacity=256):
+        self.size = 0
+        self.columns = {}
+        for name in Holding._fields:
+            self.columns[name] = np.empty(capacity, dtype='float64') if name in self.NUMERIC else []
+
+    def __len__(self):
+        return self.size
+
+    def append(self, holding):
+        capacity = len(self.columns['value'])
+        if self.size == capacity:
+            for name in self.NUMERIC:
+                grown = np.empty(capacity * 2, dtype='float64')
+                grown[:capacity] = self.columns[name]
+                self.columns[name] = grown
+        for name, value in zip(Holding._fields, holding):
+            if name in self.NUMERIC:
+                self.columns[name][self.size] = value
+            else:
+                self.columns[name].append(value)
+        self.size += 1
+
+    def extend(self, holdings):
+        for holding in holdings:
+            self.append(holding)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += self.size
+        if not 0 <= row < self.size:
+            raise IndexError(row)
+        return Holding(*(self.columns[name][row].item() if name in self.NUMERIC else self.columns[name][row]
+                         for name in Holding._fields))
+
+    def __iter__(self):
+        for row in range(self.size):
+            yield self[row]
+
+    def to_dataframe(self, fields=None, rename=None):
+        """
+        Args:
+            fields (list, optional): Columns to keep, in order, all of them when None
+            rename (dict, optional): Column name -> output column name
+        """
+        import pandas as pd
+
+        fields = fields or Holding._fields
+        data = {name: self.columns[name][:self.size].copy() if name in self.NUMERIC else self.columns[name]
+                for name in fields}
+        df = pd.DataFrame(data, columns=list(fields))
+        return df.rename(columns=rename) if rename else df
@@ -0,0 +1,325 @@
+"""
+Polling schedule driven by expected filing dates
+Most periodic filings arrive in predictable windows: 13F-HR within 45 days of calendar
+quarter end, 10-Q and 10-K within deadlines set by filer status, and each filer tends to
+file at a similar lag every period. The scheduler learns those lags from a company's filing
+history, works out when its next 13F/10-Q/10-K is due, and polls its feed often only
+inside that window. Outside it the company is checked rarely and the global
+latest-filings feed covers the surprises.
+"""
+import calendar
+import heapq
+import statistics
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from sec_client.client import get_client
+from sec_client.filing_index import FilingIndex
+from sec_client.history import load_filing_history
+from sec_client.watcher import FilingWatcher
+
+# Days after period end, by filer status: (10-Q, 10-K)
+DEADLINES = {
+    'large accelerated filer': (40, 60),
+    'accelerated filer': (40, 75),
+    'non-accelerated filer': (45, 90),
+}
+DEFAULT_DEADLINES = DEADLINES['non-accelerated filer']
+THIRTEEN_F_DEADLINE = 45
+
+SCHEDULED_FORMS = ('13F-HR', '10-Q', '10-K')
+# Filings of a form used to learn the filer's usual lag
+LAG_HISTORY = 8
+# Days added after the deadline before a window is given up on
+GRACE_DAYS = 3
+
+# Seconds between checks inside a window, in the days before it, and otherwise
+HOT_INTERVAL = 60
+WARM_INTERVAL = 15 * 60
+COLD_INTERVAL = 6 * 3600
+WARM_DAYS = 3
+
+def _is_month_end(day):
+    return day.day == calendar.monthrange(day.year, day.month)[1]
+
+def add_months(day, months):
+    """Shift a date by whole months, month ends stay month ends"""
+    year, month = divmod(day.month - 1 + months, 12)
+    year += day.year
+    month += 1
+    last = calendar.monthrange(year, month)[1]
+    return date(year, month, last if _is_month_end(day) else min(day.day, last))
+
+def next_quarter_end(day):
+    """First calendar quarter end strictly after day"""
+    month = ((day.month - 1) // 3 + 1) * 3
+    end = date(day.year, month, calendar.monthrange(day.year, month)[1])
+    return end if end > day else add_months(end, 3)
+
+class Expectation:
+    """When the next filing of one form is due from one company"""
+    __slots__ = ('cik', 'form', 'period_end', 'expected', 'window_start', 'window_end', 'lag', 'spread', 'deadline')
+
+    def __init__(self, cik, form, period_end, lag, spread, deadline):
+        self.cik = cik
+        self.form = form
+        self.lag = lag
+        self.spread = spread
+        self.deadline = deadline
+        self.set_period(period_end)
+
+    def set_period(self, period_end):
+        self.period_end = period_end
+        self.expected = period_end + timedelta(days=self.lag)
+        self.window_start = self.expected - timedelta(days=self.spread)
+        self.window_end = period_end + timedelta(days=max(self.deadline, self.lag + self.spread) + GRACE_DAYS)
+
+    def __repr__(self):
+        return (f"Expectation({self.cik} {self.form} period {self.period_end}, "
+                f"window {self.window_start}..{self.window_end})")
+
+def _filer_deadlines(category):
+    category = (category or '').lower()
+    # Longest names first so 'large accelerated' is not read as 'accelerated'
+    for status in sorted(DEADLINES, key=len, reverse=True):
+        if status in category:
+            return DEADLINES[status]
+    return DEFAULT_DEADLINES
+
+def _to_date(value):
+    return value.astype('datetime64[D]').astype(object)
+
+def learn_expectations(index, submissions=None, forms=SCHEDULED_FORMS, today=None):
+    """
+    Expected next filings of a company from its filing history
+
+    Args:
+        index (FilingIndex): The company's filings
+        submissions (dict, optional): Submissions document, for filer status and fiscal year end
+        forms (tuple): Periodic forms to schedule
+        today (date, optional): Reference date, windows that already closed are rolled forward
+
+    Returns:
+        list: Expectation per form the company files (or, for 13F-HR, has filed)
+    """
+    today = today or date.today()
+    submissions = submissions or {}
+    quarterly_deadline, annual_deadline = _filer_deadlines(submissions.get('category'))
+    deadlines = {'13F-HR': THIRTEEN_F_DEADLINE, '10-Q': quarterly_deadline, '10-K': annual_deadline}
+    fiscal_year_end = submissions.get('fiscalYearEnd') or ''
+
+    annual_month = int(fiscal_year_end[:2]) if len(fiscal_year_end) == 4 and fiscal_year_end.isdigit() else None
+    expectations = []
+    for form in forms:
+        rows = index.select([form])
+        rows = rows[~np.isnat(index.report_date[rows]) & ~np.isnat(index.filing_date[rows])]
+        if not len(rows):
+            continue
+        # Newest first, as in the submissions order
+        rows = rows[:LAG_HISTORY]
+        reports = [_to_date(value) for value in index.report_date[rows]]
+        lags = [(_to_date(filed) - report).days for filed, report in zip(index.filing_date[rows], reports)]
+        lags = [lag for lag in lags if 0 <= lag <= 365]
+        deadline = deadlines.get(form, THIRTEEN_F_DEADLINE)
+        if lags:
+            lag = int(statistics.median(lags))
+            spread = min(15, max(3, (max(lags) - min(lags) + 1) // 2 + 2))
+        else:
+            lag, spread = deadline - 5, 10
+
+        if form == '10-K' and annual_month is None:
+            annual_month = reports[0].month
+
+        expectation = Expectation(index.cik, form, reports[0], lag, spread, deadline)
+        advance(expectation, annual_month)
+        while expectation.window_end < today:
+            advance(expectation, annual_month)
+        expectations.append(expectation)
+    return expectations
+
+def advance(expectation, annual_month=None):
+    """Move an expectation on to the following period"""
+    period_end = expectation.period_end
+    if expectation.form == '13F-HR':
+        period_end = next_quarter_end(period_end)
+    elif expectation.form == '10-K':
+        period_end = add_months(period_end, 12)
+    else:
+        period_end = add_months(period_end, 3)
+        # The fourth fiscal quarter is reported on the 10-K
+        if annual_month is not None and period_end.month == annual_month:
+            period_end = add_months(period_end, 3)
+    expectation.set_period(period_end)
+    return expectation
+
+class PollScheduler:
+    """
+    Next-check times per CIK from learned filing windows
+
+    Usage:
+        scheduler = PollScheduler()
+        scheduler.learn_many(watchlist)
+        scheduler.next_check(cik, time.time())
+    """
+    def __init__(self, forms=SCHEDULED_FORMS, hot=HOT_INTERVAL, warm=WARM_INTERVAL, cold=COLD_INTERVAL):
+        self.forms = forms
+        self.hot = hot
+        self.warm = warm
+        self.cold = cold
+        self.expectations = {}
+        self.annual_months = {}
+        self.lock = threading.Lock()
+
+    def learn(self, cik, today=None):
+        """Load a company's history and learn its filing windows"""
+        cik = str(int(cik)).zfill(10)
+        submissions = get_client().submissions(cik)
+        columns = load_filing_history(cik, submissions=submissions)
+        if not columns:
+            expectations = []
+        else:
+            expectations = learn_expectations(FilingIndex(columns, cik), submissions, self.forms, today)
+        fiscal_year_end = (submissions or {}).get('fiscalYearEnd') or ''
+        with self.lock:
+            self.expectations[cik] = expectations
+            if len(fiscal_year_end) == 4 and fiscal_year_end.isdigit():
+                self.annual_months[cik] = int(fiscal_year_end[:2])
+        return expectations
+
+    def learn_many(self, ciks, max_workers=4):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(self.learn, ciks))
+
+    def next_check(self, cik, now):
+        """
+        Time (epoch seconds) a company's feed should next be polled
+
+        Inside a window the interval is `hot`, in the WARM_DAYS before one `warm`, otherwise
+        `cold` but never sleeping past the start of the next warm period. Windows that have
+        closed are rolled forward first.
+        """
+        today = datetime.fromtimestamp(now).date()
+        with self.lock:
+            annual_month = self.annual_months.get(cik)
+            expectations = list(self.expectations.get(cik, []))
+            # A window that closed without a filing being seen (a late filer, an NT filing,
+            # or one read while the feed was priming) moves on to the next period
+            for expectation in expectations:
+                while expectation.window_end < today:
+                    advance(expectation, annual_month)
+        if not expectations:
+            return now + self.cold
+
+        interval = self.cold
+        wake = None
+        for expectation in expectations:
+            if expectation.window_start <= today <= expectation.window_end:
+                interval = min(interval, self.hot)
+            elif expectation.window_start - timedelta(days=WARM_DAYS) <= today < expectation.window_start:
+                interval = min(interval, self.warm)
+            elif today < expectation.window_start:
+                warm_start = expectation.window_start - timedelta(days=WARM_DAYS)
+                start = time.mktime(warm_start.timetuple())
+                wake = start if wake is None else min(wake, start)
+        next_time = now + interval
+        if wake is not None and wake > now:
+            next_time = min(next_time, wake)
+        return next_time
+
+    def filed(self, cik, form):
+        """A filing arrived, move that form's window on to the next period"""
+        with self.lock:
+            annual_month = self.annual_months.get(cik)
+            for expectation in self.expectations.get(cik, []):
+                if expectation.form == form and date.today() >= expectation.window_start - timedelta(days=30):
+                    advance(expectation, annual_month)
+
+    def plan(self, now=None):
+        """
+        Every watched company ordered by next check
+
+        Returns:
+            list: (next check epoch seconds, cik) as a priority queue would pop them
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            ciks = list(self.expectations)
+        queue = [(self.next_check(cik, now), cik) for cik in ciks]
+        heapq.heapify(queue)
+        return [heapq.heappop(queue) for _ in range(len(queue))]
+
+class ScheduledWatcher(FilingWatcher):
+    """
+    FilingWatcher whose company feeds are polled on the scheduler's timetable
+
+    Global latest-filings feeds keep their fixed short interval.
+    """
+    def __init__(self, scheduler, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.scheduler = scheduler
+
+    def add_feed(self, feed):
+        # Feeds read on an earlier run need no priming poll, they wait for their window
+        if feed.cik and feed.key in self.saved_state and self.saved_state[feed.key].get('primed'):
+            feed.next_poll = self.scheduler.next_check(feed.cik, time.time())
+        return super().add_feed(feed)
+
+    def next_poll(self, feed, changed, now):
+        if not feed.cik:
+            return super().next_poll(feed, changed, now)
+        feed.interval = self.scheduler.next_check(feed.cik, now) - now
+        return now + feed.interval
+
+    def publish(self, entry):
+        if entry.cik:
+            self.scheduler.filed(entry.cik, entry.form)
+        super().publish(entry)
+
+if __name__ == "__main__":
+    import argparse
+
+    from sec_client.watcher import JSONLSubscriber, WATCH_DIR, _read_ciks
+
+    parser = argparse.ArgumentParser(description="Show or run the expected-filing polling schedule")
+    parser.add_argument('--cik', nargs='*', default=[], help="CIKs to schedule")
+    parser.add_argument('--ciks-file', help="File with one CIK per line")
+    parser.add_argument('--forms', nargs='*', default=list(SCHEDULED_FORMS), help="Periodic forms to schedule")
+    parser.add_argument('--watch', action='store_true', help="Run the watcher on this schedule instead of printing it")
+    parser.add_argument('--latest', nargs='*', default=[], help="Global latest-filings feeds to follow while watching")
+    parser.add_argument('--jsonl', help="Append new filings to this JSON lines file")
+    parser.add_argument('--state-dir', default=WATCH_DIR)
+    args = parser.parse_args()
+
+    ciks = [str(int(cik)).zfill(10) for cik in list(args.cik) + (_read_ciks(args.ciks_file) if args.ciks_file else [])]
+    if not ciks:
+        parser.error("give --cik or --ciks-file")
+
+    scheduler = PollScheduler(tuple(args.forms))
+    scheduler.learn_many(ciks)
+
+    if not args.watch:
+        now = time.time()
+        for next_time, cik in scheduler.plan(now):
+            print(f"{cik}  next check {datetime.fromtimestamp(next_time):%Y-%m-%d %H:%M}")
+            for expectation in scheduler.expectations.get(cik, []):
+                print(f"    {expectation.form:<7} period {expectation.period_end}  expected {expectation.expected}"
+                      f"  window {expectation.window_start} .. {expectation.window_end}")
+    else:
+        watcher = ScheduledWatcher(scheduler, args.state_dir)
+        for form in args.latest:
+            watcher.watch_latest(form, ciks=ciks)
+        for cik in ciks:
+            watcher.watch_company(cik, forms=args.forms)
+        watcher.subscribe(lambda entry: print(f"{entry.updated} {entry.form:<8} {entry.cik} {entry.accession} {entry.title}"))
+        if args.jsonl:
+            watcher.subscribe(JSONLSubscriber(args.jsonl))
+        try:
+            watcher.run()
+        except KeyboardInterrupt:
+            watcher.stop()
+            watcher.save_state()
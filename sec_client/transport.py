@@ -0,0 +1,178 @@
+"""
+Shared HTTP transport for everything that talks to SEC
+One rate limiter, one pooled session and one on-disk cache per process
+requests is imported on the first network call, so cache hits and scripted startups skip it.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+# SEC asks for a descriptive User-Agent with contact details and at most 10 requests per second
+USER_AGENT = os.environ.get('SEC_USER_AGENT', 'Hayden Herstrom herstromresources@gmail.com')
+MAX_REQUESTS_PER_SECOND = float(os.environ.get('SEC_MAX_RPS', '8'))
+CACHE_DIR = os.environ.get('SEC_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.sec_scraper_cache'))
+
+class RateLimiter:
+    """Thread-safe token bucket shared by every request in the process"""
+    def __init__(self, rate=MAX_REQUESTS_PER_SECOND, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a request may be sent"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+limiter = RateLimiter()
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Pooled keep-alive session with the SEC headers already set"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+            session.mount('https://', adapter)
+            session.headers.update({
+                'User-Agent': USER_AGENT,
+                'Accept-Encoding': 'gzip, deflate',
+            })
+            _session = session
+    return _session
+
+def _cache_path(url, suffix='.json'):
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIR, digest[:2], digest + suffix)
+
+def read_cache(url, max_age=None):
+    """
+    Cached JSON body for a URL, or None
+
+    Args:
+        url (str): Request URL used as the cache key
+        max_age (float, optional): Maximum age in seconds, None accepts any age
+    """
+    path = _cache_path(url)
+    try:
+        if max_age is not None and time.time() - os.path.getmtime(path) > max_age:
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def write_cache(url, data):
+    """Store a JSON body for a URL"""
+    path = _cache_path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, path)
+
+def get(url, timeout=30, **kwargs):
+    """Rate-limited GET through the shared session"""
+    limiter.acquire()
+    return get_session().get(url, timeout=timeout, **kwargs)
+
+def fetch_json(url, max_age=None, use_cache=True):
+    """
+    Fetch a JSON document through the limiter and cache
+
+    Args:
+        url (str): URL to fetch
+        max_age (float, optional): Seconds a cached copy stays fresh, None means forever
+        use_cache (bool): Set False to always go to the network
+
+    Returns:
+        dict: Parsed JSON, or None on error (404 included)
+    """
+    if use_cache:
+        cached = read_cache(url, max_age)
+        if cached is not None:
+            return cached
+
+    import requests
+
+    try:
+        response = get(url)
+        if response.status_code == 403:
+            print("SEC API access forbidden. This might be due to rate limiting or invalid headers.")
+            return None
+        if response.status_code == 404:
+            print(f"Not found: {url}")
+            return None
+        response.raise_for_status()
+        data = response.json()
+    except (requests.exceptions.RequestException, ValueError) as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+    if use_cache:
+        write_cache(url, data)
+    return data
+
+def fetch_bytes(url, max_age=None, use_cache=True):
+    """
+    Fetch a raw document (HTML, XML, RSS) through the limiter and cache
+
+    Args:
+        url (str): URL to fetch
+        max_age (float, optional): Seconds a cached copy stays fresh, None means forever
+        use_cache (bool): Set False to always go to the network
+
+    Returns:
+        bytes: Response body, or None on error (404 included)
+    """
+    path = _cache_path(url, '.bin')
+    if use_cache:
+        try:
+            if max_age is None or time.time() - os.path.getmtime(path) <= max_age:
+                with open(path, 'rb') as f:
+                    return f.read()
+        except OSError:
+            pass
+
+    import requests
+
+    try:
+        response = get(url)
+        if response.status_code == 403:
+            print("SEC access forbidden. This might be due to rate limiting or invalid headers.")
+            return None
+        if response.status_code == 404:
+            print(f"Not found: {url}")
+            return None
+        response.raise_for_status()
+        content = response.content
+    except requests.exceptions.RequestException as e:
+        print(f"Error fetching {url}: {e}")
+        return None
+
+    if use_cache:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    return content
@@ -0,0 +1,386 @@
+"""
+Long-running filing watcher
+Polls per-company feeds and the global latest-filings feed with conditional GETs
+(ETag / If-Modified-Since). A feed's interval backs off while it is unchanged and drops
+back to its minimum as soon as it announces something new. Every accession that has been
+announced is kept in a persistent seen-set, and new filings are pushed to subscribers.
+
+The global feed for a form type covers every filer, so polling it about every 30 seconds
+keeps the latency for a watchlist of hundreds of CIKs under a minute with a handful of
+requests. The per-company feeds are a slower backstop for filings that scroll off the
+global feed between polls. All requests go through the shared rate limiter.
+"""
+import heapq
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from sec_client.feeds import company_feed_url, iter_feed, latest_feed_url
+from sec_client.transport import CACHE_DIR, get
+
+WATCH_DIR = os.path.join(CACHE_DIR, 'watch')
+
+# Seconds between polls of one feed
+MIN_INTERVAL = 30
+LATEST_MAX_INTERVAL = 60
+COMPANY_MAX_INTERVAL = 900
+# Growth of the interval after each unchanged poll
+BACKOFF = 1.5
+
+class SeenSet:
+    """
+    Accessions already announced, in an append-only text file (one per line)
+
+    Only the newest `limit` accessions are kept, the file is rewritten when it grows past that.
+    """
+    def __init__(self, path, limit=200000):
+        self.path = path
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.order = deque()
+        self.items = set()
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    accession = line.strip()
+                    if accession and accession not in self.items:
+                        self.items.add(accession)
+                        self.order.append(accession)
+        except OSError:
+            pass
+        self.file = open(path, 'a')
+
+    def __contains__(self, accession):
+        return accession in self.items
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, accession):
+        """Record an accession, True when it had not been seen before"""
+        with self.lock:
+            if accession in self.items:
+                return False
+            self.items.add(accession)
+            self.order.append(accession)
+            self.file.write(accession + '\n')
+            self.file.flush()
+            if len(self.order) > self.limit * 1.1:
+                self._compact()
+            return True
+
+    def _compact(self):
+        while len(self.order) > self.limit:
+            self.items.discard(self.order.popleft())
+        self.file.close()
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(''.join(accession + '\n' for accession in self.order))
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, 'a')
+
+    def close(self):
+        self.file.close()
+
+class Feed:
+    """Polling state of one feed"""
+    __slots__ = ('key', 'url', 'cik', 'forms', 'ciks', 'min_interval', 'max_interval',
+                 'interval', 'etag', 'modified', 'primed', 'next_poll', 'last_new')
+
+    def __init__(self, key, url, cik='', forms=None, ciks=None, min_interval=MIN_INTERVAL,
+                 max_interval=COMPANY_MAX_INTERVAL):
+        self.key = key
+        self.url = url
+        self.cik = cik
+        self.forms = set(forms) if forms else None
+        self.ciks = set(ciks) if ciks else None
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.etag = None
+        self.modified = None
+        # Set once the feed has been read, entries already in it on the first read are history
+        self.primed = False
+        self.next_poll = 0.0
+        # Time the feed last announced a new filing
+        self.last_new = None
+
+    def wants(self, entry):
+        if self.forms is not None and entry.form not in self.forms:
+            return False
+        if self.ciks is not None and entry.cik not in self.ciks:
+            return False
+        return True
+
+    def state(self):
+        return {'etag': self.etag, 'modified': self.modified, 'interval': self.interval,
+                'primed': self.primed, 'last_new': self.last_new}
+
+    def restore(self, state):
+        self.etag = state.get('etag')
+        self.modified = state.get('modified')
+        self.interval = min(max(state.get('interval') or self.min_interval, self.min_interval), self.max_interval)
+        self.primed = bool(state.get('primed'))
+        self.last_new = state.get('last_new')
+
+class JSONLSubscriber:
+    """Appends each new filing as one JSON line"""
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def __call__(self, entry):
+        line = json.dumps(dict(entry.to_dict(), seen_at=time.strftime('%Y-%m-%dT%H:%M:%S')))
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+def _cik(cik):
+    return str(int(cik)).zfill(10)
+
+class FilingWatcher:
+    """
+    Polls feeds and announces filings it has not seen before
+
+    Usage:
+        watcher = FilingWatcher()
+        watcher.watch_latest('13F-HR', ciks=watchlist)
+        for cik in watchlist:
+            watcher.watch_company(cik, forms=['13F-HR', '8-K'])
+        watcher.subscribe(print)
+        queue = watcher.subscribe_queue()
+        watcher.run()
+
+    Args:
+        state_dir (str): Where the seen-set and feed state (ETags, intervals) are kept
+        max_workers (int): Feeds polled concurrently when several are due together
+        backfill (bool): Announce the entries already present on a feed's first read
+    """
+    def __init__(self, state_dir=WATCH_DIR, max_workers=4, backfill=False):
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_path = os.path.join(state_dir, 'feeds.json')
+        self.seen = SeenSet(os.path.join(state_dir, 'seen.txt'))
+        self.max_workers = max_workers
+        self.backfill = backfill
+        self.feeds = {}
+        self.queue = []
+        self.subscribers = []
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        try:
+            with open(self.state_path, 'r') as f:
+                self.saved_state = json.load(f)
+        except (OSError, ValueError):
+            self.saved_state = {}
+
+    def add_feed(self, feed):
+        if feed.key in self.saved_state:
+            feed.restore(self.saved_state[feed.key])
+        with self.lock:
+            self.feeds[feed.key] = feed
+            heapq.heappush(self.queue, (feed.next_poll, feed.key))
+        return feed
+
+    def watch_company(self, cik, forms=None, min_interval=MIN_INTERVAL * 2, max_interval=COMPANY_MAX_INTERVAL):
+        """Poll one company's feed, optionally only announcing some form types"""
+        cik = _cik(cik)
+        return self.add_feed(Feed(f"cik:{cik}", company_feed_url(cik), cik, forms, None,
+                                  min_interval, max_interval))
+
+    def watch_latest(self, form, ciks=None, min_interval=MIN_INTERVAL, max_interval=LATEST_MAX_INTERVAL):
+        """Poll the global latest-filings feed for a form type, optionally only for some CIKs"""
+        ciks = [_cik(cik) for cik in ciks] if ciks else None
+        key = f"latest:{form}"
+        return self.add_feed(Feed(key, latest_feed_url(form), '', [form] if form else None, ciks,
+                                  min_interval, max_interval))
+
+    def subscribe(self, subscriber):
+        """Call subscriber(entry) for every new filing, in the order they were filed"""
+        self.subscribers.append(subscriber)
+        return subscriber
+
+    def subscribe_queue(self, queue=None):
+        """Put every new filing on a queue.Queue, created when not given"""
+        if queue is None:
+            import queue as queue_module
+            queue = queue_module.Queue()
+        self.subscribe(queue.put)
+        return queue
+
+    def publish(self, entry):
+        for subscriber in self.subscribers:
+            try:
+                subscriber(entry)
+            except Exception as e:
+                print(f"Subscriber error for {entry.accession}: {e}")
+
+    def next_poll(self, feed, changed, now):
+        """Time of the next poll of a feed, after it was just polled at `now`"""
+        if changed:
+            feed.interval = feed.min_interval
+        else:
+            feed.interval = min(feed.max_interval, feed.interval * BACKOFF)
+        return now + feed.interval
+
+    def poll(self, feed):
+        """
+        Poll one feed now
+
+        Returns:
+            list: New FeedEntry records, oldest first
+        """
+        headers = {}
+        if feed.etag:
+            headers['If-None-Match'] = feed.etag
+        if feed.modified:
+            headers['If-Modified-Since'] = feed.modified
+        try:
+            response = get(feed.url, headers=headers, stream=True)
+        except Exception as e:
+            print(f"Error polling {feed.key}: {e}")
+            return None
+
+        try:
+            if response.status_code == 304:
+                return []
+            if response.status_code in (403, 429):
+                print(f"Throttled polling {feed.key} (HTTP {response.status_code})")
+                return None
+            if response.status_code != 200:
+                print(f"Error polling {feed.key}: HTTP {response.status_code}")
+                return None
+            # Entries are parsed as the body arrives instead of after it is buffered
+            entries = list(iter_feed(response.iter_content(65536), feed.cik))
+        except Exception as e:
+            print(f"Error reading {feed.key}: {e}")
+            return None
+        finally:
+            response.close()
+
+        # Only remember the validators once the whole body was read
+        feed.etag = response.headers.get('ETag') or feed.etag
+        feed.modified = response.headers.get('Last-Modified') or feed.modified
+
+        announce = feed.primed or self.backfill
+        feed.primed = True
+        new = []
+        # Feeds list newest first, announce in filing order
+        for entry in reversed(entries):
+            if feed.wants(entry) and self.seen.add(entry.accession) and announce:
+                new.append(entry)
+        return new
+
+    def _poll_and_reschedule(self, feed):
+        new = self.poll(feed)
+        # Subscribers (and a scheduler's filed()) see the entries before the next poll is planned
+        for entry in new or []:
+            self.publish(entry)
+        now = time.time()
+        if new is None:
+            # Errors and throttling back off the same way as an unchanged feed
+            feed.interval = min(feed.max_interval, feed.interval * BACKOFF * BACKOFF)
+            feed.next_poll = now + feed.interval
+        else:
+            if new:
+                feed.last_new = now
+            feed.next_poll = self.next_poll(feed, bool(new), now)
+        with self.lock:
+            heapq.heappush(self.queue, (feed.next_poll, feed.key))
+        return new or []
+
+    def due_feeds(self, now=None):
+        """Pop every feed whose poll time has come"""
+        now = time.time() if now is None else now
+        due = []
+        with self.lock:
+            while self.queue and self.queue[0][0] <= now:
+                _, key = heapq.heappop(self.queue)
+                feed = self.feeds.get(key)
+                if feed is not None:
+                    due.append(feed)
+        return due
+
+    def poll_due(self, executor=None):
+        """
+        Poll every feed that is due, several at a time
+
+        Returns:
+            list: New FeedEntry records announced this round
+        """
+        due = self.due_feeds()
+        if not due:
+            return []
+        if executor is None or len(due) == 1:
+            results = [self._poll_and_reschedule(feed) for feed in due]
+        else:
+            results = list(executor.map(self._poll_and_reschedule, due))
+        self.save_state()
+        return [entry for new in results for entry in new]
+
+    def save_state(self):
+        with self.lock:
+            state = dict(self.saved_state)
+            state.update({key: feed.state() for key, feed in self.feeds.items()})
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def seconds_until_next(self):
+        with self.lock:
+            if not self.queue:
+                return None
+            return max(0.0, self.queue[0][0] - time.time())
+
+    def run(self):
+        """Poll until stop() is called"""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while not self.stopped.is_set():
+                self.poll_due(executor)
+                wait = self.seconds_until_next()
+                self.stopped.wait(1.0 if wait is None else min(wait, 5.0))
+        self.seen.close()
+
+    def stop(self):
+        self.stopped.set()
+
+def _read_ciks(path):
+    with open(path, 'r') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Watch EDGAR feeds and report new filings")
+    parser.add_argument('--cik', nargs='*', default=[], help="CIKs to watch")
+    parser.add_argument('--ciks-file', help="File with one CIK per line")
+    parser.add_argument('--latest', nargs='*', default=[], help="Form types to follow on the global latest-filings feed")
+    parser.add_argument('--forms', nargs='*', help="Only report these form types from company feeds")
+    parser.add_argument('--jsonl', help="Append new filings to this JSON lines file")
+    parser.add_argument('--state-dir', default=WATCH_DIR, help="Seen-set and feed state directory")
+    parser.add_argument('--backfill', action='store_true', help="Report entries already in the feeds at startup")
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    ciks = list(args.cik) + (_read_ciks(args.ciks_file) if args.ciks_file else [])
+    if not ciks and not args.latest:
+        parser.error("give --cik, --ciks-file or --latest")
+
+    watcher = FilingWatcher(args.state_dir, args.workers, args.backfill)
+    for form in args.latest:
+        watcher.watch_latest(form, ciks=ciks or None)
+    for cik in ciks:
+        watcher.watch_company(cik, forms=args.forms)
+    watcher.subscribe(lambda entry: print(f"{entry.updated} {entry.form:<8} {entry.cik} {entry.accession} {entry.title}"))
+    if args.jsonl:
+        watcher.subscribe(JSONLSubscriber(args.jsonl))
+
+    print(f"Watching {len(watcher.feeds)} feeds, {len(watcher.seen)} filings already seen")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        watcher.stop()
+        watcher.save_state()
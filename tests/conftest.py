@@ -0,0 +1,12 @@
+"""
+The tools are flat script directories, make them importable the way the scripts import
+each other (quarterly_reports modules use bare names like `from fact_store import ...`)
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (os.path.join(ROOT, '13f'), os.path.join(ROOT, 'quarterly_reports'), ROOT):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,100 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+import bulk_ingest
+from bulk_ingest import ingest_companyfacts_zip, ingest_submissions_zip, list_partitions, read_table
+
+def _company_facts(cik, revenue):
+    return {'cik': cik, 'entityName': f"Company {cik}", 'facts': {'us-gaap': {
+        'Revenues': {'units': {'USD': [
+            {'start': '2023-01-01', 'end': '2023-12-31', 'val': revenue, 'filed': '2024-02-01',
+             'accn': f"{cik:010d}-24-000001", 'fy': 2023, 'fp': 'FY', 'form': '10-K', 'frame': 'CY2023'},
+        ]}},
+        'Assets': {'units': {'USD': [
+            {'end': '2023-12-31', 'val': revenue * 5, 'filed': '2024-02-01',
+             'accn': f"{cik:010d}-24-000001", 'fy': 2023, 'fp': 'FY', 'form': '10-K'},
+        ]}},
+    }}}
+
+def _submission(cik):
+    return {'cik': str(cik), 'name': f"Company {cik}", 'tickers': ['CO'], 'sic': '3571',
+            'filings': {'recent': {
+                'accessionNumber': [f"{cik:010d}-24-000001"], 'form': ['10-K'],
+                'filingDate': ['2024-02-01'], 'reportDate': ['2023-12-31'],
+                'acceptanceDateTime': ['2024-02-01T16:00:00.000Z'], 'primaryDocument': ['k.htm'],
+                'isXBRL': [1],
+            }}}
+
+def _write_zip(path, documents):
+    with zipfile.ZipFile(path, 'w') as archive:
+        for name, document in documents.items():
+            archive.writestr(name, json.dumps(document))
+    return str(path)
+
+@pytest.fixture
+def companyfacts_zip(tmp_path):
+    return _write_zip(tmp_path / 'companyfacts.zip', {
+        f"CIK{cik:010d}.json": _company_facts(cik, revenue) for cik, revenue in ((1, 10.0), (2, 20.0), (3, 30.0))
+    })
+
+@pytest.fixture
+def submissions_zip(tmp_path):
+    documents = {f"CIK{cik:010d}.json": _submission(cik) for cik in (1, 2)}
+    documents['CIK0000000001-submissions-001.json'] = {
+        'accessionNumber': ['0000000001-10-000001'], 'form': ['10-K'], 'filingDate': ['2010-02-01'],
+    }
+    return _write_zip(tmp_path / 'submissions.zip', documents)
+
+def test_ingest_companyfacts(companyfacts_zip, tmp_path):
+    store_dir = str(tmp_path / 'store')
+    assert ingest_companyfacts_zip(companyfacts_zip, store_dir, max_workers=1, batch_size=2) == 6
+    assert len(list_partitions(store_dir, 'facts')) == 2
+    facts = read_table(store_dir, 'facts')
+    assert sorted(facts['cik'].tolist()) == [1, 1, 2, 2, 3, 3]
+    revenue = facts['concept'] == 'us-gaap:Revenues'
+    assert sorted(facts['val'][revenue].tolist()) == [10.0, 20.0, 30.0]
+
+def test_ingest_submissions(submissions_zip, tmp_path):
+    store_dir = str(tmp_path / 'store')
+    assert ingest_submissions_zip(submissions_zip, store_dir, max_workers=1) == 3
+    filings = read_table(store_dir, 'filings')
+    assert sorted(filings['accession'].tolist())[0] == '0000000001-10-000001'
+    companies = read_table(store_dir, 'companies')
+    assert sorted(companies['cik'].tolist()) == [1, 2]
+    assert companies['sic'].tolist() == [3571, 3571]
+
+def test_failed_run_keeps_previous_partitions(companyfacts_zip, tmp_path, monkeypatch):
+    store_dir = str(tmp_path / 'store')
+    ingest_companyfacts_zip(companyfacts_zip, store_dir, max_workers=1)
+
+    def interrupted(*args):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(bulk_ingest, '_run_batches', interrupted)
+    with pytest.raises(KeyboardInterrupt):
+        ingest_companyfacts_zip(companyfacts_zip, store_dir, max_workers=1)
+    assert len(read_table(store_dir, 'facts')['val']) == 6
+    assert sorted(os.listdir(store_dir)) == ['facts']
+
+def test_universe_store_slices_companies_by_cik(companyfacts_zip, submissions_zip, tmp_path):
+    from universe_store import build_universe_store, UniverseStore
+
+    store_dir = str(tmp_path / 'store')
+    ingest_submissions_zip(submissions_zip, store_dir, max_workers=1)
+    ingest_companyfacts_zip(companyfacts_zip, store_dir, max_workers=1)
+    build_universe_store(store_dir)
+    store = UniverseStore(store_dir)
+
+    table = store.fact_table(cik=2)
+    assert table['cik'].tolist() == [2, 2]
+    assert sorted(table['concept'].tolist()) == ['us-gaap:Assets', 'us-gaap:Revenues']
+    assert store.has_facts(3) and not store.has_facts(4)
+    assert not len(store.company_rows(4))
+
+    # Stores built before the per-CIK index derive it on open
+    for name in ('cik_keys', 'cik_starts', 'cik_pairs'):
+        os.remove(os.path.join(store_dir, 'universe', name + '.npy'))
+    assert UniverseStore(store_dir).company_rows(2).tolist() == store.company_rows(2).tolist()
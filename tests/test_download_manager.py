@@ -0,0 +1,91 @@
+import json
+import os
+
+import pytest
+
+import download_manager
+from download_manager import (DownloadManifest, FAILED, FETCHED, FETCHED_DIR, PARSED, PENDING,
+                              find_resumable_directory, retry_with_backoff, run_download_jobs)
+
+def _filing(n):
+    return {'accession': f"0000000001-24-{n:06d}", 'date': f"2024-0{n}-01", 'type': '10-Q'}
+
+@pytest.fixture
+def delays(monkeypatch):
+    slept = []
+    monkeypatch.setattr(download_manager.time, 'sleep', slept.append)
+    return slept
+
+def test_retry_gives_up_after_every_attempt(delays):
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        raise OSError("connection reset")
+
+    assert retry_with_backoff(fetch, attempts=4, base_delay=1.0) == (None, "connection reset", 4)
+    assert len(calls) == 4
+    # Exponential backoff with jitter in [0.5, 1.0] of 1, 2, 4 seconds
+    assert len(delays) == 3
+    assert all(0.5 * 2 ** i <= delay <= 2 ** i for i, delay in enumerate(delays))
+
+def test_failed_jobs_stay_failed(tmp_path, delays):
+    manifest = DownloadManifest(str(tmp_path))
+    manifest.add([_filing(1), _filing(2)])
+
+    def fetch(filing):
+        return None if filing['accession'].endswith('1') else {'n': filing['accession']}
+
+    states = run_download_jobs(manifest, fetch, lambda filing, data: 'out', max_workers=1, attempts=2)
+    assert states == {FAILED: 1, PARSED: 1}
+    failed = manifest.jobs[_filing(1)['accession']]
+    assert failed['attempts'] == 2 and failed['error'] == "no data returned"
+
+    # Adding the same selection again neither resets nor reruns the failed job
+    reopened = DownloadManifest(str(tmp_path))
+    reopened.add([_filing(1), _filing(2)])
+    assert reopened.jobs[_filing(1)['accession']]['state'] == FAILED
+    assert reopened.unfinished() == []
+
+def test_resume_writes_fetched_jobs_without_refetching(tmp_path, delays):
+    manifest = DownloadManifest(str(tmp_path))
+    manifest.add([_filing(1)])
+    accession = _filing(1)['accession']
+
+    def crash(filing, data):
+        raise RuntimeError("killed while writing")
+
+    run_download_jobs(manifest, lambda filing: {'value': 1}, crash, max_workers=1)
+    assert manifest.jobs[accession]['state'] == FETCHED
+    fetched_path = os.path.join(str(tmp_path), FETCHED_DIR, f"{accession}.json")
+    with open(fetched_path) as f:
+        assert json.load(f) == {'value': 1}
+
+    def no_network(filing):
+        raise AssertionError("fetched again")
+
+    written = []
+    reopened = DownloadManifest(str(tmp_path))
+    states = run_download_jobs(reopened, no_network, lambda filing, data: written.append(data) or 'out',
+                               max_workers=1)
+    assert states == {PARSED: 1}
+    assert written == [{'value': 1}]
+    assert not os.path.exists(fetched_path)
+
+def test_resume_only_for_the_same_selection(tmp_path):
+    older = tmp_path / 'Company_20240101_000000'
+    newer = tmp_path / 'Company_20240102_000000'
+    for directory, filings in ((older, [_filing(1), _filing(2)]), (newer, [_filing(3)])):
+        directory.mkdir()
+        DownloadManifest(str(directory)).add(filings)
+
+    selection = [_filing(1)['accession'], _filing(2)['accession']]
+    assert find_resumable_directory(str(tmp_path), 'Company', selection) == str(older)
+    assert find_resumable_directory(str(tmp_path), 'Company', selection[:1]) is None
+
+    # A finished directory is not resumed
+    manifest = DownloadManifest(str(older))
+    for accession in selection:
+        manifest.update(accession, state=PARSED)
+    assert find_resumable_directory(str(tmp_path), 'Company', selection) is None
+    assert DownloadManifest(str(newer)).jobs[_filing(3)['accession']]['state'] == PENDING
@@ -0,0 +1,36 @@
+import os
+
+from sec_client.feeds import FeedParser, benchmark, parse_feed
+
+FEED_PATH = os.path.join(os.path.dirname(__file__), 'fixtures', 'latest_filings.xml')
+
+def _content():
+    with open(FEED_PATH, 'rb') as f:
+        return f.read()
+
+def test_parse_feed_reads_every_entry():
+    title, entries = parse_feed(_content())
+
+    assert title.startswith('Latest Filings')
+    assert len(entries) == 32
+    first = entries[0]
+    assert (first.accession, first.form, first.cik) == ('0000320193-24-000100', '10-K', '0000320193')
+    assert first.date == '2024-02-15'
+    # Reporting owners carry their own CIK in the title
+    assert entries[4].form == '4' and entries[4].cik == '0001214156'
+
+def test_small_chunks_give_the_same_entries():
+    content = _content()
+    parser = FeedParser()
+    entries = []
+    for start in range(0, len(content), 97):
+        entries.extend(parser.feed(content[start:start + 97]))
+    entries.extend(parser.close())
+
+    expected = parse_feed(content)[1]
+    assert [entry.to_dict() for entry in entries] == [entry.to_dict() for entry in expected]
+
+def test_benchmark_counts_the_fixture():
+    results = benchmark([FEED_PATH], repeat=1)
+
+    assert results['iterparse'][2] == 32
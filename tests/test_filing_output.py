@@ -0,0 +1,56 @@
+import os
+
+import pytest
+
+from filing_output import JSONLSink, read_record
+
+@pytest.fixture(params=[False, True], ids=['plain', 'gzip'])
+def compress(request):
+    return request.param
+
+def _tear(path, compress):
+    """Leave the file as a crash in the middle of the last write would"""
+    with open(path, 'rb') as f:
+        content = f.read()
+    if not compress:
+        content += b'{"accession":"torn'
+    else:
+        content = content[:-20]
+    with open(path, 'wb') as f:
+        f.write(content)
+
+def test_reopen_does_not_append_a_record_twice(tmp_path, compress):
+    directory = str(tmp_path)
+    sink = JSONLSink(directory, compress)
+    first = sink.write({'accession': 'a1', 'n': 1})
+    sink.write({'note': 'no accession'})
+    sink.close()
+
+    sink = JSONLSink(directory, compress)
+    again = sink.write({'accession': 'a1', 'n': 1})
+    second = sink.write({'accession': 'a2', 'n': 2})
+    sink.close()
+
+    assert again == first
+    # Line numbers count every line, not only those with an accession
+    assert second.get('line', 2) == 2
+    assert read_record(directory, second) == {'accession': 'a2', 'n': 2}
+
+def test_reopen_cuts_a_torn_tail(tmp_path, compress):
+    directory = str(tmp_path)
+    sink = JSONLSink(directory, compress)
+    kept = sink.write({'accession': 'a1'})
+    sink.write({'accession': 'big', 'padding': 'x' * 4000})
+    sink.close()
+    _tear(sink.path, compress)
+
+    sink = JSONLSink(directory, compress)
+    if compress:
+        # The damaged gzip member is dropped with the record in it
+        assert sorted(sink.written) == ['a1']
+    entry = sink.write({'accession': 'a3'})
+    sink.close()
+
+    assert read_record(directory, kept) == {'accession': 'a1'}
+    assert read_record(directory, entry) == {'accession': 'a3'}
+    assert not os.path.exists(sink.path + '.tmp')
@@ -0,0 +1,67 @@
+import pytest
+
+from fact_store import flatten_company_facts
+from point_in_time import AsOfIndex
+
+CIK = 320193
+
+def _fact(start, end, val, filed, accn, form='10-K'):
+    fact = {'end': end, 'val': val, 'filed': filed, 'accn': accn, 'form': form}
+    if start:
+        fact['start'] = start
+    return fact
+
+# FY2023 revenue filed with the 10-K, then restated a year later. The same 10-K also reports
+# the fourth quarter alone, which ends on the same date, and the Q3 10-Q a nine-month figure.
+COMPANY_FACTS = {
+    'cik': CIK,
+    'facts': {'us-gaap': {
+        'Revenues': {'units': {'USD': [
+            _fact('2023-01-01', '2023-12-31', 100.0, '2024-02-01', 'A'),
+            _fact('2023-10-01', '2023-12-31', 30.0, '2024-02-01', 'A'),
+            _fact('2023-01-01', '2023-09-30', 70.0, '2023-11-01', 'Q', form='10-Q'),
+            _fact('2023-01-01', '2023-12-31', 110.0, '2025-02-01', 'B'),
+        ]}},
+        'Assets': {'units': {'USD': [
+            _fact(None, '2023-12-31', 500.0, '2024-02-01', 'A'),
+        ]}},
+    }},
+}
+
+@pytest.fixture
+def facts():
+    return flatten_company_facts(COMPANY_FACTS)
+
+def test_as_of_ignores_later_restatement(facts):
+    index = AsOfIndex(facts, 'annual')
+    assert index.value(CIK, 'us-gaap:Revenues', '2023-12-31', '2024-06-30') == 100.0
+    assert index.value(CIK, 'us-gaap:Revenues', '2023-12-31', '2025-06-30') == 110.0
+    assert index.value(CIK, 'us-gaap:Revenues', '2023-12-31', '2024-01-31') is None
+
+def test_period_type_picks_duration_sharing_end_date(facts):
+    quarterly = AsOfIndex(facts, 'quarter')
+    assert quarterly.value(CIK, 'us-gaap:Revenues', '2023-12-31', '2025-06-30') == 30.0
+    instant = AsOfIndex(facts, 'instant')
+    assert instant.value(CIK, 'us-gaap:Assets', '2023-12-31', '2024-06-30') == 500.0
+    assert instant.value(CIK, 'us-gaap:Revenues', '2023-12-31', '2024-06-30') is None
+
+def test_panel_as_of_per_period(facts):
+    index = AsOfIndex(facts, 'annual')
+    values, mask = index.panel([CIK], ['us-gaap:Revenues'], ['2023-12-31'], ['2024-06-30'])
+    assert mask.tolist() == [[[True]]]
+    assert values[0, 0, 0] == 100.0
+    assert len(index.history(CIK, 'us-gaap:Revenues', '2023-12-31')['val']) == 2
+
+def test_period_type_is_required(facts):
+    with pytest.raises(ValueError):
+        AsOfIndex(facts, None)
+
+def test_several_units_need_a_unit(facts):
+    company_facts = {'cik': CIK, 'facts': {'us-gaap': {'Revenues': {'units': {
+        'USD': [_fact('2023-01-01', '2023-12-31', 100.0, '2024-02-01', 'A')],
+        'EUR': [_fact('2023-01-01', '2023-12-31', 90.0, '2024-02-01', 'A')],
+    }}}}}
+    table = flatten_company_facts(company_facts)
+    with pytest.raises(ValueError):
+        AsOfIndex(table, 'annual')
+    assert AsOfIndex(table, 'annual', unit='EUR').value(CIK, 'us-gaap:Revenues', '2023-12-31', '2024-06-30') == 90.0
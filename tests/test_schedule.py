@@ -0,0 +1,97 @@
+import time
+from datetime import date, datetime, timedelta
+
+from sec_client.filing_index import FilingIndex
+from sec_client.schedule import (COLD_INTERVAL, HOT_INTERVAL, WARM_INTERVAL, PollScheduler, add_months,
+                                 learn_expectations, next_quarter_end)
+
+CIK = '0000000001'
+
+def _index(filings):
+    """FilingIndex from (form, report date, filing date) rows, newest first"""
+    return FilingIndex({
+        'accessionNumber': [f"0000000001-24-{i:06d}" for i in range(len(filings))],
+        'form': [form for form, _, _ in filings],
+        'reportDate': [report for _, report, _ in filings],
+        'filingDate': [filed for _, _, filed in filings],
+        'acceptanceDateTime': [f"{filed}T16:00:00.000Z" for _, _, filed in filings],
+    }, CIK)
+
+# Calendar year filer, 10-Qs about 33 days after quarter end
+DECEMBER_FILER = _index([
+    ('10-Q', '2024-09-30', '2024-11-01'),
+    ('10-Q', '2024-06-30', '2024-08-02'),
+    ('10-Q', '2024-03-31', '2024-05-03'),
+    ('10-K', '2023-12-31', '2024-02-02'),
+    ('10-K', '2022-12-31', '2023-02-03'),
+])
+DECEMBER_SUBMISSIONS = {'fiscalYearEnd': '1231', 'category': 'Large accelerated filer'}
+
+def _by_form(expectations):
+    return {expectation.form: expectation for expectation in expectations}
+
+def _epoch(year, month, day, hour=12):
+    return time.mktime(datetime(year, month, day, hour).timetuple())
+
+def test_add_months_keeps_month_ends():
+    assert add_months(date(2024, 1, 31), 1) == date(2024, 2, 29)
+    assert add_months(date(2024, 2, 29), 12) == date(2025, 2, 28)
+    assert add_months(date(2023, 2, 28), 1) == date(2023, 3, 31)
+    assert add_months(date(2024, 1, 30), 1) == date(2024, 2, 29)
+    assert add_months(date(2024, 11, 15), 3) == date(2025, 2, 15)
+    assert next_quarter_end(date(2024, 3, 31)) == date(2024, 6, 30)
+    assert next_quarter_end(date(2024, 2, 10)) == date(2024, 3, 31)
+
+def test_december_filer_skips_the_fourth_quarter_10q():
+    expectations = _by_form(learn_expectations(DECEMBER_FILER, DECEMBER_SUBMISSIONS, today=date(2024, 11, 15)))
+
+    # Q4 is reported on the 10-K, the next 10-Q covers the first quarter
+    ten_q = expectations['10-Q']
+    assert ten_q.period_end == date(2025, 3, 31)
+    assert ten_q.expected == date(2025, 3, 31) + timedelta(days=33)
+
+    ten_k = expectations['10-K']
+    assert ten_k.period_end == date(2024, 12, 31)
+    assert ten_k.expected == date(2025, 2, 2)
+    assert (ten_k.window_start, ten_k.window_end) == (date(2025, 1, 30), date(2025, 3, 4))
+
+def test_closed_windows_roll_forward():
+    expectations = _by_form(learn_expectations(DECEMBER_FILER, DECEMBER_SUBMISSIONS, today=date(2025, 6, 1)))
+    assert expectations['10-K'].period_end == date(2025, 12, 31)
+    assert expectations['10-Q'].period_end == date(2025, 6, 30)
+
+def test_september_52_53_week_filer():
+    # Fiscal years end on the last Saturday of September, quarters on Saturdays
+    index = _index([
+        ('10-Q', '2024-06-29', '2024-08-02'),
+        ('10-Q', '2024-03-30', '2024-05-03'),
+        ('10-Q', '2023-12-30', '2024-02-02'),
+        ('10-K', '2023-09-30', '2023-11-03'),
+        ('10-K', '2022-09-24', '2022-10-28'),
+    ])
+    submissions = {'fiscalYearEnd': '0928', 'category': 'Large accelerated filer'}
+    expectations = _by_form(learn_expectations(index, submissions, today=date(2024, 8, 10)))
+
+    # June 29 + 3 months lands in the fiscal year end month and is skipped for the 10-K
+    assert expectations['10-Q'].period_end == date(2024, 12, 29)
+    assert expectations['10-K'].period_end == date(2024, 9, 30)
+
+def test_next_check_intervals():
+    scheduler = PollScheduler()
+    scheduler.expectations[CIK] = learn_expectations(DECEMBER_FILER, DECEMBER_SUBMISSIONS, today=date(2024, 11, 15))
+    scheduler.annual_months[CIK] = 12
+
+    # Inside the 10-K window, in the days before it, and the night before the warm period
+    now = _epoch(2025, 2, 1)
+    assert scheduler.next_check(CIK, now) == now + HOT_INTERVAL
+    now = _epoch(2025, 1, 28)
+    assert scheduler.next_check(CIK, now) == now + WARM_INTERVAL
+    now = _epoch(2025, 1, 26, 22)
+    assert scheduler.next_check(CIK, now) == _epoch(2025, 1, 27, 0)
+    now = _epoch(2024, 12, 1)
+    assert scheduler.next_check(CIK, now) == now + COLD_INTERVAL
+
+    # A window that closed without a filing moves on to the next period
+    now = _epoch(2025, 3, 10)
+    assert scheduler.next_check(CIK, now) == now + COLD_INTERVAL
+    assert _by_form(scheduler.expectations[CIK])['10-K'].period_end == date(2025, 12, 31)